@@ -3,16 +3,282 @@
 This script aggregates several tracefiles into one tracefile.
 All but the last argument are input tracefiles or .txt files which list tracefiles.
 The last argument is the tracefile to which the output will be written.
+
+The tracefiles are merged the way 'lcov -a' merges them, without running lcov. Each input is
+first rewritten with its records sorted by source file, then the sorted files are merged in pairs
+by a pool of worker processes until one is left. Merging two sorted files only holds the records
+for one source file in memory at a time, so thousands of inputs can be merged quickly and in
+bounded memory.
 """
 
-import subprocess
+import collections
+import multiprocessing
 import os
+import re
+import shutil
+import subprocess
 import sys
+import tempfile
 from optparse import OptionParser
 
+# lcov only allows word characters in test names and replaces any others.
+_TEST_NAME_INVALID_CHARS = re.compile(r"\W")
+
+_FN_LINE = re.compile(r"FN:(\d+),([^,]+)")
+_FNDA_LINE = re.compile(r"FNDA:(\d+),([^,]+)")
+_BRDA_LINE = re.compile(r"BRDA:(\d+),(\d+),(\d+),(\d+|-)")
+
+
+class TestData(object):
+    """The coverage of one source file by one test."""
+
+    def __init__(self):
+        """Initialize TestData."""
+        self.lines = {}
+        self.function_counts = {}
+        # Line number to an ordered dict of (block, branch) to the times it was taken, or '-'.
+        self.branches = {}
+
+    def merge(self, other):
+        """Add the counts in 'other' to these."""
+        for line, count in other.lines.items():
+            self.lines[line] = self.lines.get(line, 0) + count
+        for name, count in other.function_counts.items():
+            self.function_counts[name] = self.function_counts.get(name, 0) + count
+        for line, branches in other.branches.items():
+            for block_branch, taken in branches.items():
+                self.add_branch(line, block_branch, taken)
+
+    def add_branch(self, line, block_branch, taken):
+        """Add the times a branch was taken, where '-' means its block never ran."""
+        branches = self.branches.setdefault(line, collections.OrderedDict())
+        current = branches.get(block_branch, "-")
+        if taken == "-":
+            taken = current
+        elif current != "-":
+            taken += current
+        branches[block_branch] = taken
+
+
+class SourceEntry(object):
+    """The coverage of one source file, by test name."""
+
+    def __init__(self):
+        """Initialize SourceEntry."""
+        self.function_lines = {}
+        self.tests = {}
+
+    def merge(self, other):
+        """Add the coverage in 'other' to this; function lines already known take precedence."""
+        for name, line in other.function_lines.items():
+            self.function_lines.setdefault(name, line)
+        for test_name, test_data in other.tests.items():
+            if test_name in self.tests:
+                self.tests[test_name].merge(test_data)
+            else:
+                self.tests[test_name] = test_data
+
+    def drop_empty_tests(self):
+        """Drop the tests without line data, which lcov ignores."""
+        self.tests = {name: test for name, test in self.tests.items() if test.lines}
+
+
+def read_records(path, branch_coverage):
+    """Yield a (source file, test name, function lines, TestData) tuple per record in 'path'."""
+    test_name = ""
+    source_file = None
+    function_lines = None
+    test_data = None
+    lines = None
+
+    with open(path) as tracefile:
+        for line in tracefile:
+            # Line data is most of any tracefile, so it is parsed without a regular expression.
+            if line.startswith("DA:"):
+                if source_file is None:
+                    continue
+                fields = line[3:].split(",", 2)
+                try:
+                    number = int(fields[0])
+                    count = int(fields[1])
+                except (IndexError, ValueError):
+                    continue
+                lines[number] = lines.get(number, 0) + count
+                continue
+
+            line = line.rstrip("\n")
+            if line.startswith("TN:"):
+                test_name = _TEST_NAME_INVALID_CHARS.sub("_", line[3:].split(",")[0])
+            elif line.startswith("SF:"):
+                source_file = line[3:]
+                function_lines = {}
+                test_data = TestData()
+                lines = test_data.lines
+            elif source_file is None:
+                continue
+            elif line == "end_of_record":
+                yield source_file, test_name, function_lines, test_data
+                source_file = None
+            elif line.startswith("FN:"):
+                match = _FN_LINE.match(line)
+                if match:
+                    function_lines[match.group(2)] = int(match.group(1))
+            elif line.startswith("FNDA:"):
+                match = _FNDA_LINE.match(line)
+                if match:
+                    name = match.group(2)
+                    test_data.function_counts[name] = (
+                        test_data.function_counts.get(name, 0) + int(match.group(1)))
+            elif line.startswith("BRDA:") and branch_coverage:
+                match = _BRDA_LINE.match(line)
+                if match:
+                    taken = match.group(4)
+                    test_data.add_branch(
+                        int(match.group(1)), (match.group(2), match.group(3)),
+                        taken if taken == "-" else int(taken))
+
+
+def read_entries(path, branch_coverage):
+    """Yield a (source file, SourceEntry) pair per run of records for the same source file."""
+    current_file = None
+    entry = None
+    for source_file, test_name, function_lines, test_data in read_records(path, branch_coverage):
+        if source_file != current_file:
+            if entry is not None:
+                yield current_file, entry
+            current_file = source_file
+            entry = SourceEntry()
+        # Within one tracefile, the last line given for a function is kept.
+        entry.function_lines.update(function_lines)
+        if test_name in entry.tests:
+            entry.tests[test_name].merge(test_data)
+        else:
+            entry.tests[test_name] = test_data
+    if entry is not None:
+        yield current_file, entry
 
-def aggregate(inputs, output):
+
+def write_entry(out, source_file, entry):
+    """Write the records for a source file the way lcov writes them, one per test."""
+    functions = sorted(entry.function_lines.items(), key=lambda item: (item[1], item[0]))
+    function_order = {name: index for index, (name, _) in enumerate(functions)}
+
+    for test_name in sorted(entry.tests):
+        test_data = entry.tests[test_name]
+        out.write("TN:%s\nSF:%s\n" % (test_name, source_file))
+
+        for name, line in functions:
+            out.write("FN:%d,%s\n" % (line, name))
+        function_counts = sorted(test_data.function_counts.items(),
+                                 key=lambda item: (function_order.get(item[0], len(functions)),
+                                                   item[0]))
+        for name, count in function_counts:
+            out.write("FNDA:%d,%s\n" % (count, name))
+        out.write("FNF:%d\nFNH:%d\n" % (len(function_counts),
+                                        sum(1 for _, count in function_counts if count > 0)))
+
+        branches_found = 0
+        branches_hit = 0
+        for line in sorted(test_data.branches):
+            for (block, branch), taken in test_data.branches[line].items():
+                out.write("BRDA:%d,%s,%s,%s\n" % (line, block, branch, taken))
+                branches_found += 1
+                if taken != "-" and taken > 0:
+                    branches_hit += 1
+        if branches_found > 0:
+            out.write("BRF:%d\nBRH:%d\n" % (branches_found, branches_hit))
+
+        lines = test_data.lines
+        lines_hit = sum(1 for count in lines.values() if count > 0)
+        out.write("".join(["DA:%d,%d\n" % (line, lines[line]) for line in sorted(lines)]))
+        out.write("LF:%d\nLH:%d\nend_of_record\n" % (len(lines), lines_hit))
+
+
+def sort_tracefile(job):
+    """Rewrite a tracefile with its records merged and sorted by source file.
+
+    'job' is an (input path, output path, branch coverage) tuple.
+    """
+    path, output, branch_coverage = job
+    entries = {}
+    for source_file, entry in read_entries(path, branch_coverage):
+        if source_file in entries:
+            entries[source_file].function_lines.update(entry.function_lines)
+            entries[source_file].merge(entry)
+        else:
+            entries[source_file] = entry
+
+    with open(output, "w") as out:
+        for source_file in sorted(entries):
+            entry = entries[source_file]
+            entry.drop_empty_tests()
+            if entry.tests:
+                write_entry(out, source_file, entry)
+    return output
+
+
+def merge_sorted_tracefiles(job):
+    """Merge two tracefiles written by sort_tracefile into a third one, and remove them.
+
+    'job' is a (first path, second path, output path, branch coverage) tuple.
+    """
+    first_path, second_path, output, branch_coverage = job
+    first = read_entries(first_path, branch_coverage)
+    second = read_entries(second_path, branch_coverage)
+
+    with open(output, "w") as out:
+        first_next = next(first, None)
+        second_next = next(second, None)
+        while first_next is not None or second_next is not None:
+            if second_next is None or (first_next is not None
+                                       and first_next[0] < second_next[0]):
+                write_entry(out, *first_next)
+                first_next = next(first, None)
+            elif first_next is None or second_next[0] < first_next[0]:
+                write_entry(out, *second_next)
+                second_next = next(second, None)
+            else:
+                first_next[1].merge(second_next[1])
+                write_entry(out, *first_next)
+                first_next = next(first, None)
+                second_next = next(second, None)
+
+    os.remove(first_path)
+    os.remove(second_path)
+    return output
+
+
+def aggregate(inputs, output, jobs=None, branch_coverage=False):
     """Aggregate the tracefiles given in inputs to a tracefile given by output."""
+    if not inputs:
+        print("no tracefiles to aggregate")
+        return 1
+
+    print("Aggregating {} tracefiles into {}".format(len(inputs), output))
+    temp_dir = tempfile.mkdtemp()
+    pool = multiprocessing.Pool(jobs)
+    try:
+        level = pool.map(sort_tracefile, [(path, os.path.join(temp_dir, "{}.info".format(index)),
+                                           branch_coverage) for index, path in enumerate(inputs)])
+        next_name = len(inputs)
+        while len(level) > 1:
+            merges = []
+            for first, second in zip(level[0::2], level[1::2]):
+                merges.append((first, second, os.path.join(temp_dir, "{}.info".format(next_name)),
+                               branch_coverage))
+                next_name += 1
+            unpaired = level[-1:] if len(level) % 2 else []
+            level = pool.map(merge_sorted_tracefiles, merges) + unpaired
+        shutil.move(level[0], output)
+    finally:
+        pool.close()
+        pool.join()
+        shutil.rmtree(temp_dir)
+    return 0
+
+
+def aggregate_with_lcov(inputs, output):
+    """Aggregate the tracefiles given in inputs to a tracefile given by output, using lcov."""
     args = ['lcov']
 
     for name in inputs:
@@ -38,8 +304,15 @@ def main():
 
     usage = "usage: %prog input1.info input2.info ... output.info"
     parser = OptionParser(usage=usage)
+    parser.add_option("-j", "--jobs", dest="jobs", type="int", default=None,
+                      help="Number of worker processes, defaults to the number of CPUs.")
+    parser.add_option("--branch-coverage", dest="branch_coverage", action="store_true",
+                      default=False,
+                      help="Keep branch coverage data, like lcov's lcov_branch_coverage=1.")
+    parser.add_option("--lcov", dest="lcov", action="store_true", default=False,
+                      help="Run lcov to aggregate the tracefiles.")
 
-    (_, args) = parser.parse_args()
+    (options, args) = parser.parse_args()
     if len(args) < 2:
         return "must supply input files"
 
@@ -55,7 +328,9 @@ def main():
         else:
             return "unrecognized file type"
 
-    return aggregate(inputs, args[-1])
+    if options.lcov:
+        return aggregate_with_lcov(inputs, args[-1])
+    return aggregate(inputs, args[-1], options.jobs, options.branch_coverage)
 
 
 if __name__ == '__main__':
@@ -7,21 +7,45 @@ from __future__ import annotations
 
 import datetime
 import distutils.spawn  # pylint: disable=no-name-in-module
+import hashlib
+import json
+import os
 import re
-from typing import Set
+import tempfile
+from typing import List, Set
 
 import yaml
 
 import buildscripts.util.runcommand as runcommand
 
+# Directory in which parsed project configurations are cached, keyed by a hash of the file.
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "mongodb", "evergreen_config")
 
-def parse_evergreen_file(path, evergreen_binary="evergreen"):
-    """Read an Evergreen file and return EvergreenProjectConfig instance."""
+# Bump when the cached representation of a project configuration changes.
+_CACHE_VERSION = 1
+
+
+def parse_evergreen_file(path, evergreen_binary="evergreen", cache_dir=DEFAULT_CACHE_DIR):
+    """Read an Evergreen file and return EvergreenProjectConfig instance.
+
+    The parsed configuration is cached in 'cache_dir' so that later calls for an unchanged file
+    skip both 'evergreen evaluate' and parsing the YAML. Caching is disabled if 'cache_dir' is None.
+    """
+    executable = None
     if evergreen_binary:
-        if not distutils.spawn.find_executable(evergreen_binary):
+        executable = distutils.spawn.find_executable(evergreen_binary)
+        if not executable:
             raise EnvironmentError(
                 "Executable '{}' does not exist or is not in the PATH.".format(evergreen_binary))
 
+    cache_file = None
+    if cache_dir:
+        cache_file = os.path.join(cache_dir, _cache_key(path, executable) + ".json")
+        config = _load_cached_config(cache_file)
+        if config is not None:
+            return EvergreenProjectConfig(config)
+
+    if evergreen_binary:
         # Call 'evergreen evaluate path' to pre-process the project configuration file.
         cmd = runcommand.RunCommand(evergreen_binary)
         cmd.add("evaluate")
@@ -29,61 +53,173 @@ def parse_evergreen_file(path, evergreen_binary="evergreen"):
         error_code, output = cmd.execute()
         if error_code:
             raise RuntimeError("Unable to evaluate {}: {}".format(path, output))
-        config = yaml.safe_load(output)
+        config = _yaml_load(output)
     else:
         with open(path, "r") as fstream:
-            config = yaml.safe_load(fstream)
+            config = _yaml_load(fstream)
+
+    if cache_file:
+        _save_cached_config(cache_file, config)
 
     return EvergreenProjectConfig(config)
 
 
+def _yaml_load(stream):
+    """Parse YAML with the libyaml based loader when PyYAML was built with it."""
+    return yaml.load(stream, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader))
+
+
+def _cache_key(path, executable):
+    """Return the cache key for the configuration at 'path' as evaluated by 'executable'."""
+    key = hashlib.sha256("{}\n".format(_CACHE_VERSION).encode("utf-8"))
+    if executable:
+        # A different evergreen binary may evaluate the same file differently.
+        stat = os.stat(executable)
+        key.update("{} {} {}\n".format(executable, stat.st_size, stat.st_mtime).encode("utf-8"))
+    with open(path, "rb") as fstream:
+        key.update(fstream.read())
+    return key.hexdigest()
+
+
+def _load_cached_config(cache_file):
+    """Return the configuration cached in 'cache_file', or None if there is none."""
+    try:
+        with open(cache_file, "r") as fstream:
+            return json.load(fstream)
+    except (IOError, ValueError):
+        return None
+
+
+def _save_cached_config(cache_file, config):
+    """Cache 'config' in 'cache_file' if it can be represented exactly as JSON."""
+    try:
+        serialized = json.dumps(config)
+        if json.loads(serialized) != config:
+            # The YAML used a type, such as a non-string key, that JSON would change.
+            return
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        temp_fd, temp_file = tempfile.mkstemp(dir=os.path.dirname(cache_file))
+        with os.fdopen(temp_fd, "w") as fstream:
+            fstream.write(serialized)
+        os.replace(temp_file, cache_file)
+    except (IOError, TypeError, ValueError):
+        # The cache is only an optimization, so failing to write it isn't an error.
+        pass
+
+
 class EvergreenProjectConfig(object):  # pylint: disable=too-many-instance-attributes
-    """Represent an Evergreen project configuration file."""
+    """Represent an Evergreen project configuration file.
+
+    The tasks, task groups and variants, and the indexes over them, are only built when first
+    used, so looking up a single variant or task doesn't pay for the whole project.
+    """
 
     def __init__(self, conf):
         """Initialize the EvergreenProjectConfig from a YML dictionary."""
         self._conf = conf
-        self.tasks = [Task(task_dict) for task_dict in self._conf["tasks"]]
-        self._tasks_by_name = {task.name: task for task in self.tasks}
-        self.task_groups = [
-            TaskGroup(task_group_dict) for task_group_dict in self._conf.get("task_groups", [])
-        ]
-        self._task_groups_by_name = {task_group.name: task_group for task_group in self.task_groups}
-        self.variants = [
-            Variant(variant_dict, self._tasks_by_name, self._task_groups_by_name)
-            for variant_dict in self._conf["buildvariants"]
-        ]
-        self._variants_by_name = {variant.name: variant for variant in self.variants}
-        self.distro_names = set()
-        for variant in self.variants:
-            self.distro_names.update(variant.distro_names)
+        self._tasks = None
+        self._tasks_by_name = None
+        self._task_groups = None
+        self._task_groups_by_name = None
+        self._variants = None
+        self._variants_by_name = {}
+        self._variant_confs_by_name = None
+        self._distro_names = None
+        self._task_names_by_tag = None
+        self._variant_names_by_task = None
+
+    @property
+    def tasks(self):
+        """Get the list of tasks as Task instances."""
+        if self._tasks is None:
+            self._tasks = [Task(task_dict) for task_dict in self._conf["tasks"]]
+        return self._tasks
+
+    @property
+    def _task_map(self):
+        if self._tasks_by_name is None:
+            self._tasks_by_name = {task.name: task for task in self.tasks}
+        return self._tasks_by_name
 
     @property
     def task_names(self):
         """Get the list of task names."""
-        return list(self._tasks_by_name.keys())
+        return list(self._task_map.keys())
 
     def get_task(self, task_name):
         """Return the task with the given name as a Task instance."""
-        return self._tasks_by_name.get(task_name)
+        return self._task_map.get(task_name)
+
+    @property
+    def task_groups(self):
+        """Get the list of task_groups as TaskGroup instances."""
+        if self._task_groups is None:
+            self._task_groups = [
+                TaskGroup(task_group_dict) for task_group_dict in self._conf.get("task_groups", [])
+            ]
+        return self._task_groups
+
+    @property
+    def _task_group_map(self):
+        if self._task_groups_by_name is None:
+            self._task_groups_by_name = {
+                task_group.name: task_group
+                for task_group in self.task_groups
+            }
+        return self._task_groups_by_name
 
     @property
     def task_group_names(self):
         """Get the list of task_group names."""
-        return list(self._task_groups_by_name.keys())
+        return list(self._task_group_map.keys())
 
     def get_task_group(self, task_group_name):
         """Return the task_group with the given name as a Task instance."""
-        return self._task_groups_by_name.get(task_group_name)
+        return self._task_group_map.get(task_group_name)
+
+    @property
+    def _variant_conf_map(self):
+        if self._variant_confs_by_name is None:
+            self._variant_confs_by_name = {
+                variant_dict["name"]: variant_dict
+                for variant_dict in self._conf["buildvariants"]
+            }
+        return self._variant_confs_by_name
+
+    @property
+    def variants(self):
+        """Get the list of build variants as Variant instances."""
+        if self._variants is None:
+            self._variants = [
+                self.get_variant(variant_dict["name"])
+                for variant_dict in self._conf["buildvariants"]
+            ]
+        return self._variants
 
     @property
     def variant_names(self):
         """Get the list of build variant names."""
-        return list(self._variants_by_name.keys())
+        return list(self._variant_conf_map.keys())
 
     def get_variant(self, variant_name: str) -> Variant:
         """Return the variant with the given name as a Variant instance."""
-        return self._variants_by_name.get(variant_name)
+        variant = self._variants_by_name.get(variant_name)
+        if variant is None:
+            variant_dict = self._variant_conf_map.get(variant_name)
+            if variant_dict is None:
+                return None
+            variant = Variant(variant_dict, self._task_map, self._task_group_map)
+            self._variants_by_name[variant_name] = variant
+        return variant
+
+    @property
+    def distro_names(self):
+        """Get the set of distro names that any build variant runs on."""
+        if self._distro_names is None:
+            self._distro_names = set()
+            for variant in self.variants:
+                self._distro_names.update(variant.distro_names)
+        return self._distro_names
 
     def get_required_variants(self) -> Set[Variant]:
         """Get the list of required build variants."""
@@ -91,7 +227,29 @@ class EvergreenProjectConfig(object):  # pylint: disable=too-many-instance-attri
 
     def get_task_names_by_tag(self, tag):
         """Return the list of tasks that have the given tag."""
-        return list(task.name for task in self.tasks if tag in task.tags)
+        if self._task_names_by_tag is None:
+            self._task_names_by_tag = {}
+            for task in self.tasks:
+                for task_tag in task.tags:
+                    self._task_names_by_tag.setdefault(task_tag, []).append(task.name)
+        return list(self._task_names_by_tag.get(tag, []))
+
+    def get_variant_names_by_task(self, task_name) -> List[str]:
+        """Return the list of names of the build variants that run the given task."""
+        if self._variant_names_by_task is None:
+            self._variant_names_by_task = {}
+            for variant_dict in self._conf["buildvariants"]:
+                variant_task_names = set()
+                for task in variant_dict["tasks"]:
+                    task_group = self._task_group_map.get(task.get("name"))
+                    if task_group is not None:
+                        variant_task_names.update(task_group.tasks)
+                    else:
+                        variant_task_names.add(task["name"])
+                for variant_task_name in variant_task_names:
+                    self._variant_names_by_task.setdefault(variant_task_name,
+                                                           []).append(variant_dict["name"])
+        return list(self._variant_names_by_task.get(task_name, []))
 
 
 class Task(object):
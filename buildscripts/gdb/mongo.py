@@ -564,10 +564,24 @@ BtIfActive()
 
 
 class MongoDBUniqueStack(gdb.Command):
-    """Print unique stack traces of all threads in current process."""
+    """Print unique stack traces of all threads in current process.
+
+    With no argument, or with 'bt', each distinct frame is symbolized once and shared by every
+    thread it appears in, and the backtraces are rendered from those symbols instead of by running
+    'bt' for each unique stack. Function arguments are not printed in this mode. When debugging a
+    core file, the unique stacks are also saved to '<core>.uniqstack.json' so that later runs
+    against the same core, with the same object files and debug symbols loaded, print them without
+    unwinding any threads. Stacks with frames that could not be symbolized are not saved, so that a
+    later run with debug symbols available symbolizes them.
+
+    Any other argument is run as a command in one thread of each unique stack.
+    """
 
     _HEADER_FORMAT = "Thread {gdb_thread_num}: {name} (Thread {pthread} (LWP {lwpid})):"
 
+    # Bump when the format of the saved unique stacks changes.
+    _INDEX_VERSION = 2
+
     def __init__(self):
         """Initialize MongoDBUniqueStack."""
         RegisterMongoCommand.register(self, "mongodb-uniqstack", gdb.COMMAND_DATA)
@@ -575,8 +589,17 @@ class MongoDBUniqueStack(gdb.Command):
     def invoke(self, arg, _from_tty):
         """Invoke GDB to dump stacks."""
         stacks = {}
-        if not arg:
-            arg = 'bt'  # default to 'bt'
+        symbols = None
+        if not arg or arg.strip() == 'bt':
+            symbols = {}
+
+        index_file = self._get_core_index_file() if symbols is not None else None
+        if index_file:
+            index = self._load_index(*index_file)
+            if index is not None:
+                print("Printing unique stacks saved in {}".format(index_file[0]))
+                self._dump_unique_stacks(index['stacks'], index['symbols'])
+                return
 
         current_thread = gdb.selected_thread()
         try:
@@ -584,15 +607,22 @@ class MongoDBUniqueStack(gdb.Command):
                 if not thread.is_valid():
                     continue
                 thread.switch()
-                self._process_thread_stack(arg, stacks, thread)
-            self._dump_unique_stacks(stacks)
+                self._process_thread_stack(arg, stacks, thread, symbols)
+            stacks = list(stacks.values())
+            if index_file and all(function for function, _, _, _ in symbols.values()):
+                self._save_index(stacks, symbols, *index_file)
+            self._dump_unique_stacks(stacks, symbols)
         finally:
             if current_thread and current_thread.is_valid():
                 current_thread.switch()
 
     @staticmethod
-    def _process_thread_stack(arg, stacks, thread):
-        """Process the thread stack."""
+    def _process_thread_stack(arg, stacks, thread, symbols):
+        """Process the thread stack.
+
+        If 'symbols' is not None, then the frames of the stack are symbolized into it. Otherwise,
+        'arg' is run for the first thread with the stack.
+        """
         thread_info = {}  # thread dict to hold per thread data
         thread_info['pthread'] = get_thread_id()
         thread_info['gdb_thread_num'] = thread.num
@@ -614,9 +644,20 @@ class MongoDBUniqueStack(gdb.Command):
         thread_info['header'] = header_format.format(**thread_info)
 
         addrs = []  # list of return addresses from frames
+        frame_keys = []  # list of keys into 'symbols' for the frames
+        inline_depth = 0
         frame = gdb.newest_frame()
         while frame:
-            addrs.append(frame.pc())
+            pc = frame.pc()
+            if symbols is not None:
+                # Inlined frames share the pc of the frame they were inlined into, so the key also
+                # counts the frames above this one with the same pc.
+                inline_depth = inline_depth + 1 if addrs and addrs[-1] == pc else 0
+                frame_key = "{:x}:{}".format(pc, inline_depth)
+                if frame_key not in symbols:
+                    symbols[frame_key] = MongoDBUniqueStack._symbolize(frame)
+                frame_keys.append(frame_key)
+            addrs.append(pc)
             try:
                 frame = frame.older()
             except gdb.error as err:
@@ -626,25 +667,120 @@ class MongoDBUniqueStack(gdb.Command):
 
         unique = stacks.setdefault(addrs_tuple, {'threads': []})
         unique['threads'].append(thread_info)
-        if 'output' not in unique:
+        if symbols is not None:
+            unique['frames'] = frame_keys
+        elif 'output' not in unique:
             try:
                 unique['output'] = gdb.execute(arg, to_string=True).rstrip()
             except gdb.error as err:
                 print("{} {}".format(thread_info['header'], err))
 
     @staticmethod
-    def _dump_unique_stacks(stacks):
+    def _symbolize(frame):
+        """Return the [function, source file, line, shared library] of a frame.
+
+        Any of them may be None if the debug information doesn't say.
+        """
+        sal = frame.find_sal()
+        if sal.symtab:
+            return [frame.name(), sal.symtab.filename, sal.line, None]
+        return [frame.name(), None, None, gdb.solib_name(frame.pc())]
+
+    @staticmethod
+    def _format_frames(frame_keys, symbols):
+        """Return the backtrace of the frames in the style of 'bt', without function arguments."""
+        lines = []
+        for level, frame_key in enumerate(frame_keys):
+            function, filename, line, solib = symbols[frame_key]
+            pc = int(frame_key.split(':')[0], 16)
+            text = "#{:<3d}0x{:016x} in {}".format(level, pc, function or "??")
+            if filename:
+                text += " at {}:{}".format(filename, line)
+            elif solib:
+                text += " from {}".format(solib)
+            lines.append(text)
+        return "\n".join(lines)
+
+    @staticmethod
+    def _get_core_index_file():
+        """Return the (index file, key) of the core being debugged, or None.
+
+        The key identifies the core file by its size and modification time, and the object files
+        gdb has loaded for it, including separate debug files, by their build-id or modification
+        time. The saved stacks are only valid for the same key.
+        """
+        match = re.search(r"Local core dump file:\s*`(?P<core>[^']+)'",
+                          gdb.execute("info files", to_string=True))
+        if not match:
+            return None
+        try:
+            core_stat = os.stat(match.group('core'))
+        except OSError:
+            return None
+        key = {
+            'core': [core_stat.st_size, core_stat.st_mtime],
+            'objfiles': MongoDBUniqueStack._get_objfiles_key()
+        }
+        return (match.group('core') + ".uniqstack.json", key)
+
+    @staticmethod
+    def _get_objfiles_key():
+        """Return a [file name, build-id or modification time] for each loaded object file."""
+        objfiles = []
+        for objfile in gdb.objfiles():
+            if not objfile.is_valid() or not objfile.filename:
+                continue
+            version = getattr(objfile, 'build_id', None)
+            if version is None:
+                try:
+                    version = os.stat(objfile.filename).st_mtime
+                except OSError:
+                    pass
+            objfiles.append([objfile.filename, version])
+        return sorted(objfiles, key=lambda objfile: objfile[0])
+
+    @staticmethod
+    def _load_index(index_file, key):
+        """Return the unique stacks saved in 'index_file' for the key, or None."""
+        try:
+            with open(index_file) as index_stream:
+                index = json.load(index_stream)
+        except (IOError, ValueError):
+            return None
+        if (index.get('version') != MongoDBUniqueStack._INDEX_VERSION
+                or index.get('key') != key):
+            return None
+        return index
+
+    @staticmethod
+    def _save_index(stacks, symbols, index_file, key):
+        """Save the unique stacks of the core to 'index_file', if possible."""
+        index = {
+            'version': MongoDBUniqueStack._INDEX_VERSION, 'key': key, 'stacks': stacks,
+            'symbols': symbols
+        }
+        try:
+            with open(index_file, "w") as index_stream:
+                json.dump(index, index_stream)
+        except IOError as err:
+            print("Unable to save unique stacks to {}: {}".format(index_file, err))
+
+    @staticmethod
+    def _dump_unique_stacks(stacks, symbols):
         """Dump the unique stacks."""
 
         def first_tid(stack):
             """Return the first tid."""
             return stack['threads'][0]['gdb_thread_num']
 
-        for stack in sorted(list(stacks.values()), key=first_tid, reverse=True):
+        for stack in sorted(stacks, key=first_tid, reverse=True):
             for i, thread in enumerate(stack['threads']):
                 prefix = '' if i == 0 else 'Duplicate '
                 print(prefix + thread['header'])
-            print(stack['output'])
+            if 'frames' in stack:
+                print(MongoDBUniqueStack._format_frames(stack['frames'], symbols))
+            elif 'output' in stack:
+                print(stack['output'])
             print()  # leave extra blank line after each thread stack
 
 
@@ -9,6 +9,7 @@ import gdb.printing
 
 try:
     import bson
+    import bson.errors
     import bson.json_util
     import collections
     from bson.codec_options import CodecOptions
@@ -97,6 +98,181 @@ class StringDataPrinter(object):
         return self.val['_data'].lazy_string(length=size)
 
 
+# Largest BSONObj size the printers will try to decode.
+BSON_MAX_PRINT_SIZE = 17 * 1024 * 1024
+
+# Fixed value lengths of BSON element types, keyed by type byte.
+_BSON_FIXED_VALUE_LENGTHS = {
+    0x01: 8,  # double
+    0x06: 0,  # undefined
+    0x07: 12,  # ObjectId
+    0x08: 1,  # bool
+    0x09: 8,  # UTC datetime
+    0x0A: 0,  # null
+    0x10: 4,  # int32
+    0x11: 8,  # timestamp
+    0x12: 8,  # int64
+    0x13: 16,  # decimal128
+    0x7F: 0,  # MaxKey
+    0xFF: 0,  # MinKey
+}
+
+
+class BSONDecodeState(object):
+    """Elements of a BSONObj in inferior memory, decoded one at a time as they are needed.
+
+    Memory is read from the inferior in chunks of READ_CHUNK_SIZE bytes, so printing the first few
+    fields of a large object only touches the start of it. Each element is validated and decoded
+    on its own; the decoded prefix is kept so that printing the same object again does not read the
+    inferior a second time.
+    """
+
+    READ_CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, address, size):
+        """Initialize BSONDecodeState."""
+        self.address = address
+        self.size = size
+        # List of (key, JSON value) pairs decoded so far.
+        self.elements = []
+        # Offset of the next element to decode.
+        self.offset = 4
+        # None until the whole object has been decoded or an invalid element has been found.
+        self.is_valid = None
+        self.error = None
+        self._chunks = {}
+
+    @property
+    def done(self):
+        """Return True when no further elements can be decoded."""
+        return self.is_valid is not None
+
+    def _read(self, offset, length):
+        """Return 'length' bytes at 'offset' within the object, reading chunks as needed."""
+        if offset < 0 or length < 0 or offset + length > self.size:
+            raise ValueError("read of %d bytes at offset %d is outside the %d byte object" %
+                             (length, offset, self.size))
+        first_chunk = offset // self.READ_CHUNK_SIZE
+        last_chunk = (offset + length - 1) // self.READ_CHUNK_SIZE if length else first_chunk
+        inferior = gdb.selected_inferior()
+        for chunk_num in range(first_chunk, last_chunk + 1):
+            if chunk_num not in self._chunks:
+                chunk_start = chunk_num * self.READ_CHUNK_SIZE
+                chunk_len = min(self.READ_CHUNK_SIZE, self.size - chunk_start)
+                self._chunks[chunk_num] = bytes(
+                    inferior.read_memory(self.address + chunk_start, chunk_len))
+        data = b"".join(self._chunks[num] for num in range(first_chunk, last_chunk + 1))
+        start = offset - first_chunk * self.READ_CHUNK_SIZE
+        return data[start:start + length]
+
+    def _read_int32(self, offset):
+        return struct.unpack('<i', self._read(offset, 4))[0]
+
+    def _cstring_end(self, offset):
+        """Return the offset just past the NUL byte terminating the C string at 'offset'."""
+        pos = offset
+        while pos < self.size:
+            chunk_end = min((pos // self.READ_CHUNK_SIZE + 1) * self.READ_CHUNK_SIZE, self.size)
+            nul = self._read(pos, chunk_end - pos).find(b"\x00")
+            if nul != -1:
+                return pos + nul + 1
+            pos = chunk_end
+        raise ValueError("unterminated string at offset %d" % offset)
+
+    def _value_length(self, bson_type, offset):
+        """Return the length of the value of type 'bson_type' starting at 'offset'."""
+        if bson_type in _BSON_FIXED_VALUE_LENGTHS:
+            return _BSON_FIXED_VALUE_LENGTHS[bson_type]
+        if bson_type in (0x02, 0x0D, 0x0E):  # string, JavaScript code, symbol
+            return 4 + self._read_int32(offset)
+        if bson_type in (0x03, 0x04, 0x0F):  # object, array, code with scope
+            return self._read_int32(offset)
+        if bson_type == 0x05:  # binary
+            return 5 + self._read_int32(offset)
+        if bson_type == 0x0B:  # regular expression
+            return self._cstring_end(self._cstring_end(offset)) - offset
+        if bson_type == 0x0C:  # DBPointer
+            return 4 + self._read_int32(offset) + 12
+        raise ValueError("unknown BSON type 0x%02x at offset %d" % (bson_type, offset))
+
+    def decode_next(self):
+        """Decode the next element and return True, or return False if there are none left."""
+        if self.done:
+            return False
+
+        try:
+            bson_type = self._read(self.offset, 1)[0]
+            if bson_type == 0:
+                if self.offset != self.size - 1:
+                    raise ValueError("end of object at offset %d of %d" % (self.offset, self.size))
+                self._finish(True)
+                return False
+
+            value_offset = self._cstring_end(self.offset + 1)
+            value_len = self._value_length(bson_type, value_offset)
+            element = self._read(self.offset, value_offset + value_len - self.offset)
+
+            # Decode the element on its own by wrapping it in a single-field document.
+            options = CodecOptions(document_class=collections.OrderedDict)
+            wrapped = struct.pack('<i', len(element) + 5) + element + b"\x00"
+            key, val = next(iter(bson.decode(wrapped, codec_options=options).items()))
+            self.elements.append((key, bson.json_util.dumps(val)))
+            self.offset += len(element)
+            return True
+        except (gdb.MemoryError, bson.errors.BSONError, ValueError, OverflowError,
+                struct.error) as err:
+            self.error = "%s (at offset %d)" % (err, self.offset)
+            self._finish(False)
+            return False
+
+    def _finish(self, is_valid):
+        self.is_valid = is_valid
+        # Everything worth keeping has been decoded; release the raw memory.
+        self._chunks = {}
+
+    def iter_elements(self):
+        """Yield (key, JSON value) pairs, decoding further elements only as they are consumed."""
+        index = 0
+        while True:
+            if index == len(self.elements) and not self.decode_next():
+                return
+            yield self.elements[index]
+            index += 1
+
+
+# BSONDecodeState objects keyed by (address, size). Inferior memory can change whenever the
+# inferior runs, so the cache is cleared each time it is continued.
+_bson_decode_cache = {}
+_BSON_DECODE_CACHE_MAX_ENTRIES = 4096
+
+
+def get_bson_decode_state(address, size):
+    """Return the cached BSONDecodeState for the object at 'address', creating it if needed."""
+    key = (address, size)
+    state = _bson_decode_cache.get(key)
+    if state is None:
+        if len(_bson_decode_cache) >= _BSON_DECODE_CACHE_MAX_ENTRIES:
+            _bson_decode_cache.clear()
+        state = BSONDecodeState(address, size)
+        _bson_decode_cache[key] = state
+    return state
+
+
+def clear_bson_decode_cache(_event=None):
+    """Forget all decoded BSONObj prefixes."""
+    _bson_decode_cache.clear()
+
+
+gdb.events.cont.connect(clear_bson_decode_cache)
+
+
+def get_print_elements_limit():
+    """Return gdb's 'print elements' setting, or None if it is unlimited."""
+    limit = gdb.parameter("print elements")
+    # Older versions of gdb report 'unlimited' as 0.
+    return limit or None
+
+
 class BSONObjPrinter(object):
     """Pretty-printer for mongo::BSONObj."""
 
@@ -104,39 +280,46 @@ class BSONObjPrinter(object):
         """Initialize BSONObjPrinter."""
         self.val = val
         self.ptr = self.val['_objdata'].cast(gdb.lookup_type('void').pointer())
-        self.is_valid = False
 
         # Handle the endianness of the BSON object size, which is represented as a 32-bit integer
-        # in little-endian format.
+        # in little-endian format. Only the size is read here; the elements are read from the
+        # inferior as they are printed.
         inferior = gdb.selected_inferior()
         if self.ptr.is_optimized_out:
             # If the value has been optimized out, we cannot decode it.
             self.size = -1
-            self.raw_memory = None
         else:
             self.size = struct.unpack('<I', inferior.read_memory(self.ptr, 4))[0]
-            self.raw_memory = bytes(memoryview(inferior.read_memory(self.ptr, self.size)))
-            if bson:
-                self.is_valid = bson.is_valid(self.raw_memory)
 
     @staticmethod
     def display_hint():
         """Display hint."""
         return 'map'
 
+    def _decode_state(self):
+        if not bson or self.size < 5 or self.size > BSON_MAX_PRINT_SIZE:
+            return None
+        return get_bson_decode_state(int(self.ptr), self.size)
+
     def children(self):
         """Children."""
-        # Do not decode a BSONObj with an invalid size, or that is considered
-        # invalid by pymongo.
-        if not bson or not self.is_valid or self.size < 5 or self.size > 17 * 1024 * 1024:
+        # Do not decode a BSONObj with an invalid size.
+        state = self._decode_state()
+        if state is None:
             return
 
-        options = CodecOptions(document_class=collections.OrderedDict)
-        bsondoc = bson.decode(self.raw_memory, codec_options=options)
-
-        for key, val in list(bsondoc.items()):
+        # gdb stops asking for children once it has printed 'print elements' of them, but it asks
+        # for one more to know whether to print '...'.
+        limit = get_print_elements_limit()
+        for count, (key, val) in enumerate(state.iter_elements()):
+            if limit is not None and count > limit:
+                return
             yield 'key', key
-            yield 'value', bson.json_util.dumps(val)
+            yield 'value', val
+
+        if state.is_valid is False:
+            yield 'key', '<invalid>'
+            yield 'value', state.error
 
     def to_string(self):
         """Return BSONObj for printing."""
@@ -148,14 +331,17 @@ class BSONObjPrinter(object):
 
         size = self.size
         # Print an invalid BSONObj size in hex.
-        if size < 5 or size > 17 * 1024 * 1024:
+        if size < 5 or size > BSON_MAX_PRINT_SIZE:
             size = hex(size)
 
         if size == 5:
             return "%s empty BSONObj @ %s" % (ownership, self.ptr)
 
+        # Only the elements decoded so far have been validated, so an object is reported as
+        # invalid once any part of it has failed to decode.
+        state = self._decode_state()
         suffix = ""
-        if not self.is_valid:
+        if state is None or state.is_valid is False:
             # Wondering why this is unprintable? See PYTHON-1824. The Python
             # driver's BSON implementation does not support all possible BSON
             # datetimes. (specifically any BSON datetime where the year is >
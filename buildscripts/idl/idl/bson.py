@@ -36,22 +36,23 @@ from typing import Dict, List
 # Dictionary of BSON type Information
 # scalar: True if the type is not an array or object
 # bson_type_enum: The BSONType enum value for the given type
+# type_code: The byte which encodes the given type in a BSON element
 _BSON_TYPE_INFORMATION = {
-    "double": {'scalar': True, 'bson_type_enum': 'NumberDouble'},
-    "string": {'scalar': True, 'bson_type_enum': 'String'},
-    "object": {'scalar': False, 'bson_type_enum': 'Object'},
+    "double": {'scalar': True, 'bson_type_enum': 'NumberDouble', 'type_code': 0x01},
+    "string": {'scalar': True, 'bson_type_enum': 'String', 'type_code': 0x02},
+    "object": {'scalar': False, 'bson_type_enum': 'Object', 'type_code': 0x03},
     # TODO: add support: "array" : { 'scalar' :  False, 'bson_type_enum' : 'Array'},
-    "bindata": {'scalar': True, 'bson_type_enum': 'BinData'},
-    "undefined": {'scalar': True, 'bson_type_enum': 'Undefined'},
-    "objectid": {'scalar': True, 'bson_type_enum': 'jstOID'},
-    "bool": {'scalar': True, 'bson_type_enum': 'Bool'},
-    "date": {'scalar': True, 'bson_type_enum': 'Date'},
-    "null": {'scalar': True, 'bson_type_enum': 'jstNULL'},
-    "regex": {'scalar': True, 'bson_type_enum': 'RegEx'},
-    "int": {'scalar': True, 'bson_type_enum': 'NumberInt'},
-    "timestamp": {'scalar': True, 'bson_type_enum': 'bsonTimestamp'},
-    "long": {'scalar': True, 'bson_type_enum': 'NumberLong'},
-    "decimal": {'scalar': True, 'bson_type_enum': 'NumberDecimal'},
+    "bindata": {'scalar': True, 'bson_type_enum': 'BinData', 'type_code': 0x05},
+    "undefined": {'scalar': True, 'bson_type_enum': 'Undefined', 'type_code': 0x06},
+    "objectid": {'scalar': True, 'bson_type_enum': 'jstOID', 'type_code': 0x07},
+    "bool": {'scalar': True, 'bson_type_enum': 'Bool', 'type_code': 0x08},
+    "date": {'scalar': True, 'bson_type_enum': 'Date', 'type_code': 0x09},
+    "null": {'scalar': True, 'bson_type_enum': 'jstNULL', 'type_code': 0x0A},
+    "regex": {'scalar': True, 'bson_type_enum': 'RegEx', 'type_code': 0x0B},
+    "int": {'scalar': True, 'bson_type_enum': 'NumberInt', 'type_code': 0x10},
+    "timestamp": {'scalar': True, 'bson_type_enum': 'bsonTimestamp', 'type_code': 0x11},
+    "long": {'scalar': True, 'bson_type_enum': 'NumberLong', 'type_code': 0x12},
+    "decimal": {'scalar': True, 'bson_type_enum': 'NumberDecimal', 'type_code': 0x13},
 }
 
 # Dictionary of BinData subtype type Information
@@ -95,6 +96,19 @@ def cpp_bson_type_name(name):
     return _BSON_TYPE_INFORMATION[name]['bson_type_enum']  # type: ignore
 
 
+def bson_type_code(name):
+    # type: (str) -> int
+    """Return the byte which encodes a bson type in a BSON element."""
+    assert is_valid_bson_type(name)
+    return _BSON_TYPE_INFORMATION[name]['type_code']  # type: ignore
+
+
+def element_prefix_size(field_name):
+    # type: (str) -> int
+    """Return the size of the type byte and the null terminated field name of a BSON element."""
+    return 1 + len(field_name.encode()) + 1
+
+
 def list_valid_types():
     # type: () -> List[str]
     """Return a list of supported bson types."""
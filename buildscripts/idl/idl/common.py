@@ -33,13 +33,20 @@ Classes which are shared among both the IDL idl.syntax and idl.AST trees.
 
 import os
 import string
-from typing import Mapping
+from typing import Any, Callable, Dict, List, Mapping, Tuple
 
 COMMAND_NAMESPACE_CONCATENATE_WITH_DB = "concatenate_with_db"
 COMMAND_NAMESPACE_CONCATENATE_WITH_DB_OR_UUID = "concatenate_with_db_or_uuid"
 COMMAND_NAMESPACE_IGNORED = "ignored"
 COMMAND_NAMESPACE_TYPE = "type"
 
+# Strings with the same length are told apart by a switch on one of their bytes when there are more
+# of them than this, and otherwise simply compared in turn.
+MAX_STRINGS_COMPARED_LINEARLY = 2
+
+# For each string length, the byte position switched on and the items for each byte at it.
+DispatchTable = List[Tuple[int, int, List[Tuple[int, List[Any]]]]]
+
 
 def title_case(name):
     # type: (str) -> str
@@ -68,6 +75,69 @@ def qualify_cpp_name(cpp_namespace, cpp_type_name):
     return cpp_type_name
 
 
+def cpp_char_literal(byte):
+    # type: (int) -> str
+    """Get the C++ char literal for a byte of a UTF-8 string."""
+    if byte in (ord("\\"), ord("'")):
+        return "'\\" + chr(byte) + "'"
+    if 0x20 <= byte < 0x7f:
+        return "'" + chr(byte) + "'"
+    return "'\\x%02x'" % (byte)
+
+
+def _get_dispatch_position(keys):
+    # type: (List[bytes]) -> int
+    """
+    Get the index of the byte which tells the most of the given keys apart.
+
+    The keys all have the same length. Returns -1 if every key has the same byte at every index,
+    i.e. there is at most one distinct key.
+    """
+    best_position = -1
+    best_count = 1
+    for position in range(len(keys[0])):
+        count = len({key[position] for key in keys})
+        if count > best_count:
+            best_position = position
+            best_count = count
+    return best_position
+
+
+def get_string_dispatch_table(items, get_string):
+    # type: (List[Any], Callable[[Any], str]) -> DispatchTable
+    """
+    Group items by their string, to generate a C++ switch which finds the item with a given string.
+
+    The items are grouped by the UTF-8 length of their string, as StringData::size() counts it.
+    Where more than MAX_STRINGS_COMPARED_LINEARLY items share a length, they are grouped again by
+    the byte at the position which tells the most of them apart. Returns, for each length in
+    increasing order, a tuple of the length, the byte position, or -1 if the items of that length
+    are not grouped by byte, and the list of (byte, items) groups, where byte is -1 if unused.
+    Items keep their relative order within a group.
+    """
+    by_length = {}  # type: Dict[int, List[Any]]
+    for item in items:
+        by_length.setdefault(len(get_string(item).encode()), []).append(item)
+
+    table = []
+    for length in sorted(by_length):
+        group = by_length[length]
+        position = -1
+        if len(group) > MAX_STRINGS_COMPARED_LINEARLY:
+            position = _get_dispatch_position([get_string(item).encode() for item in group])
+
+        if position < 0:
+            table.append((length, -1, [(-1, group)]))
+            continue
+
+        by_byte = {}  # type: Dict[int, List[Any]]
+        for item in group:
+            by_byte.setdefault(get_string(item).encode()[position], []).append(item)
+        table.append((length, position, sorted(by_byte.items())))
+
+    return table
+
+
 def _escape_template_string(template):
     # type: (str) -> str
     """Escape the '$' in template strings unless followed by '{'."""
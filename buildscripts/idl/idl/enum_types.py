@@ -234,17 +234,47 @@ class _EnumTypeString(EnumTypeInfoBase, metaclass=ABCMeta):
                                                               enum_value), value=enum_value.value))
         indented_writer.write_empty_line()
 
+        # Switch on the length of the value, and where several enum values share a length, on a
+        # byte which tells them apart, so only the one enum value it can be is compared in full.
+        table = common.get_string_dispatch_table(self._enum.values,
+                                                 lambda enum_value: enum_value.value)
+
         with writer.TemplateContext(indented_writer, template_params):
             with writer.IndentedScopedBlock(indented_writer, "${function_name} {", "}"):
-                for enum_value in self._enum.values:
-                    predicate = 'if (value == %s) {' % (_get_constant_enum_name(
-                        self._enum, enum_value))
-                    with writer.IndentedScopedBlock(indented_writer, predicate, "}"):
-                        indented_writer.write_template(
-                            'return ${enum_name}::%s;' % (enum_value.name))
+                with writer.IndentedScopedBlock(indented_writer, "switch (value.size()) {", "}"):
+                    for length, position, groups in table:
+                        with writer.IndentedScopedBlock(indented_writer, "case %d: {" % (length),
+                                                        "}"):
+                            if position < 0:
+                                self._gen_deserializer_compare(indented_writer, groups[0][1])
+                            else:
+                                with writer.IndentedScopedBlock(
+                                        indented_writer, "switch (value[%d]) {" % (position), "}"):
+                                    for byte, enum_values in groups:
+                                        with writer.IndentedScopedBlock(
+                                                indented_writer,
+                                                "case %s: {" % (common.cpp_char_literal(byte)),
+                                                "}"):
+                                            self._gen_deserializer_compare(
+                                                indented_writer, enum_values)
+                                            indented_writer.write_line("break;")
+                                    with writer.IndentedScopedBlock(indented_writer, "default: {",
+                                                                    "}"):
+                                        indented_writer.write_line("break;")
+                            indented_writer.write_line("break;")
+                    with writer.IndentedScopedBlock(indented_writer, "default: {", "}"):
+                        indented_writer.write_line("break;")
 
                 indented_writer.write_line("ctxt.throwBadEnumValue(value);")
 
+    def _gen_deserializer_compare(self, indented_writer, enum_values):
+        # type: (writer.IndentedTextWriter, List[Union[syntax.EnumValue,ast.EnumValue]]) -> None
+        """Generate the comparisons of value with each of the given enum values."""
+        for enum_value in enum_values:
+            predicate = 'if (value == %s) {' % (_get_constant_enum_name(self._enum, enum_value))
+            with writer.IndentedScopedBlock(indented_writer, predicate, "}"):
+                indented_writer.write_template('return ${enum_name}::%s;' % (enum_value.name))
+
     def get_serializer_declaration(self):
         # type: () -> str
         """Get the serializer function declaration minus trailing semicolon."""
@@ -262,12 +292,13 @@ class _EnumTypeString(EnumTypeInfoBase, metaclass=ABCMeta):
 
         with writer.TemplateContext(indented_writer, template_params):
             with writer.IndentedScopedBlock(indented_writer, "${function_name} {", "}"):
-                for enum_value in self._enum.values:
-                    with writer.IndentedScopedBlock(
-                            indented_writer, 'if (value == ${enum_name}::%s) {' % (enum_value.name),
-                            "}"):
-                        indented_writer.write_line(
-                            'return %s;' % (_get_constant_enum_name(self._enum, enum_value)))
+                with writer.IndentedScopedBlock(indented_writer, "switch (value) {", "}"):
+                    for enum_value in self._enum.values:
+                        with writer.IndentedScopedBlock(
+                                indented_writer, 'case ${enum_name}::%s: {' % (enum_value.name),
+                                "}"):
+                            indented_writer.write_line(
+                                'return %s;' % (_get_constant_enum_name(self._enum, enum_value)))
 
                 indented_writer.write_line('MONGO_UNREACHABLE;')
                 indented_writer.write_line('return StringData();')
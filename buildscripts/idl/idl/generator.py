@@ -28,7 +28,6 @@
 # pylint: disable=too-many-lines
 """IDL C++ Code Generator."""
 
-from abc import ABCMeta, abstractmethod
 import copy
 import io
 import os
@@ -37,7 +36,7 @@ import string
 import sys
 import textwrap
 import hashlib
-from typing import cast, Dict, List, Mapping, Tuple, Union
+from typing import cast, Callable, Dict, List, Mapping, Optional, Tuple, Union
 
 from . import ast
 from . import bson
@@ -90,6 +89,40 @@ def _get_field_constant_name(field):
                                 constant_name=common.title_case(field.cpp_name))
 
 
+def _get_field_prefix_constant_name(field):
+    # type: (ast.Field) -> str
+    """Get the C++ string constant name for the encoded type and name of a field's element."""
+    return common.template_args('k${constant_name}FieldPrefix',
+                                constant_name=common.title_case(field.cpp_name))
+
+
+# The BSON types which BSONObjBuilder::append writes for the C++ types of fields which have no
+# custom serializer, and which the generated serializers write themselves after a pre-encoded
+# type and field name, and the size of their values if it is fixed.
+_PREFIXED_CPP_TYPES = {
+    'std::int32_t': ('int', 4),
+    'std::int64_t': ('long', 8),
+    'double': ('double', 8),
+    'bool': ('bool', 1),
+    'std::string': ('string', None),
+}  # type: Dict[str, Tuple[str, Optional[int]]]
+
+
+def _get_field_prefixed_bson_type(field):
+    # type: (ast.Field) -> Optional[str]
+    """Get the BSON type of a field serialized after a pre-encoded prefix, or None."""
+    if field.ignore or field.array or field.struct_type or field.chained or field.serializer:
+        return None
+
+    bson_cpp_type = cpp_types.get_bson_cpp_type(field)
+    if bson_cpp_type and bson_cpp_type.has_serializer():
+        return None
+
+    if field.cpp_type not in _PREFIXED_CPP_TYPES:
+        return None
+    return _PREFIXED_CPP_TYPES[field.cpp_type][0]
+
+
 def _get_field_member_validator_name(field):
     # type (ast.Field) -> str
     """Get the name of the validator method for this field."""
@@ -187,81 +220,6 @@ def _get_all_fields(struct):
     return sorted([field for field in all_fields], key=lambda f: f.cpp_name)
 
 
-class _FieldUsageCheckerBase(object, metaclass=ABCMeta):
-    """Check for duplicate fields, and required fields as needed."""
-
-    def __init__(self, indented_writer):
-        # type: (writer.IndentedTextWriter) -> None
-        """Create a field usage checker."""
-        self._writer = indented_writer  # type: writer.IndentedTextWriter
-        self._fields = []  # type: List[ast.Field]
-
-    @abstractmethod
-    def add_store(self, field_name):
-        # type: (str) -> None
-        """Create the C++ field store initialization code."""
-        pass
-
-    @abstractmethod
-    def add(self, field, bson_element_variable):
-        # type: (ast.Field, str) -> None
-        """Add a field to track."""
-        pass
-
-    @abstractmethod
-    def add_final_checks(self):
-        # type: () -> None
-        """Output the code to check for missing fields."""
-        pass
-
-
-class _SlowFieldUsageChecker(_FieldUsageCheckerBase):
-    """
-    Check for duplicate fields, and required fields as needed.
-
-    Detects duplicate extra fields.
-    Generates code with a C++ std::set to maintain a set of fields seen while parsing a BSON
-    document. The std::set has O(N lg N) lookup, and allocates memory in the heap.
-    """
-
-    def __init__(self, indented_writer):
-        # type: (writer.IndentedTextWriter) -> None
-        super(_SlowFieldUsageChecker, self).__init__(indented_writer)
-
-        self._writer.write_line('std::set<StringData> usedFields;')
-
-    def add_store(self, field_name):
-        # type: (str) -> None
-        self._writer.write_line('auto push_result = usedFields.insert(%s);' % (field_name))
-        with writer.IndentedScopedBlock(self._writer,
-                                        'if (MONGO_unlikely(push_result.second == false)) {', '}'):
-            self._writer.write_line('ctxt.throwDuplicateField(%s);' % (field_name))
-
-    def add(self, field, bson_element_variable):
-        # type: (ast.Field, str) -> None
-        if not field in self._fields:
-            self._fields.append(field)
-
-    def add_final_checks(self):
-        # type: () -> None
-        for field in self._fields:
-            if (not field.optional) and (not field.ignore) and (not field.chained):
-                pred = 'if (MONGO_unlikely(usedFields.find(%s) == usedFields.end())) {' % \
-                    (_get_field_constant_name(field))
-                with writer.IndentedScopedBlock(self._writer, pred, '}'):
-                    if field.default:
-                        if field.enum_type:
-                            self._writer.write_line(
-                                '%s = %s::%s;' % (_get_field_member_name(field), field.cpp_type,
-                                                  field.default))
-                        else:
-                            self._writer.write_line(
-                                '%s = %s;' % (_get_field_member_name(field), field.default))
-                    else:
-                        self._writer.write_line(
-                            'ctxt.throwMissingField(%s);' % (_get_field_constant_name(field)))
-
-
 def _gen_field_usage_constant(field):
     # type: (ast.Field) -> str
     """Get the name for a bitset constant in field usage checking."""
@@ -274,34 +232,43 @@ def _get_constant(name):
     return 'k' + re.sub(r'([^a-zA-Z0-9_]+)', '_', common.title_case(name))
 
 
-class _FastFieldUsageChecker(_FieldUsageCheckerBase):
+class _FieldUsageChecker(object):
     """
     Check for duplicate fields, and required fields as needed.
 
-    Does not detect duplicate extra fields. Only works for strict parsers.
-    Generates code with a C++ std::bitset to maintain a record each field seen while parsing a
-    document. The std::bitset has O(1) lookup, and allocates a single int or similar on the stack.
-    """
+    Every known field of the struct, including the inlined fields of chained structs, is given a
+    bit at code generation time. Generates code with a C++ std::bitset to maintain a record of
+    each known field seen while parsing a document. The std::bitset has O(1) lookup, and
+    allocates a single int or similar on the stack.
 
-    def __init__(self, indented_writer, fields):
-        # type: (writer.IndentedTextWriter, List[ast.Field]) -> None
-        super(_FastFieldUsageChecker, self).__init__(indented_writer)
+    Non-strict parsers also detect duplicate extra fields, with a C++ std::set of the names of
+    the extra fields seen. The std::set is only used, and only allocates memory in the heap, when
+    a document has extra fields.
+    """
 
-        self._writer.write_line('std::bitset<%d> usedFields;' % (len(fields)))
+    def __init__(self, indented_writer, fields, strict):
+        # type: (writer.IndentedTextWriter, List[ast.Field], bool) -> None
+        """Create a field usage checker."""
+        self._writer = indented_writer  # type: writer.IndentedTextWriter
+        self._fields = []  # type: List[ast.Field]
 
-        bit_id = 0
-        for field in fields:
-            if field.chained:
-                continue
+        known_fields = [field for field in fields if not field.chained]
+        self._writer.write_line('std::bitset<%d> usedFields;' % (len(known_fields)))
 
+        for bit_id, field in enumerate(known_fields):
             self._writer.write_line(
                 'const size_t %s = %d;' % (_gen_field_usage_constant(field), bit_id))
-            bit_id += 1
 
-    def add_store(self, field_name):
+        if not strict:
+            self._writer.write_line('std::set<StringData> usedExtraFields;')
+
+    def add_extra(self, field_name):
         # type: (str) -> None
-        """Create the C++ field store initialization code."""
-        pass
+        """Add a field which is not known to the struct, for a non-strict parser."""
+        self._writer.write_line('auto push_result = usedExtraFields.insert(%s);' % (field_name))
+        with writer.IndentedScopedBlock(self._writer,
+                                        'if (MONGO_unlikely(push_result.second == false)) {', '}'):
+            self._writer.write_line('ctxt.throwDuplicateField(%s);' % (field_name))
 
     def add(self, field, bson_element_variable):
         # type: (ast.Field, str) -> None
@@ -347,14 +314,8 @@ class _FastFieldUsageChecker(_FieldUsageCheckerBase):
 
 
 def _get_field_usage_checker(indented_writer, struct):
-    # type: (writer.IndentedTextWriter, ast.Struct) -> _FieldUsageCheckerBase
-
-    # Only use the fast field usage checker if we never expect extra fields that we need to ignore
-    # but still wish to do duplicate detection on.
-    if struct.strict:
-        return _FastFieldUsageChecker(indented_writer, struct.fields)
-
-    return _SlowFieldUsageChecker(indented_writer)
+    # type: (writer.IndentedTextWriter, ast.Struct) -> _FieldUsageChecker
+    return _FieldUsageChecker(indented_writer, struct.fields, struct.strict)
 
 
 # Turn a python string into a C++ literal.
@@ -561,6 +522,8 @@ class _CppHeaderFileWriter(_CppFileWriterBase):
 
         self._writer.write_line(struct_type_info.get_to_bson_method().get_declaration())
 
+        self._writer.write_line(struct_type_info.get_serialized_size_method().get_declaration())
+
         self._writer.write_empty_line()
 
     def gen_protected_serializer_methods(self, struct):
@@ -713,6 +676,15 @@ class _CppHeaderFileWriter(_CppFileWriterBase):
                                      constant_name=_get_field_constant_name(field),
                                      field_name=field.name))
 
+            bson_type = _get_field_prefixed_bson_type(field)
+            if bson_type:
+                # The type byte and the field name, as they start the field's element.
+                prefix = '"\\x%02x" "%s"_sd' % (bson.bson_type_code(bson_type), field.name)
+                self._writer.write_line(
+                    common.template_args('static constexpr auto ${constant_name} = ${prefix};',
+                                         constant_name=_get_field_prefix_constant_name(field),
+                                         prefix=prefix))
+
         if isinstance(struct, ast.Command):
             self._writer.write_line(
                 common.template_args('static constexpr auto kCommandName = "${struct_name}"_sd;',
@@ -1153,7 +1125,7 @@ class _CppSourceFileWriter(_CppFileWriterBase):
             self._writer.write_line('%s = std::move(values);' % (_get_field_member_name(field)))
 
     def _gen_usage_check(self, field, bson_element, field_usage_check):
-        # type: (ast.Field, str, _FieldUsageCheckerBase) -> None
+        # type: (ast.Field, str, _FieldUsageChecker) -> None
         """Generate the field usage check and insert the required field check."""
         if field_usage_check:
             field_usage_check.add(field, bson_element)
@@ -1162,7 +1134,7 @@ class _CppSourceFileWriter(_CppFileWriterBase):
                 self._writer.write_line('%s = true;' % (_get_has_field_member_name(field)))
 
     def gen_field_deserializer(self, field, bson_object, bson_element, field_usage_check):
-        # type: (ast.Field, str, str, _FieldUsageCheckerBase) -> None
+        # type: (ast.Field, str, str, _FieldUsageChecker) -> None
         """Generate the C++ deserializer piece for a field."""
         if field.array:
             self._gen_usage_check(field, bson_element, field_usage_check)
@@ -1350,8 +1322,52 @@ class _CppSourceFileWriter(_CppFileWriterBase):
             # Generate namespace check now that "$db" has been read or defaulted
             struct_type_info.gen_namespace_check(self._writer, "_dbName", "commandElement")
 
+    def _gen_field_dispatch_chain(self, fields, gen_field, gen_unknown_field):
+        # type: (List[ast.Field], Callable[[ast.Field], None], Callable[[], None]) -> None
+        """Generate a chain of comparisons with the field names, calling gen_field for each."""
+        for index, field in enumerate(fields):
+            with self._predicate('fieldName == %s' % (_get_field_constant_name(field)), index > 0):
+                gen_field(field)
+
+        with self._block('else {', '}'):
+            gen_unknown_field()
+
+    def _gen_field_dispatch(self, fields, gen_field, gen_unknown_field):
+        # type: (List[ast.Field], Callable[[ast.Field], None], Callable[[], None]) -> None
+        """
+        Generate the code to find the field named fieldName and call gen_field to handle it.
+
+        Rather than comparing fieldName with every field name in turn, switch on its length, and
+        then, among fields of the same length, on the character which tells the most of them
+        apart. Only the few fields left are compared in full. gen_unknown_field generates the code
+        for names which match no field, which is kept out of the way of the known fields.
+        """
+        table = common.get_string_dispatch_table(fields, lambda field: field.name)
+
+        with self._block('switch (fieldName.size()) {', '}'):
+            for length, position, groups in table:
+                with self._block('case %d: {' % (length), '}'):
+                    if position < 0:
+                        self._gen_field_dispatch_chain(groups[0][1], gen_field, gen_unknown_field)
+                    else:
+                        with self._block('switch (fieldName[%d]) {' % (position), '}'):
+                            for byte, group in groups:
+                                with self._block('case %s: {' % (common.cpp_char_literal(byte)),
+                                                 '}'):
+                                    self._gen_field_dispatch_chain(group, gen_field,
+                                                                   gen_unknown_field)
+                                    self._writer.write_line('break;')
+                            with self._block('default: {', '}'):
+                                gen_unknown_field()
+                                self._writer.write_line('break;')
+                    self._writer.write_line('break;')
+
+            with self._block('default: {', '}'):
+                gen_unknown_field()
+                self._writer.write_line('break;')
+
     def _gen_fields_deserializer_common(self, struct, bson_object):
-        # type: (ast.Struct, str) -> _FieldUsageCheckerBase
+        # type: (ast.Struct, str) -> _FieldUsageChecker
         """Generate the C++ code to deserialize list of fields."""
         # pylint: disable=too-many-branches
         field_usage_check = _get_field_usage_checker(self._writer, struct)
@@ -1376,42 +1392,38 @@ class _CppSourceFileWriter(_CppFileWriterBase):
                     self._writer.write_line('firstFieldFound = true;')
                     self._writer.write_line('continue;')
 
-            field_usage_check.add_store("fieldName")
-            self._writer.write_empty_line()
+            def gen_field(field):
+                # type: (ast.Field) -> None
+                if field.ignore:
+                    field_usage_check.add(field, "element")
 
-            first_field = True
-            for field in struct.fields:
-                # Do not parse chained fields as fields since they are actually chained types.
-                if field.chained and not field.chained_struct_field:
-                    continue
+                    self._writer.write_line('// ignore field')
+                else:
+                    self.gen_field_deserializer(field, bson_object, "element", field_usage_check)
 
-                field_predicate = 'fieldName == %s' % (_get_field_constant_name(field))
+            def gen_unknown_field():
+                # type: () -> None
+                if not struct.strict:
+                    field_usage_check.add_extra("fieldName")
+                    return
 
-                with self._predicate(field_predicate, not first_field):
+                # For commands, check if this a well known command field that the IDL parser
+                # should ignore regardless of strict mode.
+                command_predicate = None
+                if isinstance(struct, ast.Command):
+                    command_predicate = "!mongo::isGenericArgument(fieldName)"
 
-                    if field.ignore:
-                        field_usage_check.add(field, "element")
+                with self._predicate(command_predicate):
+                    self._writer.write_line('ctxt.throwUnknownField(fieldName);')
 
-                        self._writer.write_line('// ignore field')
-                    else:
-                        self.gen_field_deserializer(field, bson_object, "element",
-                                                    field_usage_check)
-
-                if first_field:
-                    first_field = False
-
-            # End of for fields
-            # Generate strict check for extranous fields
-            if struct.strict:
-                with self._block('else {', '}'):
-                    # For commands, check if this a well known command field that the IDL parser
-                    # should ignore regardless of strict mode.
-                    command_predicate = None
-                    if isinstance(struct, ast.Command):
-                        command_predicate = "!mongo::isGenericArgument(fieldName)"
+            # Do not parse chained fields as fields since they are actually chained types.
+            fields = [
+                field for field in struct.fields
+                if not field.chained or field.chained_struct_field
+            ]
 
-                    with self._predicate(command_predicate):
-                        self._writer.write_line('ctxt.throwUnknownField(fieldName);')
+            # Generate strict check for extranous fields, or duplicate check for non-strict
+            self._gen_field_dispatch(fields, gen_field, gen_unknown_field)
 
         # Parse chained structs if not inlined
         # Parse chained types always here
@@ -1565,9 +1577,6 @@ class _CppSourceFileWriter(_CppFileWriterBase):
                 [field for field in struct.fields if field.supports_doc_sequence])
             if has_doc_sequence:
                 with self._block('for (auto&& sequence : request.sequences) {', '}'):
-                    field_usage_check.add_store("sequence.name")
-                    self._writer.write_empty_line()
-
                     first_field = True
                     for field in struct.fields:
                         # Only parse document sequence fields here
@@ -1589,10 +1598,13 @@ class _CppSourceFileWriter(_CppFileWriterBase):
                             first_field = False
 
                     # End of for fields
-                    # Generate strict check for extranous fields
-                    if struct.strict:
-                        with self._block('else {', '}'):
+                    # Generate strict check for extranous fields, or duplicate check for
+                    # non-strict
+                    with self._block('else {', '}'):
+                        if struct.strict:
                             self._writer.write_line('ctxt.throwUnknownField(sequence.name);')
+                        else:
+                            field_usage_check.add_extra("sequence.name")
                 self._writer.write_empty_line()
 
             # Check for required fields
@@ -1694,6 +1706,40 @@ class _CppSourceFileWriter(_CppFileWriterBase):
                     'BSONObjBuilder subObjBuilder(builder->subobjStart(${field_name}));')
                 self._writer.write_template('${access_member}.serialize(&subObjBuilder);')
 
+    def _gen_serializer_method_prefixed(self, field):
+        # type: (ast.Field) -> None
+        """
+        Generate the serialize method definition for a field with a pre-encoded prefix.
+
+        The bytes written are the same as BSONObjBuilder::append would write, but the type and
+        field name are copied as one constant.
+        """
+        template_params = {
+            'prefix': _get_field_prefix_constant_name(field),
+            'access_member': _access_member(field),
+        }
+
+        with self._with_template(template_params):
+            self._writer.write_template('builder->bb().appendStr(${prefix});')
+
+            bson_type = _get_field_prefixed_bson_type(field)
+            if bson_type == 'int':
+                self._writer.write_template(
+                    'builder->bb().appendNum(static_cast<int>(${access_member}));')
+            elif bson_type == 'long':
+                self._writer.write_template(
+                    'builder->bb().appendNum(static_cast<long long>(${access_member}));')
+            elif bson_type == 'double':
+                self._writer.write_template('builder->bb().appendNum(${access_member});')
+            elif bson_type == 'bool':
+                self._writer.write_template(
+                    'builder->bb().appendNum(static_cast<char>(${access_member}));')
+            else:
+                assert bson_type == 'string'
+                self._writer.write_template(
+                    'builder->bb().appendNum(static_cast<int>(${access_member}.size()) + 1);')
+                self._writer.write_template('builder->bb().appendStr(${access_member});')
+
     def _gen_serializer_method_common(self, field):
         # type: (ast.Field) -> None
         """Generate the serialize method definition."""
@@ -1717,6 +1763,8 @@ class _CppSourceFileWriter(_CppFileWriterBase):
             if not field.struct_type:
                 if needs_custom_serializer:
                     self._gen_serializer_method_custom(field)
+                elif _get_field_prefixed_bson_type(field):
+                    self._gen_serializer_method_prefixed(field)
                 else:
                     # Generate default serialization using BSONObjBuilder::append
                     # Note: BSONObjBuilder::append has overrides for std::vector also
@@ -1792,13 +1840,114 @@ class _CppSourceFileWriter(_CppFileWriterBase):
         with self._block('%s {' % (struct_type_info.get_serializer_method().get_definition()), '}'):
             self._gen_serializer_methods_common(struct, False)
 
+    def _gen_serialized_size_field(self, field):
+        # type: (ast.Field) -> None
+        """Generate the code to add the estimated serialized size of a field to size."""
+        template_params = {
+            'access_member': _access_member(field),
+            'prefix_size': str(bson.element_prefix_size(field.name)),
+        }
+
+        bson_cpp_type = cpp_types.get_bson_cpp_type(field)
+        needs_custom_serializer = field.serializer or (bson_cpp_type
+                                                       and bson_cpp_type.has_serializer())
+
+        with self._with_template(template_params):
+            if field.chained:
+                # Chained structs are serialized in place, without an element of their own.
+                if field.struct_type:
+                    self._writer.write_template(
+                        'size += ${access_member}.getSerializedSizeEstimate();')
+            elif field.array:
+                # Arrays are estimated with a few bytes for the type and index of each item, and
+                # the size of their items where it is easily known.
+                if field.struct_type:
+                    item_size = 'item.getSerializedSizeEstimate()'
+                elif field.cpp_type == 'mongo::BSONObj' and not needs_custom_serializer:
+                    item_size = 'item.objsize()'
+                else:
+                    item_size = None
+
+                if item_size:
+                    self._writer.write_template('size += ${prefix_size} + 5;')
+                    with self._block('for (const auto& item : ${access_member}) {', '}'):
+                        self._writer.write_line('size += 8 + %s;' % (item_size))
+                else:
+                    self._writer.write_template(
+                        'size += ${prefix_size} + 5 + 8 * ${access_member}.size();')
+            elif field.struct_type:
+                self._writer.write_template(
+                    'size += ${prefix_size} + ${access_member}.getSerializedSizeEstimate();')
+            elif _get_field_prefixed_bson_type(field):
+                value_size = _PREFIXED_CPP_TYPES[field.cpp_type][1]
+                if value_size is None:
+                    # A string has its length and terminating null.
+                    self._writer.write_template(
+                        'size += ${prefix_size} + 5 + ${access_member}.size();')
+                else:
+                    self._writer.write_line(
+                        'size += %d;' % (bson.element_prefix_size(field.name) + value_size))
+            elif field.cpp_type == 'mongo::BSONObj' and not needs_custom_serializer:
+                self._writer.write_template('size += ${prefix_size} + ${access_member}.objsize();')
+            else:
+                # The value's size is not known without serializing it.
+                self._writer.write_template('size += ${prefix_size};')
+
+    def gen_serialized_size_method(self, struct):
+        # type: (ast.Struct) -> None
+        """
+        Generate the method which estimates the size of the BSON serialize() writes.
+
+        The estimate is exact for most fields of fixed size types, strings, objects and structs,
+        and a lower bound for others, so the serializers can size their builders up front without
+        ever reserving much more than is needed. Passthrough command fields are not counted.
+        """
+        struct_type_info = struct_types.get_struct_info(struct)
+
+        with self._block('%s {' % (struct_type_info.get_serialized_size_method().get_definition()),
+                         '}'):
+            # The document's length and terminating null.
+            self._writer.write_line('std::size_t size = 5;')
+
+            if isinstance(struct, ast.Command):
+                if struct.command_field:
+                    self._gen_serialized_size_field(struct.command_field)
+                else:
+                    struct_type_info.gen_serialized_size(self._writer)
+
+            for field in struct.fields:
+                # Skip the fields the BSON serializer skips, and document sequences which are not
+                # part of the body of an OpMsgRequest.
+                if (field.ignore or field.chained_struct_field
+                        or field.serialize_op_msg_request_only or field.supports_doc_sequence):
+                    continue
+
+                if field.optional:
+                    with self._block(
+                            'if (%s.is_initialized()) {' % (_get_field_member_name(field)), '}'):
+                        self._gen_serialized_size_field(field)
+                else:
+                    self._gen_serialized_size_field(field)
+
+            self._writer.write_line('return size;')
+
+    @staticmethod
+    def _get_serialized_size_expression(struct):
+        # type: (ast.Struct) -> str
+        """Get the C++ expression for the initial size of a builder serializing a struct."""
+        if isinstance(struct, ast.Command):
+            return ('static_cast<int>(getSerializedSizeEstimate()) + '
+                    'commandPassthroughFields.objsize()')
+        return 'static_cast<int>(getSerializedSizeEstimate())'
+
     def gen_to_bson_serializer_method(self, struct):
         # type: (ast.Struct) -> None
         """Generate the toBSON method definition."""
         struct_type_info = struct_types.get_struct_info(struct)
 
         with self._block('%s {' % (struct_type_info.get_to_bson_method().get_definition()), '}'):
-            self._writer.write_line('BSONObjBuilder builder;')
+            self._writer.write_line('BSONObjBuilder builder(%s);' %
+                                    (self._get_serialized_size_expression(struct)))
             self._writer.write_line(struct_type_info.get_serializer_method().get_call(None).replace(
                 "builder", "&builder"))
             self._writer.write_line('return builder.obj();')
@@ -1852,7 +2001,8 @@ class _CppSourceFileWriter(_CppFileWriterBase):
         with self._block(
                 '%s {' % (struct_type_info.get_op_msg_request_serializer_method().get_definition()),
                 '}'):
-            self._writer.write_line('BSONObjBuilder localBuilder;')
+            self._writer.write_line('BSONObjBuilder localBuilder(%s);' %
+                                    (self._get_serialized_size_expression(struct)))
 
             with self._block('{', '}'):
                 self._writer.write_line('BSONObjBuilder* builder = &localBuilder;')
@@ -1877,6 +2027,12 @@ class _CppSourceFileWriter(_CppFileWriterBase):
                                      class_name=common.title_case(struct.cpp_name),
                                      constant_name=_get_field_constant_name(field)))
 
+            if _get_field_prefixed_bson_type(field):
+                self._writer.write_line(
+                    common.template_args('constexpr StringData ${class_name}::${constant_name};',
+                                         class_name=common.title_case(struct.cpp_name),
+                                         constant_name=_get_field_prefix_constant_name(field)))
+
         if isinstance(struct, ast.Command):
             self._writer.write_line(
                 common.template_args('constexpr StringData ${class_name}::kCommandName;',
@@ -2318,6 +2474,10 @@ class _CppSourceFileWriter(_CppFileWriterBase):
                 self.gen_to_bson_serializer_method(struct)
                 self.write_empty_line()
 
+                # Write serialized size estimate
+                self.gen_serialized_size_method(struct)
+                self.write_empty_line()
+
             if spec.server_parameters:
                 self.gen_server_parameters(spec.server_parameters, header_file_name)
             if spec.configs:
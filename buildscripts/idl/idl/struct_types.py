@@ -31,6 +31,7 @@ from abc import ABCMeta, abstractmethod
 from typing import Optional, List
 
 from . import ast
+from . import bson
 from . import common
 from . import cpp_types
 from . import writer
@@ -177,6 +178,12 @@ class StructTypeInfoBase(object, metaclass=ABCMeta):
         """Get the to_bson method for a struct."""
         pass
 
+    @abstractmethod
+    def get_serialized_size_method(self):
+        # type: () -> MethodInfo
+        """Get the method which estimates the serialized size of a struct."""
+        pass
+
     @abstractmethod
     def get_deserializer_static_method(self):
         # type: () -> MethodInfo
@@ -228,6 +235,12 @@ class StructTypeInfoBase(object, metaclass=ABCMeta):
         """Serialize the first field of a Command."""
         pass
 
+    @abstractmethod
+    def gen_serialized_size(self, indented_writer):
+        # type: (writer.IndentedTextWriter) -> None
+        """Add the estimated serialized size of the first field of a Command to size."""
+        pass
+
     @abstractmethod
     def gen_namespace_check(self, indented_writer, db_name, element):
         # type: (writer.IndentedTextWriter, str, str) -> None
@@ -277,6 +290,12 @@ class _StructTypeInfo(StructTypeInfoBase):
         return MethodInfo(
             common.title_case(self._struct.cpp_name), 'toBSON', [], 'BSONObj', const=True)
 
+    def get_serialized_size_method(self):
+        # type: () -> MethodInfo
+        return MethodInfo(
+            common.title_case(self._struct.cpp_name), 'getSerializedSizeEstimate', [],
+            'std::size_t', const=True)
+
     def get_op_msg_request_serializer_method(self):
         # type: () -> Optional[MethodInfo]
         return None
@@ -301,6 +320,10 @@ class _StructTypeInfo(StructTypeInfoBase):
         # type: (writer.IndentedTextWriter) -> None
         pass
 
+    def gen_serialized_size(self, indented_writer):
+        # type: (writer.IndentedTextWriter) -> None
+        pass
+
     def gen_namespace_check(self, indented_writer, db_name, element):
         # type: (writer.IndentedTextWriter, str, str) -> None
         pass
@@ -364,6 +387,11 @@ class _IgnoredCommandTypeInfo(_CommandBaseTypeInfo):
         # type: (writer.IndentedTextWriter) -> None
         indented_writer.write_line('builder->append("%s"_sd, 1);' % (self._command.name))
 
+    def gen_serialized_size(self, indented_writer):
+        # type: (writer.IndentedTextWriter) -> None
+        indented_writer.write_line(
+            'size += %d;' % (bson.element_prefix_size(self._command.name) + 4))
+
     def gen_namespace_check(self, indented_writer, db_name, element):
         # type: (writer.IndentedTextWriter, str, str) -> None
         pass
@@ -435,6 +463,10 @@ class _CommandFromType(_CommandBaseTypeInfo):
         # type: (writer.IndentedTextWriter) -> None
         raise NotImplementedError
 
+    def gen_serialized_size(self, indented_writer):
+        # type: (writer.IndentedTextWriter) -> None
+        raise NotImplementedError
+
     def gen_namespace_check(self, indented_writer, db_name, element):
         # type: (writer.IndentedTextWriter, str, str) -> None
         # TODO: should the name of the first element be validated??
@@ -495,6 +527,12 @@ class _CommandWithNamespaceTypeInfo(_CommandBaseTypeInfo):
         indented_writer.write_line('builder->append("%s"_sd, _nss.coll());' % (self._command.name))
         indented_writer.write_empty_line()
 
+    def gen_serialized_size(self, indented_writer):
+        # type: (writer.IndentedTextWriter) -> None
+        # The collection name is a string, with its length and terminating null.
+        indented_writer.write_line('size += %d + _nss.coll().size();' %
+                                   (bson.element_prefix_size(self._command.name) + 5))
+
     def gen_namespace_check(self, indented_writer, db_name, element):
         # type: (writer.IndentedTextWriter, str, str) -> None
         # TODO: should the name of the first element be validated??
@@ -566,6 +604,16 @@ class _CommandWithUUIDNamespaceTypeInfo(_CommandBaseTypeInfo):
                 'builder->append("%s"_sd, _nssOrUUID.nss().get().coll());' % (self._command.name))
         indented_writer.write_empty_line()
 
+    def gen_serialized_size(self, indented_writer):
+        # type: (writer.IndentedTextWriter) -> None
+        prefix_size = bson.element_prefix_size(self._command.name)
+        # A UUID is binary data of 16 bytes, with its length and subtype.
+        with writer.IndentedScopedBlock(indented_writer, "if (_nssOrUUID.uuid()) {", "}"):
+            indented_writer.write_line('size += %d;' % (prefix_size + 21))
+        with writer.IndentedScopedBlock(indented_writer, "else if (_nssOrUUID.nss()) {", "}"):
+            indented_writer.write_line(
+                'size += %d + _nssOrUUID.nss().get().coll().size();' % (prefix_size + 5))
+
     def gen_namespace_check(self, indented_writer, db_name, element):
         # type: (writer.IndentedTextWriter, str, str) -> None
         indented_writer.write_line('invariant(_nssOrUUID.nss() || _nssOrUUID.uuid());')
@@ -132,6 +132,123 @@ class TestGenerator(testcase.IDLTestcase):
 
         self.assertTrue(found, "Bad Header: " + header)
 
+    def test_field_dispatch(self):
+        # type: () -> None
+        """Validate fields are found by a switch on the name length and then on a character."""
+        _, source = self.assert_generate("""
+        types:
+            int:
+                description: foo
+                cpp_type: std::int32_t
+                bson_serialization_type: int
+                deserializer: mongo::BSONElement::_numberInt
+
+        structs:
+            many_fields:
+                description: mock
+                fields:
+                    abc: int
+                    abd: int
+                    xbe: int
+                    ab: int
+                    longer: int
+        """)
+
+        self.assertIn('switch (fieldName.size()) {', source)
+        self.assertIn('switch (fieldName[2]) {', source)
+        self.assertIn("case 'e': {", source)
+        self.assertIn('fieldName == kLongerFieldName', source)
+        # Names of a length shared by few fields are compared directly.
+        self.assertNotIn('switch (fieldName[0])', source)
+        self.assertNotIn('switch (fieldName[1])', source)
+
+    def test_string_enum_dispatch(self):
+        # type: () -> None
+        """Validate string enums are parsed and serialized by switches."""
+        _, source = self.assert_generate("""
+        enums:
+
+            StringEnum:
+                description: "An example string enum"
+                type: string
+                values:
+                    s0: "one"
+                    s1: "two"
+                    s2: "six"
+                    s3: "three"
+        """)
+
+        self.assertIn('switch (value.size()) {', source)
+        self.assertIn('switch (value[0]) {', source)
+        self.assertIn("case 's': {", source)
+        self.assertIn('if (value == kStringEnum_s3) {', source)
+        self.assertIn('ctxt.throwBadEnumValue(value);', source)
+        self.assertIn('case StringEnumEnum::s3: {', source)
+
+    def test_serializer_presized(self):
+        # type: () -> None
+        """Validate serializers size their builders and write pre-encoded field prefixes."""
+        header, source = self.assert_generate("""
+        types:
+            int:
+                description: foo
+                cpp_type: std::int32_t
+                bson_serialization_type: int
+                deserializer: mongo::BSONElement::_numberInt
+            string:
+                description: foo
+                cpp_type: std::string
+                bson_serialization_type: string
+                deserializer: mongo::BSONElement::str
+
+        structs:
+            prefixed_fields:
+                description: mock
+                fields:
+                    count: int
+                    name:
+                        type: string
+                        optional: true
+        """)
+
+        self.assertIn('static constexpr auto kCountFieldPrefix = "\\x10" "count"_sd;', header)
+        self.assertIn('std::size_t getSerializedSizeEstimate() const;', header)
+
+        self.assertIn('builder->bb().appendStr(kCountFieldPrefix);', source)
+        self.assertIn('builder->bb().appendNum(static_cast<int>(_count));', source)
+        self.assertIn('builder->bb().appendStr(_name.get());', source)
+        # The document, then count's type, name and value.
+        self.assertIn('std::size_t size = 5;', source)
+        self.assertIn('size += 11;', source)
+        self.assertIn('size += 6 + 5 + _name.get().size();', source)
+        self.assertIn('BSONObjBuilder builder(static_cast<int>(getSerializedSizeEstimate()));',
+                      source)
+
+    def test_non_strict_field_usage(self):
+        # type: () -> None
+        """Validate non-strict structs track known fields in a bitset and extra fields apart."""
+        _, source = self.assert_generate("""
+        types:
+            int:
+                description: foo
+                cpp_type: std::int32_t
+                bson_serialization_type: int
+                deserializer: mongo::BSONElement::_numberInt
+
+        structs:
+            non_strict:
+                description: mock
+                strict: false
+                fields:
+                    field1: int
+                    field2: int
+        """)
+
+        self.assertIn('std::bitset<2> usedFields;', source)
+        self.assertIn('if (MONGO_unlikely(usedFields[kField2Bit])) {', source)
+        self.assertIn('auto push_result = usedExtraFields.insert(fieldName);', source)
+        self.assertNotIn('usedFields.insert', source)
+
 
 if __name__ == '__main__':
 
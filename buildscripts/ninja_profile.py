@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""Profile Ninja builds from .ninja_log and write the weight file used by the ninja_next tool.
+
+The .ninja_log records when every build edge started and finished, for every run of Ninja
+against the build directory. Combined with the dependency graph in the generated build.ninja,
+this reconstructs the critical path of the latest run and, for every target, the longest chain
+of work that waits on it. The weight file records, per target, its typical duration and that
+weight, along with duration and memory statistics for links and compiles, which the generator
+uses to order build statements and size the link and heavy compile pools.
+
+Peak memory is only known when a --resource-info file written by collect_resource_info.py
+during the build is given.
+"""
+
+import argparse
+import collections
+import json
+import os
+import statistics
+import sys
+
+WEIGHTS_VERSION = 1
+
+LINK_RULES = {"LINK"}
+COMPILE_RULES = {"CC", "CXX"}
+ARCHIVE_RULES = {"AR"}
+LIBRARY_SUFFIXES = (".a", ".lib", ".so", ".dylib", ".dll")
+
+# The slowest fraction of compiles which are put in the heavy compile pool.
+HEAVY_COMPILE_FRACTION = 0.05
+
+NinjaLogEntry = collections.namedtuple("NinjaLogEntry", ["start_ms", "end_ms", "output"])
+NinjaEdge = collections.namedtuple("NinjaEdge", ["rule", "outputs", "inputs"])
+
+
+def read_ninja_log(path):
+    """Return the runs recorded in a .ninja_log, oldest first, as lists of NinjaLogEntry.
+
+    Ninja appends an entry as each edge finishes, so entries within one run have non-decreasing
+    end times; a run starts where the end time goes backwards.
+    """
+    runs = []
+    current = []
+    last_end = None
+    with open(path) as log_file:
+        header = log_file.readline()
+        if not header.startswith("# ninja log v"):
+            raise ValueError("{} is not a .ninja_log file".format(path))
+        for line in log_file:
+            fields = line.rstrip("\n").split("\t")
+            if len(fields) < 4:
+                continue
+            entry = NinjaLogEntry(int(fields[0]), int(fields[1]), fields[3])
+            if last_end is not None and entry.end_ms < last_end:
+                runs.append(current)
+                current = []
+            current.append(entry)
+            last_end = entry.end_ms
+    if current:
+        runs.append(current)
+    return runs
+
+
+def _split_ninja_paths(text):
+    """Split a space separated list of Ninja paths, honouring '$ ', '$:' and '$$' escapes."""
+    paths = []
+    current = []
+    chars = iter(text)
+    for char in chars:
+        if char == "$":
+            current.append(next(chars, ""))
+        elif char == " ":
+            if current:
+                paths.append("".join(current))
+                current = []
+        else:
+            current.append(char)
+    if current:
+        paths.append("".join(current))
+    return paths
+
+
+def _find_unescaped(text, char):
+    """Return the index of the first 'char' in 'text' not escaped with '$', or -1."""
+    pos = 0
+    while pos < len(text):
+        if text[pos] == "$":
+            pos += 2
+            continue
+        if text[pos] == char:
+            return pos
+        pos += 1
+    return -1
+
+
+def read_ninja_file(path):
+    """Return a dict of every output of the build statements in a Ninja file to its NinjaEdge.
+
+    Explicit, implicit and order-only inputs are all treated as inputs.
+    """
+    edges = {}
+    with open(path) as ninja_file:
+        lines = ninja_file.read().replace("$\n", "").splitlines()
+
+    for line in lines:
+        if not line.startswith("build "):
+            continue
+        line = line[len("build "):]
+        colon = _find_unescaped(line, ":")
+        outputs = [output for output in _split_ninja_paths(line[:colon]) if output != "|"]
+        rule_and_inputs = _split_ninja_paths(line[colon + 1:])
+        if not outputs or not rule_and_inputs:
+            continue
+        inputs = [
+            input_path for input_path in rule_and_inputs[1:] if input_path not in ("|", "||")
+        ]
+        edge = NinjaEdge(rule_and_inputs[0], outputs, inputs)
+        for output in outputs:
+            edges[output] = edge
+    return edges
+
+
+def read_resource_info(path, outputs):
+    """Return a dict of output to the peak memory in bytes of the processes building it.
+
+    'path' is a file written by collect_resource_info.py, with one JSON document per line
+    describing a process. A process is attributed to an output named on its command line.
+    """
+    outputs = set(outputs)
+    peak = {}
+    with open(path) as info_file:
+        for line in info_file:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            command = record.get("command") or ""
+            mem_used = record.get("mem_used") or 0
+            for token in command.split():
+                if token.startswith("-o") and len(token) > 2:
+                    token = token[2:]
+                if token in outputs and mem_used > peak.get(token, 0):
+                    peak[token] = mem_used
+    return peak
+
+
+def target_durations(runs, history):
+    """Return a dict of output to its median duration in ms over the last 'history' runs."""
+    durations = collections.defaultdict(list)
+    for run in runs[-history:]:
+        for entry in run:
+            durations[entry.output].append(entry.end_ms - entry.start_ms)
+    return {output: statistics.median(values) for output, values in durations.items()}
+
+
+def target_weights(edges, durations):
+    """Return a dict of output to its weight.
+
+    The weight of an edge is its own duration plus the largest weight of the edges that consume
+    its outputs, i.e. the length of the longest chain of work which cannot start until it has
+    finished. Every output of an edge has the edge's weight.
+    """
+    unique_edges = {id(edge): edge for edge in edges.values()}
+    consumers = collections.defaultdict(set)
+    for edge in unique_edges.values():
+        for input_path in edge.inputs:
+            producer = edges.get(input_path)
+            if producer is not None and producer is not edge:
+                consumers[id(producer)].add(id(edge))
+
+    weights = {}
+    for edge_id in unique_edges:
+        if edge_id in weights:
+            continue
+        # Iterative post-order walk, so deep dependency chains do not exhaust the stack.
+        stack = [(edge_id, False)]
+        while stack:
+            current, expanded = stack.pop()
+            if current in weights:
+                continue
+            if not expanded:
+                stack.append((current, True))
+                stack.extend((consumer, False) for consumer in consumers[current]
+                             if consumer not in weights)
+                continue
+            edge = unique_edges[current]
+            duration = max(durations.get(output, 0) for output in edge.outputs)
+            weights[current] = duration + max(
+                (weights.get(consumer, 0) for consumer in consumers[current]), default=0)
+
+    return {
+        output: weights[edge_id]
+        for edge_id, edge in unique_edges.items() for output in edge.outputs
+    }
+
+
+def critical_path(run, edges):
+    """Return the entries of 'run' on its critical path, in build order.
+
+    Starting from the entry which finished last, each step goes back to the input built in the
+    same run which finished last, since that is what the step was waiting for.
+    """
+    by_output = {entry.output: entry for entry in run}
+    if not by_output:
+        return []
+
+    path = []
+    entry = max(run, key=lambda entry: entry.end_ms)
+    seen = set()
+    while entry is not None and entry.output not in seen:
+        seen.add(entry.output)
+        path.append(entry)
+        edge = edges.get(entry.output)
+        if edge is None:
+            break
+        inputs = [
+            by_output[input_path] for input_path in edge.inputs
+            if input_path in by_output and by_output[input_path].end_ms <= entry.start_ms
+        ]
+        entry = max(inputs, key=lambda entry: entry.end_ms, default=None)
+    path.reverse()
+    return path
+
+
+def libdeps_edges(path, edges):
+    """Return the library dependencies a link or archive step on the critical path waited on.
+
+    Each is a dict of the waiting output, the library and the time in ms from the start of the
+    critical path until the library was built.
+    """
+    result = []
+    for library, consumer in zip(path, path[1:]):
+        edge = edges.get(consumer.output)
+        if (edge is not None and edge.rule in LINK_RULES | ARCHIVE_RULES
+                and library.output.endswith(LIBRARY_SUFFIXES)):
+            result.append({
+                "from": consumer.output,
+                "to": library.output,
+                "wait_ms": library.end_ms - path[0].start_ms,
+            })
+    return result
+
+
+def _percentile(values, fraction):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def build_weights(runs, edges, history=5, peak_memory=None):
+    """Return the weight file contents for the given runs and Ninja dependency graph."""
+    peak_memory = peak_memory or {}
+    durations = target_durations(runs, history)
+    weights = target_weights(edges, durations)
+
+    def rule_of(output):
+        edge = edges.get(output)
+        return edge.rule if edge is not None else None
+
+    compile_durations = [d for o, d in durations.items() if rule_of(o) in COMPILE_RULES]
+    heavy_threshold = _percentile(compile_durations, 1 - HEAVY_COMPILE_FRACTION)
+
+    targets = {}
+    for output, duration in durations.items():
+        target = {"duration_ms": duration, "weight_ms": weights.get(output, duration)}
+        if output in peak_memory:
+            target["peak_memory_bytes"] = peak_memory[output]
+        if rule_of(output) in COMPILE_RULES and duration >= heavy_threshold:
+            target["heavy"] = True
+        targets[output] = target
+
+    pools = {}
+    for pool, rules, only_heavy in [("link", LINK_RULES, False), ("heavy_compile", COMPILE_RULES,
+                                                                   True)]:
+        outputs = [
+            output for output, target in targets.items()
+            if rule_of(output) in rules and (target.get("heavy") or not only_heavy)
+        ]
+        pools[pool] = {
+            "count": len(outputs),
+            "p90_duration_ms": _percentile([durations[o] for o in outputs], 0.9),
+            "p90_peak_memory_bytes": _percentile(
+                [peak_memory[o] for o in outputs if o in peak_memory], 0.9),
+        }
+
+    path = critical_path(runs[-1], edges) if runs else []
+    return {
+        "version": WEIGHTS_VERSION,
+        "targets": targets,
+        "pools": pools,
+        "critical_path": [{
+            "output": entry.output,
+            "start_ms": entry.start_ms,
+            "end_ms": entry.end_ms,
+        } for entry in path],
+        "libdeps_edges": libdeps_edges(path, edges),
+    }
+
+
+def print_summary(weights, out=sys.stdout):
+    """Print the critical path and the libdeps edges on it."""
+    path = weights["critical_path"]
+    if not path:
+        print("The latest run built nothing.", file=out)
+        return
+
+    total = path[-1]["end_ms"] - path[0]["start_ms"]
+    print("Critical path of the latest run: {:.1f}s over {} steps".format(
+        total / 1000.0, len(path)), file=out)
+    for step in sorted(path, key=lambda step: step["start_ms"] - step["end_ms"])[:20]:
+        print("  {:8.1f}s  {}".format((step["end_ms"] - step["start_ms"]) / 1000.0,
+                                      step["output"]), file=out)
+    for edge in weights["libdeps_edges"]:
+        print("  {} waited {:.1f}s into the build for {}".format(
+            edge["from"], edge["wait_ms"] / 1000.0, edge["to"]), file=out)
+
+
+def main():
+    """Write a Ninja weight file from .ninja_log."""
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ninja-log", default=".ninja_log", help="The .ninja_log to read.")
+    parser.add_argument("--ninja-file", default="build.ninja",
+                        help="The generated Ninja file the log was written for.")
+    parser.add_argument("--resource-info",
+                        help="Process information recorded during the build by"
+                        " collect_resource_info.py, to measure peak memory.")
+    parser.add_argument("--history", type=int, default=5,
+                        help="Number of most recent runs to take durations from.")
+    parser.add_argument("--out-file", default="ninja_weights.json",
+                        help="Weight file to write, for use with NINJA_WEIGHTS.")
+    options = parser.parse_args()
+
+    runs = read_ninja_log(options.ninja_log)
+    edges = read_ninja_file(options.ninja_file)
+    peak_memory = None
+    if options.resource_info:
+        peak_memory = read_resource_info(options.resource_info, edges.keys())
+
+    weights = build_weights(runs, edges, options.history, peak_memory)
+    with open(options.out_file, "w") as out_file:
+        json.dump(weights, out_file, indent=1, sort_keys=True)
+
+    print_summary(weights)
+    print("Wrote weights for {} targets from {} runs to {}".format(
+        len(weights["targets"]), len(runs), os.path.abspath(options.out_file)))
+
+
+if __name__ == "__main__":
+    main()
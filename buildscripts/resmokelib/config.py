@@ -51,6 +51,7 @@ DEFAULTS = {
     "base_port": 20000,
     "backup_on_restart_dir": None,
     "buildlogger_url": "https://logkeeper.mongodb.org",
+    "concurrent_suites": None,
     "continue_on_failure": False,
     "dbpath_prefix": None,
     "dbtest_executable": None,
@@ -247,6 +248,10 @@ BASE_PORT = None
 # The root url of the buildlogger server.
 BUILDLOGGER_URL = None
 
+# If set, then resmoke.py runs the suites at the same time instead of one after another, with at
+# most this many tests running across all of them.
+CONCURRENT_SUITES = None
+
 # Root directory for where resmoke.py puts directories containing data files of mongod's it starts,
 # as well as those started by individual tests.
 DBPATH_PREFIX = None
@@ -101,12 +101,19 @@ class PortAllocator(object):
         return next_range_start - 1
 
     @classmethod
-    def reset(cls):
+    def reset(cls, job_nums=None):
         """Reset the internal state of the PortAllocator.
 
         This method is intended to be called each time resmoke.py starts
-        a new test suite.
+        a new test suite. If 'job_nums' is specified, then only the ports
+        of those jobs are released, leaving the ports of suites running
+        at the same time untouched.
         """
 
         with cls._NUM_USED_PORTS_LOCK:
-            cls._NUM_USED_PORTS = collections.defaultdict(int)
+            if job_nums is None:
+                cls._NUM_USED_PORTS = collections.defaultdict(int)
+                return
+
+            for job_num in job_nums:
+                cls._NUM_USED_PORTS.pop(job_num, None)
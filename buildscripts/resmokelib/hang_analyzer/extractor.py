@@ -1,53 +1,375 @@
 """Extracts `mongo-debugsymbols.tgz`."""
 
-import glob
 import os
+import shutil
+import struct
 import sys
+import tarfile
+import tempfile
+import threading
+import zipfile
 
+DEBUG_SYMBOLS_ARCHIVE = 'mongo-debugsymbols.tgz'
 
-def extract_debug_symbols(root_logger):
+# Directories within the debug symbols archive that hold the symbol files of the binaries and, in
+# dynamically linked builds, of the shared libraries they load.
+_ARCHIVE_BIN_DIR = 'dist-test/bin/'
+_ARCHIVE_LIB_DIR = 'dist-test/lib/'
+
+_DEBUG_EXTENSIONS = ['debug', 'dSYM', 'pdb']
+
+_DEFAULT_BINARIES = ['mongo', 'mongod', 'mongos']
+
+# Symbol files are cached under <build-id>/<file>, so a cache entry can only ever be used for the
+# binary it was built with.
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'mongodb', 'debug_symbols')
+
+
+def extract_debug_symbols(root_logger, binaries=None, pids=None, cache_dir=DEFAULT_CACHE_DIR):
     """
     Extract debug symbols. Idempotent.
 
     :param root_logger: logger to use
+    :param binaries: names of the binaries whose symbols are needed
+    :param pids: dict of binary name to the PID of a running instance of it
+    :param cache_dir: directory of cached symbol files, or None to not use a cache
     :return: None
     """
-    path = os.path.join(os.getcwd(), 'mongo-debugsymbols.tgz')
-    root_logger.debug('Starting: Extract debug-symbols from %s.', path)
-    if not os.path.exists(path):
-        root_logger.info('Debug-symbols archive-file does not exist. '
-                         'Hang-Analyzer may not complete successfully, '
-                         'or debug-symbols may already be extracted.')
-        return
-    try:
-        _extract_tar(path, root_logger)
-        root_logger.debug('Finished: Extract debug-symbols from %s.', path)
-    # We never want this to cause the whole task to fail.
-    # The rest of the hang analyzer will continue to work without the
-    # symbols it just won't be quite as helpful.
-    # pylint: disable=broad-except
-    except Exception as exception:
-        root_logger.warning('Error when extracting %s: %s', path, exception)
-
-
-def _extract_tar(path, root_logger):
-    import shutil
-    # The file name is always .tgz but it's "secretly" a zip file on Windows :(
-    compressed_format = 'zip' if sys.platform == "win32" else 'gztar'
-    shutil.unpack_archive(path, format=compressed_format)
-    for (src, dest) in _extracted_files_to_copy():
+    extraction = DebugSymbolsExtraction(root_logger, binaries, pids, cache_dir)
+    extraction.start()
+    extraction.wait_all()
+
+
+def start_extracting_debug_symbols(root_logger, processes, cache_dir=DEFAULT_CACHE_DIR):
+    """
+    Start extracting the debug symbols needed by 'processes' in the background.
+
+    :param root_logger: logger to use
+    :param processes: list of Pinfo for the processes that will be dumped
+    :param cache_dir: directory of cached symbol files, or None to not use a cache
+    :return: a DebugSymbolsExtraction to wait on before dumping each process
+    """
+    binaries = []
+    pids = {}
+    for pinfo in processes:
+        binary = _binary_name(pinfo.name)
+        if binary not in pids:
+            binaries.append(binary)
+            pids[binary] = pinfo.pidv[0]
+    extraction = DebugSymbolsExtraction(root_logger, binaries, pids, cache_dir)
+    extraction.start()
+    return extraction
+
+
+class DebugSymbolsExtraction(object):
+    """
+    Extract the symbol files of a set of binaries from the debug symbols archive.
+
+    Only the archive members belonging to the requested binaries, and the symbol files of the
+    shared libraries, are written. A gzipped tar archive is read as a stream. On Linux, the symbol
+    files a running binary needs are known from the libraries it has mapped, and the binary is
+    marked ready as soon as all of them have been written, so callers can start on the first
+    binary while the rest of the archive is read. Otherwise, binaries are marked ready once the
+    whole archive has been read.
+
+    On Linux, the GNU build-id of each running binary is used as the key into a local cache of
+    symbol files, so a later analysis of the same build does not need the archive at all.
+    """
+
+    def __init__(self, root_logger, binaries=None, pids=None, cache_dir=DEFAULT_CACHE_DIR):
+        """Initialize DebugSymbolsExtraction."""
+        self._root_logger = root_logger
+        self._binaries = list(_DEFAULT_BINARIES if binaries is None else binaries)
+        self._pids = pids or {}
+        self._cache_dir = cache_dir
+        self._path = os.path.join(os.getcwd(), DEBUG_SYMBOLS_ARCHIVE)
+        self._ready = {binary: threading.Event() for binary in self._binaries}
+        self._build_ids = {}
+        # Binary name to the archive members still to be written before it is ready, or None if
+        # they are not known.
+        self._pending = {}
+        self._thread = None
+
+    def start(self):
+        """Start extracting on a background thread."""
+        self._thread = threading.Thread(target=self._run, name='extract-debug-symbols',
+                                        daemon=True)
+        self._thread.start()
+
+    def wait(self, process_name, timeout=None):
+        """Wait until the symbols for 'process_name' are in place, or the extraction ended."""
+        binary = _binary_name(process_name)
+        if binary in self._ready:
+            self._ready[binary].wait(timeout)
+
+    def wait_all(self, timeout=None):
+        """Wait until the extraction has ended."""
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _mark_ready(self, binary):
+        if binary in self._ready and not self._ready[binary].is_set():
+            self._root_logger.debug('Debug symbols for %s are ready.', binary)
+            self._ready[binary].set()
+
+    def _member_done(self, member_name):
+        """Mark the binaries whose last pending member was 'member_name' as ready."""
+        for binary, pending in self._pending.items():
+            if pending is not None and member_name in pending:
+                pending.discard(member_name)
+                if not pending:
+                    self._mark_ready(binary)
+
+    def _run(self):
+        self._root_logger.debug('Starting: Extract debug-symbols from %s.', self._path)
+        try:
+            for binary in self._binaries:
+                self._pending[binary] = _expected_members(binary, self._pids.get(binary))
+
+            missing = [binary for binary in self._binaries if not self._from_cache(binary)]
+            for binary in self._binaries:
+                if binary not in missing:
+                    self._member_done(_ARCHIVE_BIN_DIR + binary + '.debug')
+
+            if all(pending is not None and not pending for pending in self._pending.values()):
+                self._root_logger.debug('All debug-symbols were found in the cache.')
+            elif not os.path.exists(self._path):
+                self._root_logger.info('Debug-symbols archive-file does not exist. '
+                                       'Hang-Analyzer may not complete successfully, '
+                                       'or debug-symbols may already be extracted.')
+            else:
+                self._extract(missing)
+                self._root_logger.debug('Finished: Extract debug-symbols from %s.', self._path)
+        # We never want this to cause the whole task to fail.
+        # The rest of the hang analyzer will continue to work without the
+        # symbols it just won't be quite as helpful.
+        # pylint: disable=broad-except
+        except Exception as exception:
+            self._root_logger.warning('Error when extracting %s: %s', self._path, exception)
+        finally:
+            for binary in self._binaries:
+                self._mark_ready(binary)
+
+    def _extract(self, binaries):
+        # The file name is always .tgz but it's "secretly" a zip file on Windows :(
+        if sys.platform == "win32":
+            self._extract_zip(binaries)
+        else:
+            self._extract_tar(binaries)
+
+    def _extract_zip(self, binaries):
+        with zipfile.ZipFile(self._path) as zip_file:
+            for info in zip_file.infolist():
+                if info.filename.startswith(_ARCHIVE_LIB_DIR):
+                    if info.is_dir():
+                        os.makedirs(info.filename, exist_ok=True)
+                    else:
+                        with zip_file.open(info) as src:
+                            _write_file(src, info.filename)
+                    self._member_done(info.filename)
+                    continue
+                rel_path, binary = _member_binary(info.filename, binaries)
+                if binary is None:
+                    continue
+                if info.is_dir():
+                    _makedirs_for(info.filename, rel_path)
+                    continue
+                with zip_file.open(info) as src:
+                    self._write_member(src, info.filename, rel_path, binary)
+                self._member_done(info.filename)
+
+    def _extract_tar(self, binaries):
+        with tarfile.open(self._path, mode='r|gz') as tar:
+            for member in tar:
+                if member.name.startswith(_ARCHIVE_LIB_DIR):
+                    if member.isdir():
+                        os.makedirs(member.name, exist_ok=True)
+                    elif member.isfile():
+                        _write_file(tar.extractfile(member), member.name)
+                        os.chmod(member.name, member.mode)
+                    self._member_done(member.name)
+                    continue
+                rel_path, binary = _member_binary(member.name, binaries)
+                if binary is None:
+                    continue
+                if member.isdir():
+                    _makedirs_for(member.name, rel_path)
+                elif member.isfile():
+                    src = tar.extractfile(member)
+                    self._write_member(src, member.name, rel_path, binary)
+                    os.chmod(member.name, member.mode)
+                    self._member_done(member.name)
+
+    def _write_member(self, src, member_name, rel_path, binary):
+        """Write an archive member to its archive path and copy it into the working directory."""
+        _write_file(src, member_name)
+        dest = os.path.join(os.getcwd(), rel_path)
         if os.path.exists(dest):
-            root_logger.debug('Debug symbol %s already exists, not copying from %s.', dest, src)
-            continue
+            self._root_logger.debug('Debug symbol %s already exists, not copying from %s.', dest,
+                                    member_name)
+        else:
+            _link_or_copy(member_name, dest)
+            self._root_logger.debug('Copied debug symbol %s.', dest)
+
+        if rel_path == binary + '.debug':
+            self._store_in_cache(binary, member_name)
+
+    def _cache_path(self, binary):
+        if self._cache_dir is None:
+            return None
+        if binary not in self._build_ids:
+            self._build_ids[binary] = _process_build_id(self._pids.get(binary))
+        build_id = self._build_ids[binary]
+        if build_id is None:
+            return None
+        return os.path.join(self._cache_dir, build_id, binary + '.debug')
+
+    def _from_cache(self, binary):
+        """Copy the cached symbol file for 'binary' into place and return True if there is one."""
+        cached = self._cache_path(binary)
+        if cached is None or not os.path.isfile(cached):
+            return False
+
+        rel_path = binary + '.debug'
+        for dest in [os.path.join(_ARCHIVE_BIN_DIR, rel_path), os.path.join(os.getcwd(), rel_path)]:
+            if not os.path.exists(dest):
+                _link_or_copy(cached, dest)
+        self._root_logger.debug('Using cached debug symbol %s for %s.', cached, binary)
+        return True
+
+    def _store_in_cache(self, binary, path):
+        cached = self._cache_path(binary)
+        if cached is None or os.path.exists(cached):
+            return
+        # Only cache a symbol file that was built together with the running binary.
+        if read_build_id(path) != self._build_ids[binary]:
+            self._root_logger.debug('Build-id of %s does not match the running %s, not caching it.',
+                                    path, binary)
+            return
+        try:
+            with open(path, 'rb') as src:
+                _write_file(src, cached)
+        except OSError as err:
+            self._root_logger.debug('Could not cache debug symbol %s: %s', path, err)
+
+
+def _binary_name(process_name):
+    """Return the name a binary's symbol files are stored under for a process name."""
+    name = os.path.basename(process_name)
+    if name.endswith('.exe'):
+        name = name[:-len('.exe')]
+    return name
+
+
+def _expected_members(binary, pid):
+    """
+    Return the archive members holding the symbols of 'binary' running as 'pid'.
+
+    These are the symbol files of the binary and of each shared library it has mapped from the
+    lib directory next to its bin directory, or None if they cannot be known.
+    """
+    if pid is None or not sys.platform.startswith('linux'):
+        return None
+    try:
+        exe = os.readlink('/proc/{pid}/exe'.format(pid=pid))
+        mapped = set()
+        with open('/proc/{pid}/maps'.format(pid=pid)) as maps:
+            for line in maps:
+                fields = line.split(None, 5)
+                if len(fields) == 6:
+                    mapped.add(fields[5].strip())
+    except OSError:
+        return None
+
+    lib_dir = os.path.join(os.path.dirname(os.path.dirname(exe)), 'lib')
+    members = {_ARCHIVE_BIN_DIR + binary + '.debug'}
+    for path in mapped:
+        if os.path.dirname(path) == lib_dir:
+            members.add(_ARCHIVE_LIB_DIR + os.path.basename(path) + '.debug')
+    return members
+
+
+def _member_binary(member_name, binaries):
+    """Return (path relative to the bin directory, binary) for an archive member, if wanted."""
+    if not member_name.startswith(_ARCHIVE_BIN_DIR):
+        return None, None
+    rel_path = member_name[len(_ARCHIVE_BIN_DIR):]
+    top = rel_path.split('/', 1)[0]
+    for binary in binaries:
+        for ext in _DEBUG_EXTENSIONS:
+            if top == '{file}.{ext}'.format(file=binary, ext=ext):
+                return rel_path, binary
+    return None, None
+
+
+def _makedirs_for(member_name, rel_path):
+    os.makedirs(member_name, exist_ok=True)
+    os.makedirs(os.path.join(os.getcwd(), rel_path), exist_ok=True)
+
+
+def _write_file(src, dest):
+    """Write the contents of the file object 'src' to 'dest', replacing it atomically."""
+    dest_dir = os.path.dirname(dest) or '.'
+    os.makedirs(dest_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=dest_dir, prefix='.tmp-')
+    try:
+        with os.fdopen(fd, 'wb') as dest_file:
+            shutil.copyfileobj(src, dest_file, 1024 * 1024)
+        os.replace(tmp_path, dest)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def _link_or_copy(src, dest):
+    os.makedirs(os.path.dirname(dest) or '.', exist_ok=True)
+    try:
+        os.link(src, dest)
+    except OSError:
         shutil.copy(src, dest)
-        root_logger.debug('Copied debug symbol %s.', dest)
 
 
-def _extracted_files_to_copy():
-    out = []
-    for ext in ['debug', 'dSYM', 'pdb']:
-        for file in ['mongo', 'mongod', 'mongos']:
-            haystack = os.path.join('dist-test', 'bin', '{file}.{ext}'.format(file=file, ext=ext))
-            for needle in glob.glob(haystack):
-                out.append((needle, os.path.join(os.getcwd(), os.path.basename(needle))))
-    return out
+def _process_build_id(pid):
+    """Return the GNU build-id of the executable running as 'pid', or None if unknown."""
+    if pid is None or not sys.platform.startswith('linux'):
+        return None
+    return read_build_id('/proc/{pid}/exe'.format(pid=pid))
+
+
+def read_build_id(path):
+    """Return the hex GNU build-id note of the ELF file at 'path', or None if it has none."""
+    # pylint: disable=too-many-locals
+    try:
+        with open(path, 'rb') as elf:
+            ident = elf.read(16)
+            if len(ident) < 16 or ident[:4] != b'\x7fELF':
+                return None
+            is_64 = ident[4] == 2
+            endian = '<' if ident[5] == 1 else '>'
+            if is_64:
+                header_format, section_format = endian + 'HHIQQQIHHHHHH', endian + 'IIQQQQIIQQ'
+            else:
+                header_format, section_format = endian + 'HHIIIIIHHHHHH', endian + 'IIIIIIIIII'
+            header = struct.unpack(header_format, elf.read(struct.calcsize(header_format)))
+            section_offset, section_size, section_count = header[5], header[10], header[11]
+
+            for index in range(section_count):
+                elf.seek(section_offset + index * section_size)
+                section = struct.unpack(section_format,
+                                        elf.read(struct.calcsize(section_format)))
+                sh_type, sh_offset, sh_size = section[1], section[4], section[5]
+                if sh_type != 7:  # SHT_NOTE
+                    continue
+                elf.seek(sh_offset)
+                notes = elf.read(sh_size)
+                pos = 0
+                while pos + 12 <= len(notes):
+                    name_size, desc_size, note_type = struct.unpack_from(endian + 'III', notes, pos)
+                    name_start = pos + 12
+                    desc_start = name_start + (name_size + 3) // 4 * 4
+                    if note_type == 3 and notes[name_start:name_start + name_size] == b'GNU\x00':
+                        return notes[desc_start:desc_start + desc_size].hex()
+                    pos = desc_start + (desc_size + 3) // 4 * 4
+    except (OSError, struct.error):
+        return None
+    return None
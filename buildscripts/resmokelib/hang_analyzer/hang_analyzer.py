@@ -54,12 +54,18 @@ class HangAnalyzer(Subcommand):
         self._setup_logging()
         self._log_system_info()
 
-        extractor.extract_debug_symbols(self.root_logger)
         dumpers = dumper.get_dumpers(self.root_logger, self.options.debugger_output)
 
         processes = process_list.get_processes(self.process_ids, self.interesting_processes,
                                                self.options.process_match, self.root_logger)
 
+        # Extract the debug symbols of the processes the debugger will attach to in the
+        # background, while the processes are being suspended and dumped.
+        dbg_processes = [
+            pinfo for pinfo in processes if not re.match("^(java|python)", pinfo.name)
+        ]
+        symbols = extractor.start_extracting_debug_symbols(self.root_logger, dbg_processes)
+
         max_dump_size_bytes = int(self.options.max_core_dumps_size) * 1024 * 1024
 
         # Suspending all processes, except python, to prevent them from getting unstuck when
@@ -77,7 +83,8 @@ class HangAnalyzer(Subcommand):
         trapped_exceptions = []
 
         # Dump all processes, except python & java.
-        for pinfo in [pinfo for pinfo in processes if not re.match("^(java|python)", pinfo.name)]:
+        for pinfo in dbg_processes:
+            symbols.wait(pinfo.name)
             try:
                 dumpers.dbg.dump_info(
                     pinfo, self.options.dump_core
@@ -106,6 +113,7 @@ class HangAnalyzer(Subcommand):
                                       pinfo.name, pid)
                 process.signal_process(self.root_logger, pid, signal.SIGABRT)
 
+        symbols.wait_all()
         self.root_logger.info("Done analyzing all processes for hangs")
 
         # Kill processes if "-k" was specified.
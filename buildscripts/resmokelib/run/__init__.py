@@ -10,6 +10,7 @@ import shlex
 import subprocess
 import sys
 import tarfile
+import threading
 import time
 
 import pkg_resources
@@ -54,6 +55,11 @@ class TestRunner(Subcommand):  # pylint: disable=too-many-instance-attributes
         self._jasper_server = None
         self._interrupted = False
         self._exit_code = 0
+        self._executors = []
+        # Guards _executors and _suites_interrupted, so that a suite starting on another thread
+        # either sees the interrupt or has its executor interrupted.
+        self._executors_lock = threading.Lock()
+        self._suites_interrupted = False
 
     def _setup_logging(self):
         logging.loggers.configure_loggers()
@@ -181,11 +187,14 @@ class TestRunner(Subcommand):  # pylint: disable=too-many-instance-attributes
                 self._setup_jasper()
             self._setup_signal_handler(suites)
 
-            for suite in suites:
-                self._interrupted = self._run_suite(suite)
-                if self._interrupted or (suite.options.fail_fast and suite.return_code != 0):
-                    self._log_resmoke_summary(suites)
-                    self.exit(suite.return_code)
+            if config.CONCURRENT_SUITES and len(suites) > 1:
+                self._interrupted = self._run_suites_concurrently(suites)
+            else:
+                for suite in suites:
+                    self._interrupted = self._run_suite(suite)
+                    if self._interrupted or (suite.options.fail_fast and suite.return_code != 0):
+                        self._log_resmoke_summary(suites)
+                        self.exit(suite.return_code)
 
             self._log_resmoke_summary(suites)
 
@@ -199,11 +208,61 @@ class TestRunner(Subcommand):  # pylint: disable=too-many-instance-attributes
             if suites:
                 reportfile.write(suites)
 
-    def _run_suite(self, suite):
+    def _run_suites_concurrently(self, suites):
+        """Run the test suites at the same time and return True if interrupted, False otherwise.
+
+        The suites share config.CONCURRENT_SUITES job slots, and a Job instance only holds a slot
+        while it is running a test, so the slots of a suite that has run out of tests go to the
+        suites that are still running. Each suite's Job instances are numbered after those of the
+        suites before it to give them their own ports and dbpaths. fail_fast stops only the suite
+        with the failing test.
+        """
+        job_slots = threading.BoundedSemaphore(config.CONCURRENT_SUITES)
+        interrupted = [False] * len(suites)
+        threads = []
+        job_num_offset = 0
+        # The suites' fixtures and hooks share the global random number generator, so it is seeded
+        # once here rather than by each suite as it starts.
+        random.seed(config.RANDOM_SEED)
+        for i, suite in enumerate(suites):
+
+            def run_suite(i=i, suite=suite, job_num_offset=job_num_offset):
+                interrupted[i] = self._run_suite(suite, reseed_random=False,
+                                                 job_num_offset=job_num_offset,
+                                                 job_slots=job_slots)
+
+            thr = threading.Thread(target=run_suite, name=suite.get_display_name())
+            thr.daemon = True
+            thr.start()
+            threads.append(thr)
+            job_num_offset += suite.options.num_jobs
+
+        try:
+            for thr in threads:
+                while thr.is_alive():
+                    # Need to pass a timeout to join() so that KeyboardInterrupt exceptions
+                    # are propagated.
+                    thr.join(1)
+        except (KeyboardInterrupt, SystemExit):
+            # Only the main thread receives the interrupt, so pass it on to each suite. Suites that
+            # have not started their executor yet won't start it.
+            with self._executors_lock:
+                self._suites_interrupted = True
+                executors = list(self._executors)
+            for executor in executors:
+                executor.interrupt()
+            for thr in threads:
+                while thr.is_alive():
+                    thr.join(1)
+            return True
+
+        return any(interrupted)
+
+    def _run_suite(self, suite, **executor_kwargs):
         """Run a test suite."""
         self._log_suite_config(suite)
         suite.record_suite_start()
-        interrupted = self._execute_suite(suite)
+        interrupted = self._execute_suite(suite, **executor_kwargs)
         suite.record_suite_end()
         self._log_suite_summary(suite)
         return interrupted
@@ -220,17 +279,22 @@ class TestRunner(Subcommand):  # pylint: disable=too-many-instance-attributes
         self._resmoke_logger.info("Summary of %s suite: %s", suite.get_display_name(),
                                   self._get_suite_summary(suite))
 
-    def _execute_suite(self, suite):
+    def _execute_suite(self, suite, reseed_random=True, **executor_kwargs):
         """Execute a suite and return True if interrupted, False otherwise."""
-        self._shuffle_tests(suite)
+        self._shuffle_tests(suite, reseed_random)
         if not suite.tests:
             self._exec_logger.info("Skipping %s, no tests to run", suite.test_kind)
             suite.return_code = 0
             return False
         executor_config = suite.get_executor_config()
         try:
-            executor = testing.executor.TestSuiteExecutor(
-                self._exec_logger, suite, archive_instance=self._archive, **executor_config)
+            executor = testing.executor.TestSuiteExecutor(self._exec_logger, suite,
+                                                          archive_instance=self._archive,
+                                                          **executor_config, **executor_kwargs)
+            with self._executors_lock:
+                if self._suites_interrupted:
+                    raise errors.UserInterrupt("Received interrupt before the suite started")
+                self._executors.append(executor)
             executor.run()
         except (errors.UserInterrupt, errors.LoggerRuntimeConfigError) as err:
             self._exec_logger.error("Encountered an error when running %ss of suite %s: %s",
@@ -247,14 +311,21 @@ class TestRunner(Subcommand):  # pylint: disable=too-many-instance-attributes
             return False
         return False
 
-    def _shuffle_tests(self, suite):
-        """Shuffle the tests if the shuffle cli option was set."""
-        random.seed(config.RANDOM_SEED)
+    def _shuffle_tests(self, suite, reseed_random=True):
+        """Shuffle the tests if the shuffle cli option was set.
+
+        The global random number generator is reseeded too, unless 'reseed_random' is False
+        because other suites are already running.
+        """
+        if reseed_random:
+            random.seed(config.RANDOM_SEED)
         if not config.SHUFFLE:
             return
         self._exec_logger.info("Shuffling order of tests for %ss in suite %s. The seed is %d.",
                                suite.test_kind, suite.get_display_name(), config.RANDOM_SEED)
-        random.shuffle(suite.tests)
+        # Shuffle with a generator of the suite's own so the order is the same when suites are set
+        # up concurrently.
+        random.Random(config.RANDOM_SEED).shuffle(suite.tests)
 
     def _get_suites(self):
         """Return the list of suites for this resmoke invocation."""
@@ -664,6 +735,12 @@ class RunPlugin(PluginInterface):
             help=("The number of Job instances to use. Each instance will receive its"
                   " own MongoDB deployment to dispatch tests to."))
 
+        parser.add_argument(
+            "--concurrentSuites", type=int, dest="concurrent_suites", metavar="JOBS",
+            help=("Runs the suites specified with --suites at the same time instead of one"
+                  " after another, with at most JOBS tests running across all of them. Each"
+                  " suite still starts its own Job instances and reports its own results."))
+
         parser.set_defaults(logger_file="console")
 
         parser.add_argument("--mongo", dest="mongo_executable", metavar="PATH",
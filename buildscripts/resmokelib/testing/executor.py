@@ -29,8 +29,13 @@ class TestSuiteExecutor(object):  # pylint: disable=too-many-instance-attributes
 
     def __init__(  # pylint: disable=too-many-arguments
             self, exec_logger, suite, config=None, fixture=None, hooks=None, archive_instance=None,
-            archive=None):
-        """Initialize the TestSuiteExecutor with the test suite to run."""
+            archive=None, job_num_offset=0, job_slots=None):
+        """Initialize the TestSuiteExecutor with the test suite to run.
+
+        When suites run at the same time, 'job_num_offset' gives this suite's Job instances job
+        numbers, and therefore ports and dbpaths, that don't overlap with the other suites' and
+        'job_slots' is the semaphore limiting the number of tests running across all of them.
+        """
         self.logger = exec_logger
 
         if _config.SHELL_CONN_STRING is not None:
@@ -52,6 +57,11 @@ class TestSuiteExecutor(object):  # pylint: disable=too-many-instance-attributes
                                                       archive)
 
         self._suite = suite
+        self._job_num_offset = job_num_offset
+        self._job_slots = job_slots
+        self._user_interrupted = threading.Event()
+        self._test_queue = None
+        self._interrupt_flag = None
         self.num_tests = len(suite.tests) * suite.options.num_repeat_tests
         self.test_queue_logger = logging.loggers.new_testqueue_logger(suite.test_kind)
 
@@ -86,7 +96,10 @@ class TestSuiteExecutor(object):  # pylint: disable=too-many-instance-attributes
         :return: List of jobs.
         """
         n_jobs_to_start = self._num_jobs_to_start(self._suite, num_tests)
-        return [self._make_job(job_num) for job_num in range(n_jobs_to_start)]
+        return [
+            self._make_job(job_num)
+            for job_num in range(self._job_num_offset, self._job_num_offset + n_jobs_to_start)
+        ]
 
     def run(self):
         """Execute the test suite.
@@ -102,7 +115,7 @@ class TestSuiteExecutor(object):  # pylint: disable=too-many-instance-attributes
         setup_flag = threading.Event()
         # We reset the internal state of the PortAllocator so that ports used by the fixture during
         # a test suite run earlier can be reused during this current test suite.
-        network.PortAllocator.reset()
+        network.PortAllocator.reset(job.job_num for job in self._jobs)
         teardown_flag = None
         try:
             num_repeat_suites = self._suite.options.num_repeat_suites
@@ -173,6 +186,10 @@ class TestSuiteExecutor(object):  # pylint: disable=too-many-instance-attributes
         threads = []
         interrupt_flag = threading.Event()
         user_interrupted = False
+        self._test_queue = test_queue
+        self._interrupt_flag = interrupt_flag
+        if self._user_interrupted.is_set():
+            _job.Job._interrupt_all_jobs(test_queue, interrupt_flag)  # pylint: disable=protected-access
         try:
             # Run each Job instance in its own thread.
             for job in self._jobs:
@@ -198,6 +215,9 @@ class TestSuiteExecutor(object):  # pylint: disable=too-many-instance-attributes
             interrupt_flag.set()
             user_interrupted = True
 
+        if self._user_interrupted.is_set():
+            user_interrupted = True
+
         wait_secs = 2.0
         self.logger.debug("Waiting for threads to complete")
 
@@ -220,6 +240,17 @@ class TestSuiteExecutor(object):  # pylint: disable=too-many-instance-attributes
         # StopExecution exception in TestSuiteExecutor.run() if the user triggered the interrupt.
         return (combined_report, user_interrupted)
 
+    def interrupt(self):
+        """Stop running tests as though the user had interrupted the suite.
+
+        This is for stopping a suite running on another thread, since only the main thread
+        receives KeyboardInterrupt.
+        """
+        self._user_interrupted.set()
+        test_queue = self._test_queue
+        if test_queue is not None:
+            _job.Job._interrupt_all_jobs(test_queue, self._interrupt_flag)  # pylint: disable=protected-access
+
     def _teardown_fixtures(self):
         """Tear down all of the fixtures.
 
@@ -277,7 +308,7 @@ class TestSuiteExecutor(object):  # pylint: disable=too-many-instance-attributes
         report = _report.TestReport(job_logger, self._suite.options, job_num)
 
         return _job.Job(job_num, job_logger, fixture, hooks, report, self.archival,
-                        self._suite.options, self.test_queue_logger)
+                        self._suite.options, self.test_queue_logger, job_slots=self._job_slots)
 
     def _num_times_to_repeat_tests(self):
         """
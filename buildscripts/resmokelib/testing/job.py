@@ -1,5 +1,6 @@
 """Enable running tests simultaneously by processing them from a multi-consumer queue."""
 
+import contextlib
 import sys
 import time
 from collections import namedtuple
@@ -19,8 +20,11 @@ class Job(object):  # pylint: disable=too-many-instance-attributes
 
     def __init__(  # pylint: disable=too-many-arguments
             self, job_num, logger, fixture, hooks, report, archival, suite_options,
-            test_queue_logger):
-        """Initialize the job with the specified fixture and hooks."""
+            test_queue_logger, job_slots=None):
+        """Initialize the job with the specified fixture and hooks.
+
+        If 'job_slots' is specified, then the job holds one of its slots while running each test.
+        """
 
         self.logger = logger
         self.fixture = fixture
@@ -28,6 +32,7 @@ class Job(object):  # pylint: disable=too-many-instance-attributes
         self.report = report
         self.archival = archival
         self.suite_options = suite_options
+        self._job_slots = job_slots
         self.manager = FixtureTestCaseManager(test_queue_logger, self.fixture, job_num, self.report)
 
         # Don't check fixture.is_running() when using the ContinuousStepdown hook, which kills
@@ -120,20 +125,35 @@ class Job(object):  # pylint: disable=too-many-instance-attributes
             hook.before_suite(self.report)
 
         while not queue.empty() and not interrupt_flag.is_set():
-            queue_elem = queue.get_nowait()
-            test_time_start = self._get_time()
-            try:
-                test = queue_elem.testcase
-                self._execute_test(test)
-            finally:
-                queue_elem.job_completed(self._get_time() - test_time_start)
-                queue.task_done()
-
-            self._requeue_test(queue, queue_elem, interrupt_flag)
+            with self._job_slot():
+                try:
+                    queue_elem = queue.get_nowait()
+                except _queue.Empty:
+                    # Another job took the last test while this one waited for a slot.
+                    break
+                test_time_start = self._get_time()
+                try:
+                    test = queue_elem.testcase
+                    self._execute_test(test)
+                finally:
+                    queue_elem.job_completed(self._get_time() - test_time_start)
+                    queue.task_done()
+
+                self._requeue_test(queue, queue_elem, interrupt_flag)
 
         for hook in self.hooks:
             hook.after_suite(self.report)
 
+    @contextlib.contextmanager
+    def _job_slot(self):
+        """Hold one of the job slots shared with the suites running at the same time, if any."""
+        if self._job_slots is None:
+            yield
+            return
+
+        with self._job_slots:
+            yield
+
     def _log_requeue_test(self, queue_elem):
         """Log the requeue of a test."""
 
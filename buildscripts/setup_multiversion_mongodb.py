@@ -1,8 +1,10 @@
 #!/usr/bin/env python3
 """Install multiple versions of MongoDB on a machine."""
 
+import concurrent.futures
 import contextlib
 import errno
+import hashlib
 import json
 import optparse
 import os
@@ -19,6 +21,7 @@ import zipfile
 
 import requests
 import requests.exceptions
+import urllib3.exceptions
 
 
 def dump_stacks(_signal_num, _frame):  # pylint: disable=unused-argument
@@ -111,11 +114,246 @@ def download_file(url, file_name, download_retries=5):
     raise Exception("Unknown download problem for {} to file {}".format(url, file_name))
 
 
+class _HashingReader(object):
+    """File-like wrapper that hashes and saves the bytes read from a response stream."""
+
+    def __init__(self, stream, file_handle):
+        """Initialize _HashingReader."""
+        self._stream = stream
+        self._file_handle = file_handle
+        self._sha256 = hashlib.sha256()
+        self.size = 0
+
+    def read(self, size=-1):
+        """Read up to 'size' bytes from the stream."""
+        data = self._stream.read(size)
+        self._sha256.update(data)
+        self._file_handle.write(data)
+        self.size += len(data)
+        return data
+
+    def drain(self):
+        """Read the rest of the stream."""
+        while self.read(1024 * 1000):
+            pass
+
+    def hexdigest(self):
+        """Return the sha256 of the bytes read so far."""
+        return self._sha256.hexdigest()
+
+
+def file_sha256(file_name):
+    """Return the sha256 of the contents of 'file_name'."""
+    sha256 = hashlib.sha256()
+    with open(file_name, "rb") as file_handle:
+        for block in iter(lambda: file_handle.read(1024 * 1000), b""):
+            sha256.update(block)
+    return sha256.hexdigest()
+
+
+def archive_root(first_file):
+    """Return the root directory of an archive whose first entry is 'first_file'."""
+    # Sometimes the zip will contain the root directory as the first file and
+    # os.path.dirname() will return ''.
+    extract_dir = os.path.dirname(first_file)
+    if not extract_dir:
+        extract_dir = first_file
+    return extract_dir
+
+
+def extract_archive(archive_file, dest_dir):
+    """Extract 'archive_file' into 'dest_dir' and return the name of its first entry."""
+    _, file_suffix = os.path.splitext(archive_file)
+    if file_suffix == ".zip":
+        # Support .zip downloads, used for Windows binaries.
+        with zipfile.ZipFile(archive_file) as zip_handle:
+            # Use the name of the root directory in the archive as the name of the directory
+            # to extract the binaries into inside 'self.install_dir'. The name of the root
+            # directory nearly always matches the parsed URL text, with the exception of
+            # versions such as "v3.2-latest" that instead contain the githash.
+            first_file = zip_handle.namelist()[0]
+            zip_handle.extractall(dest_dir)
+    elif file_suffix == ".tgz":
+        # Support .tgz downloads, used for Linux binaries.
+        with contextlib.closing(tarfile.open(archive_file, "r:gz")) as tar_handle:
+            first_file = tar_handle.getnames()[0]
+            tar_handle.extractall(path=dest_dir)
+    else:
+        raise Exception("Unsupported file extension {}".format(file_suffix))
+    return first_file
+
+
+def download_and_extract(url, dest_dir, archive_file, download_retries=5):
+    """Download 'url' to 'archive_file' and extract it into 'dest_dir'.
+
+    A .tgz archive is decompressed and extracted while the bytes are still arriving. A .zip
+    archive keeps its directory at the end of the file, so it is extracted once the download has
+    completed. Return a (sha256, etag, first_file) tuple for the downloaded archive.
+    """
+
+    _, file_suffix = os.path.splitext(archive_file)
+    if file_suffix not in (".tgz", ".zip"):
+        raise Exception("Unsupported file extension {}".format(file_suffix))
+
+    while download_retries > 0:
+
+        shutil.rmtree(dest_dir, ignore_errors=True)
+        os.makedirs(dest_dir)
+
+        with requests.Session() as session:
+            adapter = requests.adapters.HTTPAdapter(max_retries=download_retries)
+            session.mount(url, adapter)
+            response = session.get(url, stream=True)
+            response.raise_for_status()
+            response.raw.decode_content = True
+
+            with open(archive_file, "wb") as file_handle:
+                reader = _HashingReader(response.raw, file_handle)
+                try:
+                    if file_suffix == ".tgz":
+                        with contextlib.closing(tarfile.open(fileobj=reader,
+                                                             mode="r|gz")) as tar_handle:
+                            tar_handle.extractall(path=dest_dir)
+                            first_file = tar_handle.getnames()[0]
+                    # tarfile stops reading at the end-of-archive marker, so read any trailing
+                    # padding to have the digest cover the whole download.
+                    reader.drain()
+                except (urllib3.exceptions.HTTPError, tarfile.TarError, EOFError) as err:
+                    download_retries -= 1
+                    if download_retries == 0:
+                        raise Exception("Incomplete download for URL {}: {}".format(url, err))
+                    continue
+
+        # Check if file download was completed.
+        if "Content-length" in response.headers:
+            url_content_length = int(response.headers["Content-length"])
+            # Retry download if the archive has an unexpected size.
+            if url_content_length != reader.size:
+                download_retries -= 1
+                if download_retries == 0:
+                    raise Exception("Downloaded file size ({} bytes) doesn't match content length"
+                                    "({} bytes) for URL {}".format(reader.size, url_content_length,
+                                                                   url))
+                continue
+
+        if file_suffix == ".zip":
+            first_file = extract_archive(archive_file, dest_dir)
+
+        return reader.hexdigest(), response.headers.get("ETag"), first_file
+
+    raise Exception("Unknown download problem for {} to file {}".format(url, archive_file))
+
+
+def rename_into_place(src, dst):
+    """Rename 'src' to 'dst', keeping 'dst' if another download got there first."""
+    try:
+        os.rename(src, dst)
+    except OSError:
+        if not os.path.exists(dst):
+            raise
+
+
+def link_or_copy(src, dst):
+    """Hard link 'src' to 'dst', falling back to a copy across filesystems."""
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+class ArtifactCache(object):
+    """Content-addressed cache of downloaded archives and their extracted trees.
+
+    The cache directory contains:
+        archives/<sha256><suffix>  - each downloaded archive, named by its digest
+        trees/<sha256>/<root>      - the extracted contents of that archive
+        index/<key>.json           - maps a URL and its ETag to the digest of its archive
+    """
+
+    def __init__(self, cache_dir):
+        """Initialize ArtifactCache."""
+        self.cache_dir = cache_dir
+        for subdir in ("archives", "trees", "index", "tmp"):
+            os.makedirs(os.path.join(cache_dir, subdir), exist_ok=True)
+
+    @staticmethod
+    def fetch_etag(url):
+        """Return the ETag the server reports for 'url', or None if it reports none."""
+        try:
+            response = requests.head(url, allow_redirects=True, timeout=60)
+            response.raise_for_status()
+        except requests.exceptions.RequestException:
+            return None
+        return response.headers.get("ETag")
+
+    def mkdtemp(self):
+        """Return a scratch directory on the same filesystem as the cache."""
+        return tempfile.mkdtemp(dir=os.path.join(self.cache_dir, "tmp"))
+
+    def _index_file(self, url, etag):
+        # Servers that don't report an ETag leave entries keyed by the URL alone, which is only
+        # safe because released archives are never replaced in place.
+        key = hashlib.sha256("{}\n{}".format(url, etag or "").encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, "index", key + ".json")
+
+    def _archive_file(self, digest, suffix):
+        return os.path.join(self.cache_dir, "archives", digest + suffix)
+
+    def _tree_dir(self, digest):
+        return os.path.join(self.cache_dir, "trees", digest)
+
+    def lookup(self, url, etag):
+        """Return the cached tree extracted from 'url' at 'etag', or None if it isn't cached.
+
+        If only the archive is still cached, it is re-extracted once its digest is verified.
+        """
+        try:
+            with open(self._index_file(url, etag)) as file_handle:
+                entry = json.load(file_handle)
+        except (IOError, ValueError):
+            return None
+
+        digest = entry["sha256"]
+        tree = os.path.join(self._tree_dir(digest), entry["root"])
+        if os.path.isdir(tree):
+            return tree
+
+        archive_file = self._archive_file(digest, entry["suffix"])
+        if not os.path.isfile(archive_file) or file_sha256(archive_file) != digest:
+            print("Discarding corrupt cached archive for {}".format(url))
+            return None
+
+        temp_dir = self.mkdtemp()
+        try:
+            extract_archive(archive_file, temp_dir)
+            rename_into_place(temp_dir, self._tree_dir(digest))
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+        return tree
+
+    def store(  # pylint: disable=too-many-arguments
+            self, url, etag, digest, archive_file, extract_dir, root):
+        """Move a download and its extracted tree into the cache and return the cached tree."""
+        _, file_suffix = os.path.splitext(archive_file)
+        rename_into_place(archive_file, self._archive_file(digest, file_suffix))
+        rename_into_place(extract_dir, self._tree_dir(digest))
+
+        entry = {"url": url, "etag": etag, "sha256": digest, "suffix": file_suffix, "root": root}
+        index_file = self._index_file(url, etag)
+        temp_fd, temp_file = tempfile.mkstemp(dir=os.path.dirname(index_file))
+        with os.fdopen(temp_fd, "w") as file_handle:
+            json.dump(entry, file_handle)
+        os.replace(temp_file, index_file)
+
+        return os.path.join(self._tree_dir(digest), root)
+
+
 class MultiVersionDownloader(object):  # pylint: disable=too-many-instance-attributes
     """Class to support multiversion downloads."""
 
     def __init__(  # pylint: disable=too-many-arguments
-            self, install_dir, link_dir, edition, platform, architecture, use_latest=False):
+            self, install_dir, link_dir, edition, platform, architecture, use_latest=False,
+            cache_dir=None):
         """Initialize MultiVersionDownloader."""
         self.install_dir = install_dir
         self.link_dir = link_dir
@@ -125,21 +363,20 @@ class MultiVersionDownloader(object):  # pylint: disable=too-many-instance-attri
         self.generic_platform = "linux"
         self.generic_architecture = "x86_64"
         self.use_latest = use_latest
+        self.cache = ArtifactCache(cache_dir) if cache_dir else None
         self._links = None
         self._generic_links = None
 
     @property
     def generic_links(self):
         """Get a list of generic links."""
-        if self._generic_links is None:
-            self._links, self._generic_links = self.download_links()
+        self.download_links_once()
         return self._generic_links
 
     @property
     def links(self):
         """Get a list of links."""
-        if self._links is None:
-            self._links, self._generic_links = self.download_links()
+        self.download_links_once()
         return self._links
 
     @staticmethod
@@ -182,15 +419,33 @@ class MultiVersionDownloader(object):  # pylint: disable=too-many-instance-attri
 
     def download_install(self, version):
         """Download and install the version specified."""
-        dl_file = self.download_version(version)
-        if dl_file:
-            installed_dir = self.uncompress_download(dl_file)
+        installed_dir = self.download_version(version)
+        if installed_dir:
             self.symlink_version(version, installed_dir)
 
+    def download_install_all(self, versions, jobs=1):
+        """Download and install the versions specified, up to 'jobs' of them concurrently."""
+        if jobs <= 1:
+            for version in versions:
+                self.download_install(version)
+            return
+
+        # Fetch the download links once rather than from each of the worker threads.
+        self.download_links_once()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as executor:
+            futures = [executor.submit(self.download_install, version) for version in versions]
+            for future in futures:
+                future.result()
+
+    def download_links_once(self):
+        """Populate the download and generic download links if they haven't been yet."""
+        if self._links is None or self._generic_links is None:
+            self._links, self._generic_links = self.download_links()
+
     def download_version(self, version):  # pylint: disable=too-many-branches,too-many-locals,too-many-statements
-        """Download the version specified and return file location.
+        """Download and extract the version specified and return the installed directory.
 
-        If no download occurs, file location is None.
+        If no download occurs, the installed directory is None.
         """
 
         try:
@@ -239,7 +494,6 @@ class MultiVersionDownloader(object):  # pylint: disable=too-many-instance-attri
         full_version = urls[-1][0]
         url = urls[-1][1]
         extract_dir = url.split("/")[-1][:-4]
-        file_suffix = os.path.splitext(urllib.parse.urlparse(url).path)[1]
 
         # Only download if we don't already have the directory.
         # Note, we cannot detect if 'latest' has already been downloaded, as the name
@@ -249,77 +503,87 @@ class MultiVersionDownloader(object):  # pylint: disable=too-many-instance-attri
             print("Skipping download for version {} ({}) since the dest already exists '{}'".format(
                 version, full_version, extract_dir))
             return None
+
+        # We try to download 'v<version>-latest' if the 'version' is specified
+        # as Major.minor. If that fails, we then try to download the version that
+        # was specified.
+        if self.use_latest and self.is_major_minor_version(version):
+            latest_version = "v{}-latest".format(version)
+            latest_url = url.replace(full_version, latest_version)
+            print("Trying to download {}...".format(latest_version))
+            print("Download url is {}".format(latest_url))
+            try:
+                return self.fetch_install(latest_url)
+            except requests.exceptions.HTTPError:
+                print("Failed to download {}".format(latest_url))
+
+        print("Downloading data for version {} ({})...".format(version, full_version))
+        print("Download url is {}".format(url))
+        return self.fetch_install(url)
+
+    def fetch_install(self, url):
+        """Download and extract the archive at 'url' and return the installed directory.
+
+        When an artifact cache is in use, an archive already cached for the URL and its current
+        ETag is installed from the cache instead of being downloaded again.
+        """
+        etag = None
+        if self.cache is not None:
+            etag = self.cache.fetch_etag(url)
+            cached_tree = self.cache.lookup(url, etag)
+            if cached_tree is not None:
+                print("Installing {} from the cache '{}'".format(url, cached_tree))
+                return self.install_tree(cached_tree, from_cache=True)
+            temp_dir = self.cache.mkdtemp()
         else:
-            temp_file = tempfile.mktemp(suffix=file_suffix)
-
-            latest_downloaded = False
-            # We try to download 'v<version>-latest' if the 'version' is specified
-            # as Major.minor. If that fails, we then try to download the version that
-            # was specified.
-            if self.use_latest and self.is_major_minor_version(version):
-                latest_version = "v{}-latest".format(version)
-                latest_url = url.replace(full_version, latest_version)
-                print("Trying to download {}...".format(latest_version))
-                print("Download url is {}".format(latest_url))
-                try:
-                    download_file(latest_url, temp_file)
-                    full_version = latest_version
-                    latest_downloaded = True
-                except requests.exceptions.HTTPError:
-                    print("Failed to download {}".format(latest_url))
-
-            if not latest_downloaded:
-                print("Downloading data for version {} ({})...".format(version, full_version))
-                print("Download url is {}".format(url))
-                download_file(url, temp_file)
-        return temp_file
-
-    def uncompress_download(self, dl_file):
-        """Download the version specified and return root of extracted directory."""
-
-        print("Uncompressing data to {}...".format(self.install_dir))
-        first_file = ""
-        temp_dir = tempfile.mkdtemp()
-        _, file_suffix = os.path.splitext(dl_file)
-        if file_suffix == ".zip":
-            # Support .zip downloads, used for Windows binaries.
-            with zipfile.ZipFile(dl_file) as zip_handle:
-                # Use the name of the root directory in the archive as the name of the directory
-                # to extract the binaries into inside 'self.install_dir'. The name of the root
-                # directory nearly always matches the parsed URL text, with the exception of
-                # versions such as "v3.2-latest" that instead contain the githash.
-                first_file = zip_handle.namelist()[0]
-                zip_handle.extractall(temp_dir)
-        elif file_suffix == ".tgz":
-            # Support .tgz downloads, used for Linux binaries.
-            with contextlib.closing(tarfile.open(dl_file, "r:gz")) as tar_handle:
-                # Use the name of the root directory in the archive as the name of the directory
-                # to extract the binaries into inside 'self.install_dir'. The name of the root
-                # directory nearly always matches the parsed URL text, with the exception of
-                # versions such as "v3.2-latest" that instead contain the githash.
-                first_file = tar_handle.getnames()[0]
-                tar_handle.extractall(path=temp_dir)
-        else:
-            raise Exception("Unsupported file extension {}".format(file_suffix))
+            temp_dir = tempfile.mkdtemp()
 
-        # Sometimes the zip will contain the root directory as the first file and
-        # os.path.dirname() will return ''.
-        extract_dir = os.path.dirname(first_file)
-        if not extract_dir:
-            extract_dir = first_file
-        temp_install_dir = os.path.join(temp_dir, extract_dir)
+        try:
+            file_suffix = os.path.splitext(urllib.parse.urlparse(url).path)[1]
+            archive_file = os.path.join(temp_dir, "archive" + file_suffix)
+            extract_dir = os.path.join(temp_dir, "extract")
+            print("Uncompressing data to {}...".format(self.install_dir))
+            digest, response_etag, first_file = download_and_extract(url, extract_dir,
+                                                                     archive_file)
+            root = archive_root(first_file)
+            if self.cache is None:
+                return self.install_tree(os.path.join(extract_dir, root), from_cache=False)
+
+            # Key the entry by the ETag a later lookup will see from its HEAD request.
+            tree = self.cache.store(url, etag if etag is not None else response_etag, digest,
+                                    archive_file, extract_dir, root)
+            return self.install_tree(tree, from_cache=True)
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+    def install_tree(self, tree, from_cache):
+        """Install the extracted 'tree' into 'install_dir' and return the installed directory.
+
+        A tree in the artifact cache is hard linked into place where possible, and any other tree
+        is moved. Either way the tree is staged beside its destination and renamed into place, so
+        concurrent installs of the same version never see a partial directory.
+        """
+        installed_dir = os.path.abspath(os.path.join(self.install_dir, os.path.basename(tree)))
 
         # We may not have been able to determine whether we already downloaded the requested
         # version due to the ambiguity in the parsed URL text, so we check for it again using
-        # the adjusted 'extract_dir' value.
-        already_downloaded = os.path.isdir(os.path.join(self.install_dir, extract_dir))
-        if not already_downloaded:
-            shutil.move(temp_install_dir, self.install_dir)
+        # the root directory of the archive.
+        if os.path.isdir(installed_dir):
+            return installed_dir
 
-        shutil.rmtree(temp_dir)
-        os.remove(dl_file)
+        os.makedirs(self.install_dir, exist_ok=True)
+        staging_dir = tempfile.mkdtemp(dir=self.install_dir, prefix=".staging-")
+        try:
+            staged_dir = os.path.join(staging_dir, os.path.basename(tree))
+            if from_cache:
+                shutil.copytree(tree, staged_dir, symlinks=True, copy_function=link_or_copy)
+            else:
+                shutil.move(tree, staged_dir)
+            rename_into_place(staged_dir, installed_dir)
+        finally:
+            shutil.rmtree(staging_dir, ignore_errors=True)
 
-        return os.path.abspath(os.path.join(self.install_dir, extract_dir))
+        return installed_dir
 
     def symlink_version(self, version, installed_dir):
         """Symlink the binaries in the 'installed_dir' to the 'link_dir'."""
@@ -425,6 +689,16 @@ we'll pull the highest non-rc version compatible with the version specified.
               " version 3.2 for download, the nightly version for 3.2 will be"
               " downloaded if it exists, otherwise the 'highest' version will be"
               " downloaded, i.e., '3.2.17'"), default=False)
+    parser.add_option(
+        "-j", "--jobs", dest="jobs", type="int",
+        help=("Number of versions to download and extract concurrently, [default:"
+              " %default]."), default=1)
+    parser.add_option(
+        "-c", "--cacheDir", dest="cache_dir",
+        help=("Directory in which to cache downloaded archives and their extracted"
+              " contents, keyed by URL and ETag. Versions found in the cache are hard"
+              " linked into the install directory instead of being downloaded again."),
+        default=None)
 
     options, versions = parser.parse_args()
 
@@ -434,10 +708,10 @@ we'll pull the highest non-rc version compatible with the version specified.
         parser.exit(1)
 
     downloader = MultiVersionDownloader(options.install_dir, options.link_dir, options.edition,
-                                        options.platform, options.architecture, options.use_latest)
+                                        options.platform, options.architecture, options.use_latest,
+                                        options.cache_dir)
 
-    for version in versions:
-        downloader.download_install(version)
+    downloader.download_install_all(versions, options.jobs)
 
 
 if __name__ == "__main__":
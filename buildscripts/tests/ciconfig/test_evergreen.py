@@ -1,7 +1,10 @@
 """Unit tests for the buildscripts.ciconfig.evergreen module."""
 
 import datetime
+import json
 import os
+import shutil
+import tempfile
 import unittest
 
 import buildscripts.ciconfig.evergreen as _evergreen
@@ -65,6 +68,77 @@ class TestEvergreenProjectConfig(unittest.TestCase):
         self.assertIn("debian-stretch", self.conf.distro_names)
         self.assertIn("amazon", self.conf.distro_names)
 
+    def test_get_variant_names_by_task(self):
+        self.assertEqual(["osx-108", "ubuntu", "amazon"],
+                         self.conf.get_variant_names_by_task("compile"))
+        self.assertEqual(["ubuntu", "debian"], self.conf.get_variant_names_by_task("resmoke_task"))
+        self.assertEqual([], self.conf.get_variant_names_by_task("no_such_task"))
+
+    def test_get_task_names_by_tag(self):
+        conf = _evergreen.EvergreenProjectConfig({
+            "tasks": [{"name": "t1", "tags": ["a", "b"]}, {"name": "t2", "tags": ["b"]},
+                      {"name": "t3"}],
+            "buildvariants": []
+        })  # yapf: disable
+
+        self.assertEqual(["t1"], conf.get_task_names_by_tag("a"))
+        self.assertEqual(["t1", "t2"], conf.get_task_names_by_tag("b"))
+        self.assertEqual([], conf.get_task_names_by_tag("c"))
+
+
+class TestParseEvergreenFileCache(unittest.TestCase):
+    """Unit tests for caching the parsed configuration in parse_evergreen_file()."""
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def _parse(self, path=TEST_FILE_PATH, cache_dir=None):
+        return _evergreen.parse_evergreen_file(path, evergreen_binary=None,
+                                               cache_dir=cache_dir or self.cache_dir)
+
+    def _cache_files(self):
+        return [os.path.join(self.cache_dir, name) for name in os.listdir(self.cache_dir)]
+
+    def test_parsed_config_is_cached(self):
+        conf = self._parse()
+
+        cache_files = self._cache_files()
+        self.assertEqual(1, len(cache_files))
+        with open(cache_files[0]) as fstream:
+            self.assertEqual(conf._conf, json.load(fstream))
+
+    def test_cached_config_is_used(self):
+        self._parse()
+        cache_file = self._cache_files()[0]
+        with open(cache_file) as fstream:
+            cached = json.load(fstream)
+        cached["tasks"] = cached["tasks"][:1]
+        with open(cache_file, "w") as fstream:
+            json.dump(cached, fstream)
+
+        self.assertEqual(1, len(self._parse().tasks))
+
+    def test_changed_file_is_parsed_again(self):
+        path = os.path.join(self.cache_dir, "evergreen.yml")
+        shutil.copy(TEST_FILE_PATH, path)
+        cache_dir = os.path.join(self.cache_dir, "cache")
+        self._parse(path, cache_dir)
+        with open(path, "a") as fstream:
+            fstream.write("# A change.\n")
+        self._parse(path, cache_dir)
+
+        self.assertEqual(2, len(os.listdir(cache_dir)))
+
+    def test_corrupt_cache_is_ignored(self):
+        self._parse()
+        with open(self._cache_files()[0], "w") as fstream:
+            fstream.write("{")
+
+        self.assertEqual(6, len(self._parse().tasks))
+
 
 class TestTask(unittest.TestCase):  # pylint: disable=too-many-public-methods
     """Unit tests for the Task class."""
@@ -0,0 +1,32 @@
+"""Unit tests for buildscripts/resmokelib/core/network.py."""
+
+import unittest
+
+from buildscripts.resmokelib import config
+from buildscripts.resmokelib.core import network
+
+# pylint: disable=missing-docstring
+
+
+class TestPortAllocatorReset(unittest.TestCase):
+    def setUp(self):
+        self.base_port = config.BASE_PORT
+        config.BASE_PORT = 20000
+        network.PortAllocator.reset()
+
+    def tearDown(self):
+        network.PortAllocator.reset()
+        config.BASE_PORT = self.base_port
+
+    def test_reset_all_jobs(self):
+        first_ports = [network.PortAllocator.next_fixture_port(job_num) for job_num in (0, 1)]
+        network.PortAllocator.reset()
+        self.assertEqual(first_ports,
+                         [network.PortAllocator.next_fixture_port(job_num) for job_num in (0, 1)])
+
+    def test_reset_some_jobs(self):
+        job0_port = network.PortAllocator.next_fixture_port(0)
+        job1_port = network.PortAllocator.next_fixture_port(1)
+        network.PortAllocator.reset([0])
+        self.assertEqual(job0_port, network.PortAllocator.next_fixture_port(0))
+        self.assertEqual(job1_port + 1, network.PortAllocator.next_fixture_port(1))
@@ -0,0 +1,159 @@
+"""Unit tests for the buildscripts.resmokelib.hang_analyzer.extractor module."""
+
+import io
+import os
+import shutil
+import sys
+import tarfile
+import tempfile
+import unittest
+
+from mock import Mock, patch
+
+from buildscripts.resmokelib.hang_analyzer import extractor
+from buildscripts.resmokelib.hang_analyzer.process_list import Pinfo
+
+# pylint: disable=missing-docstring
+
+NS = "buildscripts.resmokelib.hang_analyzer.extractor"
+
+
+def ns(relative_name):  # pylint: disable=invalid-name
+    """Return a full name from a name relative to the test module"s name space."""
+    return NS + "." + relative_name
+
+
+def _make_archive(path, files):
+    with tarfile.open(path, "w:gz") as tar:
+        for name, data in files.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            info.mode = 0o644
+            tar.addfile(info, io.BytesIO(data))
+
+
+@unittest.skipIf(sys.platform == "win32", "the archive is a zip file on Windows")
+class TestDebugSymbolsExtraction(unittest.TestCase):
+    def setUp(self):
+        self.old_cwd = os.getcwd()
+        self.temp_dir = tempfile.mkdtemp()
+        os.chdir(self.temp_dir)
+        self.cache_dir = os.path.join(self.temp_dir, "cache")
+        _make_archive(
+            extractor.DEBUG_SYMBOLS_ARCHIVE, {
+                "dist-test/bin/mongo.debug": b"mongo symbols",
+                "dist-test/bin/mongod.debug": b"mongod symbols",
+                "dist-test/bin/mongos.dSYM/Contents/Info.plist": b"plist",
+                "dist-test/bin/mongos.dSYM/Contents/Resources/DWARF/mongos": b"mongos symbols",
+                "dist-test/bin/dbtest.debug": b"dbtest symbols",
+                "dist-test/lib/libbase.so.debug": b"libbase symbols",
+            })
+
+    def tearDown(self):
+        os.chdir(self.old_cwd)
+        shutil.rmtree(self.temp_dir)
+
+    def _read(self, path):
+        with open(os.path.join(self.temp_dir, path), "rb") as file_handle:
+            return file_handle.read()
+
+    def test_only_needed_symbols_are_extracted(self):
+        processes = [Pinfo(name="mongod", pidv=[1, 2]), Pinfo(name="mongos", pidv=[3])]
+        symbols = extractor.start_extracting_debug_symbols(Mock(), processes, cache_dir=None)
+        symbols.wait("mongod")
+        self.assertEqual(self._read("mongod.debug"), b"mongod symbols")
+        symbols.wait_all()
+
+        self.assertEqual(self._read("dist-test/bin/mongod.debug"), b"mongod symbols")
+        self.assertEqual(
+            self._read("mongos.dSYM/Contents/Resources/DWARF/mongos"), b"mongos symbols")
+        self.assertFalse(os.path.exists("mongo.debug"))
+        self.assertFalse(os.path.exists("dist-test/bin/dbtest.debug"))
+        self.assertEqual(self._read("dist-test/lib/libbase.so.debug"), b"libbase symbols")
+
+    @patch(ns("_expected_members"))
+    def test_ready_once_library_symbols_are_extracted(self, expected_members_mock):
+        expected_members_mock.return_value = {
+            "dist-test/bin/mongod.debug", "dist-test/lib/libbase.so.debug"
+        }
+        ready_with_library = []
+        mark_ready = extractor.DebugSymbolsExtraction._mark_ready
+
+        def record_mark_ready(extraction, binary):
+            ready_with_library.append((binary, os.path.exists("dist-test/lib/libbase.so.debug")))
+            mark_ready(extraction, binary)
+
+        with patch.object(extractor.DebugSymbolsExtraction, "_mark_ready", record_mark_ready):
+            extractor.extract_debug_symbols(Mock(), ["mongod"], {"mongod": 1}, cache_dir=None)
+
+        self.assertEqual(ready_with_library[0], ("mongod", True))
+
+    @patch(ns("_expected_members"))
+    def test_unknown_members_ready_at_end_of_archive(self, expected_members_mock):
+        expected_members_mock.return_value = None
+        ready_with_library = []
+        mark_ready = extractor.DebugSymbolsExtraction._mark_ready
+
+        def record_mark_ready(extraction, binary):
+            ready_with_library.append((binary, os.path.exists("dist-test/lib/libbase.so.debug")))
+            mark_ready(extraction, binary)
+
+        with patch.object(extractor.DebugSymbolsExtraction, "_mark_ready", record_mark_ready):
+            extractor.extract_debug_symbols(Mock(), ["mongos", "mongo"], cache_dir=None)
+
+        self.assertEqual(sorted(ready_with_library), [("mongo", True), ("mongos", True)])
+
+    def test_existing_symbols_are_not_overwritten(self):
+        with open("mongod.debug", "wb") as file_handle:
+            file_handle.write(b"existing")
+        extractor.extract_debug_symbols(Mock(), ["mongod"], cache_dir=None)
+
+        self.assertEqual(self._read("mongod.debug"), b"existing")
+
+    def test_missing_archive(self):
+        os.remove(extractor.DEBUG_SYMBOLS_ARCHIVE)
+        logger = Mock()
+        extractor.extract_debug_symbols(logger, ["mongod"], cache_dir=None)
+
+        logger.info.assert_called_once()
+        self.assertFalse(os.path.exists("mongod.debug"))
+
+    @patch(ns("_expected_members"))
+    @patch(ns("read_build_id"))
+    @patch(ns("_process_build_id"))
+    def test_cached_symbols_are_reused(self, process_build_id_mock, read_build_id_mock,
+                                       expected_members_mock):
+        expected_members_mock.side_effect = lambda binary, pid: {"dist-test/bin/mongod.debug"}
+        process_build_id_mock.return_value = "abc123"
+        read_build_id_mock.return_value = "abc123"
+        extractor.extract_debug_symbols(Mock(), ["mongod"], {"mongod": 1}, self.cache_dir)
+        self.assertEqual(self._read("cache/abc123/mongod.debug"), b"mongod symbols")
+
+        os.remove(extractor.DEBUG_SYMBOLS_ARCHIVE)
+        shutil.rmtree("dist-test")
+        os.remove("mongod.debug")
+        extractor.extract_debug_symbols(Mock(), ["mongod"], {"mongod": 1}, self.cache_dir)
+
+        self.assertEqual(self._read("mongod.debug"), b"mongod symbols")
+        self.assertEqual(self._read("dist-test/bin/mongod.debug"), b"mongod symbols")
+
+    @patch(ns("read_build_id"))
+    @patch(ns("_process_build_id"))
+    def test_mismatched_build_id_is_not_cached(self, process_build_id_mock, read_build_id_mock):
+        process_build_id_mock.return_value = "abc123"
+        read_build_id_mock.return_value = "def456"
+        extractor.extract_debug_symbols(Mock(), ["mongod"], {"mongod": 1}, self.cache_dir)
+
+        self.assertEqual(self._read("mongod.debug"), b"mongod symbols")
+        self.assertFalse(os.path.exists(os.path.join(self.cache_dir, "abc123")))
+
+
+class TestReadBuildId(unittest.TestCase):
+    def test_not_an_elf_file(self):
+        with tempfile.NamedTemporaryFile() as file_handle:
+            file_handle.write(b"not an ELF file")
+            file_handle.flush()
+            self.assertIsNone(extractor.read_build_id(file_handle.name))
+
+    def test_missing_file(self):
+        self.assertIsNone(extractor.read_build_id("/does/not/exist"))
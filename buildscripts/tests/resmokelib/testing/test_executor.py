@@ -90,6 +90,12 @@ class TestCreateJobs(unittest.TestCase):
         self.ut_executor._create_jobs(1)
         self.assertEqual(num_jobs, self.ut_executor._make_job.call_count)
 
+    def test_create_jobs_after_offset(self):
+        self.ut_executor._job_num_offset = 4
+        self.ut_executor._num_jobs_to_start = lambda x, y: 2
+        self.ut_executor._create_jobs(2)
+        self.assertEqual([mock.call(4), mock.call(5)], self.ut_executor._make_job.call_args_list)
+
 
 class TestNumTimesToRepeatTests(unittest.TestCase):
     def test_default(self):
@@ -148,6 +154,8 @@ class TestMakeTestQueue(unittest.TestCase):
 class UnitTestExecutor(executor.TestSuiteExecutor):
     def __init__(self, suite, config):  # pylint: disable=super-init-not-called
         self._suite = suite
+        self._job_num_offset = 0
+        self._job_slots = None
         self.test_queue_logger = logging.getLogger("executor_unittest")
         self.test_config = config
         self.logger = mock.MagicMock()
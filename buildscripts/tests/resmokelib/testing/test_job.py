@@ -67,6 +67,17 @@ class TestJob(unittest.TestCase):
         for test in self.TESTS:
             self.assertEqual(job_object.tests[test], num_repeat_tests)
 
+    def test__run_holds_job_slot_per_test(self):
+        queue = _queue.Queue()
+        suite_options = self.get_suite_options(num_repeat_tests=1)
+        job_object = UnitJob(suite_options)
+        job_object._job_slots = mock.MagicMock()
+        self.queue_tests(self.TESTS, queue, queue_element.QueueElem, suite_options)
+        job_object._run(queue, self.mock_interrupt_flag())
+        self.assertEqual(job_object.total_test_num, len(self.TESTS))
+        self.assertEqual(job_object._job_slots.__enter__.call_count, len(self.TESTS))
+        self.assertEqual(job_object._job_slots.__exit__.call_count, len(self.TESTS))
+
     def test__run_time_repeat_time_no_min_max(self):
         increment = 1
         time_repeat_tests_secs = 10
@@ -199,6 +210,7 @@ class UnitJob(job.Job):  # pylint: disable=too-many-instance-attributes
         self.report = None
         self.archival = None
         self.suite_options = suite_options
+        self._job_slots = None
         self.test_queue_logger = logging.getLogger("job_unittest")
         self.total_test_num = 0
         self.tests = {}
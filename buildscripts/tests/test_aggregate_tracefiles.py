@@ -0,0 +1,145 @@
+"""Unit tests for the aggregate_tracefiles script."""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from buildscripts import aggregate_tracefiles
+
+# pylint: disable=missing-docstring
+
+FIRST = """TN:
+SF:/src/b.cpp
+FN:10,g
+FNDA:1,g
+DA:10,1
+DA:11,0
+end_of_record
+TN:
+SF:/src/a.cpp
+FN:5,f
+FN:1,main
+FNDA:2,f
+FNDA:1,main
+BRDA:5,0,0,2
+BRDA:5,0,1,-
+DA:1,1
+DA:5,2
+LF:2
+LH:2
+end_of_record
+"""
+
+SECOND = """TN:
+SF:/src/a.cpp
+FN:7,f
+FN:20,h
+FNDA:1,f
+FNDA:0,h
+BRDA:5,0,1,3
+DA:5,1
+DA:20,0
+end_of_record
+TN:other test
+SF:/src/a.cpp
+DA:1,4
+end_of_record
+TN:
+SF:/src/c.cpp
+FN:3,unused
+FNDA:0,unused
+end_of_record
+"""
+
+MERGED = """TN:
+SF:/src/a.cpp
+FN:1,main
+FN:5,f
+FN:20,h
+FNDA:1,main
+FNDA:3,f
+FNDA:0,h
+FNF:3
+FNH:2
+DA:1,1
+DA:5,3
+DA:20,0
+LF:3
+LH:2
+end_of_record
+TN:other_test
+SF:/src/a.cpp
+FN:1,main
+FN:5,f
+FN:20,h
+FNF:0
+FNH:0
+DA:1,4
+LF:1
+LH:1
+end_of_record
+TN:
+SF:/src/b.cpp
+FN:10,g
+FNDA:1,g
+FNF:1
+FNH:1
+DA:10,1
+DA:11,0
+LF:2
+LH:1
+end_of_record
+"""
+
+
+class TestAggregateTracefiles(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.first = self._write("first.info", FIRST)
+        self.second = self._write("second.info", SECOND)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _write(self, name, contents):
+        path = os.path.join(self.temp_dir, name)
+        with open(path, "w") as file_handle:
+            file_handle.write(contents)
+        return path
+
+    def _read(self, path):
+        with open(path) as file_handle:
+            return file_handle.read()
+
+    def test_sort_tracefile(self):
+        output = os.path.join(self.temp_dir, "sorted.info")
+        aggregate_tracefiles.sort_tracefile((self.first, output, False))
+        contents = self._read(output)
+        self.assertLess(contents.index("SF:/src/a.cpp"), contents.index("SF:/src/b.cpp"))
+        self.assertNotIn("BRDA", contents)
+
+    def test_merge_keeps_branches(self):
+        first_sorted = os.path.join(self.temp_dir, "first_sorted.info")
+        second_sorted = os.path.join(self.temp_dir, "second_sorted.info")
+        output = os.path.join(self.temp_dir, "merged.info")
+        aggregate_tracefiles.sort_tracefile((self.first, first_sorted, True))
+        aggregate_tracefiles.sort_tracefile((self.second, second_sorted, True))
+        aggregate_tracefiles.merge_sorted_tracefiles((first_sorted, second_sorted, output, True))
+
+        contents = self._read(output)
+        self.assertIn("BRDA:5,0,0,2\nBRDA:5,0,1,3\nBRF:2\nBRH:2\n", contents)
+        self.assertFalse(os.path.exists(first_sorted))
+        self.assertFalse(os.path.exists(second_sorted))
+
+    def test_aggregate(self):
+        output = os.path.join(self.temp_dir, "output.info")
+        third = self._write("third.info", "")
+        ret = aggregate_tracefiles.aggregate([self.first, self.second, third], output, jobs=2)
+        self.assertEqual(ret, 0)
+        self.assertEqual(self._read(output), MERGED)
+
+    def test_aggregate_one_file(self):
+        output = os.path.join(self.temp_dir, "output.info")
+        aggregate_tracefiles.aggregate([self.second], output, jobs=1)
+        self.assertNotIn("SF:/src/c.cpp", self._read(output))
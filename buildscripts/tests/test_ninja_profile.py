@@ -0,0 +1,95 @@
+"""Unit tests for the ninja_profile script."""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from buildscripts import ninja_profile
+
+# pylint: disable=missing-docstring
+
+NINJA_LOG = """# ninja log v5
+0\t50\t0\tb.o\t2
+0\t100\t0\ta.o\t1
+100\t200\t0\tlibab.a\t3
+200\t500\t0\tprog\t4
+0\t40\t0\tb.o\t2
+0\t120\t0\ta.o\t1
+120\t220\t0\tlibab.a\t3
+220\t520\t0\tprog\t4
+"""
+
+BUILD_NINJA = """rule CXX
+  command = c++ $in -o $out
+build a.o: CXX src/a$ file.cpp
+build b.o: CXX src/b.cpp | gen.h
+build libab.a: AR a.o b.o
+build prog: LINK main.o libab.a || $
+    install_dir
+"""
+
+
+class TestNinjaProfile(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.log_path = self._write(".ninja_log", NINJA_LOG)
+        self.ninja_path = self._write("build.ninja", BUILD_NINJA)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _write(self, name, contents):
+        path = os.path.join(self.temp_dir, name)
+        with open(path, "w") as file_handle:
+            file_handle.write(contents)
+        return path
+
+    def test_read_ninja_log_splits_runs(self):
+        runs = ninja_profile.read_ninja_log(self.log_path)
+        self.assertEqual(len(runs), 2)
+        self.assertEqual([entry.output for entry in runs[1]], ["b.o", "a.o", "libab.a", "prog"])
+
+    def test_read_ninja_log_rejects_other_files(self):
+        with self.assertRaises(ValueError):
+            ninja_profile.read_ninja_log(self.ninja_path)
+
+    def test_read_ninja_file(self):
+        edges = ninja_profile.read_ninja_file(self.ninja_path)
+        self.assertEqual(edges["a.o"].inputs, ["src/a file.cpp"])
+        self.assertEqual(edges["b.o"].inputs, ["src/b.cpp", "gen.h"])
+        self.assertEqual(edges["prog"].rule, "LINK")
+        self.assertEqual(edges["prog"].inputs, ["main.o", "libab.a", "install_dir"])
+
+    def test_build_weights(self):
+        runs = ninja_profile.read_ninja_log(self.log_path)
+        edges = ninja_profile.read_ninja_file(self.ninja_path)
+        weights = ninja_profile.build_weights(runs, edges, history=2, peak_memory={"prog": 1000})
+
+        targets = weights["targets"]
+        self.assertEqual(targets["a.o"]["duration_ms"], 110)
+        self.assertEqual(targets["prog"]["weight_ms"], 300)
+        self.assertEqual(targets["libab.a"]["weight_ms"], 400)
+        self.assertEqual(targets["a.o"]["weight_ms"], 510)
+        self.assertTrue(targets["a.o"]["heavy"])
+        self.assertNotIn("heavy", targets["b.o"])
+        self.assertEqual(weights["pools"]["link"]["p90_peak_memory_bytes"], 1000)
+
+        self.assertEqual([step["output"] for step in weights["critical_path"]],
+                         ["a.o", "libab.a", "prog"])
+        self.assertEqual(weights["libdeps_edges"], [{
+            "from": "prog",
+            "to": "libab.a",
+            "wait_ms": 220,
+        }])
+
+    def test_read_resource_info(self):
+        info_path = self._write(
+            "resource_info.json", "\n".join([
+                '{"command": "c++ -c src/a.cpp -o a.o", "mem_used": 500}',
+                '{"command": "c++ -c src/a.cpp -o a.o", "mem_used": 700}',
+                '{"command": "ld -oprog main.o", "mem_used": 900}',
+                'not json',
+            ]))
+        peak = ninja_profile.read_resource_info(info_path, ["a.o", "prog"])
+        self.assertEqual(peak, {"a.o": 700, "prog": 900})
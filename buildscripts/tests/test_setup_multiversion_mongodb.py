@@ -0,0 +1,199 @@
+"""Unit tests for the setup_multiversion_mongodb script."""
+
+import hashlib
+import http.server
+import io
+import os
+import shutil
+import tarfile
+import tempfile
+import threading
+import unittest
+import zipfile
+
+from buildscripts import setup_multiversion_mongodb as under_test
+
+# pylint: disable=missing-docstring,protected-access
+
+
+def _make_tgz(path, root, files):
+    with tarfile.open(path, "w:gz") as tar_handle:
+        root_info = tarfile.TarInfo(root)
+        root_info.type = tarfile.DIRTYPE
+        root_info.mode = 0o755
+        tar_handle.addfile(root_info)
+        for name, data in files.items():
+            info = tarfile.TarInfo(os.path.join(root, name))
+            info.size = len(data)
+            info.mode = 0o755
+            tar_handle.addfile(info, io.BytesIO(data))
+
+
+def _make_zip(path, root, files):
+    with zipfile.ZipFile(path, "w") as zip_handle:
+        zip_handle.writestr(root + "/", b"")
+        for name, data in files.items():
+            zip_handle.writestr(os.path.join(root, name), data)
+
+
+def _sha256(path):
+    with open(path, "rb") as file_handle:
+        return hashlib.sha256(file_handle.read()).hexdigest()
+
+
+class _ArchiveServer(object):
+    """Serve the files in a directory over HTTP, counting GET requests and reporting ETags."""
+
+    def __init__(self, serve_dir):
+        self.gets = []
+        self.etag = "v1"
+        server = self
+
+        class Handler(http.server.SimpleHTTPRequestHandler):
+            def __init__(self, *args, **kwargs):
+                super(Handler, self).__init__(*args, directory=serve_dir, **kwargs)
+
+            def do_GET(self):  # pylint: disable=invalid-name
+                server.gets.append(self.path)
+                super(Handler, self).do_GET()
+
+            def end_headers(self):
+                self.send_header("ETag", server.etag)
+                super(Handler, self).end_headers()
+
+            def log_message(self, *args):  # pylint: disable=arguments-differ
+                pass
+
+        self._httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+
+    def url(self, name):
+        return "http://127.0.0.1:{}/{}".format(self._httpd.server_address[1], name)
+
+    def shutdown(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        self._thread.join()
+
+
+class _ServerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.serve_dir = os.path.join(self.temp_dir, "serve")
+        os.makedirs(self.serve_dir)
+        self.server = _ArchiveServer(self.serve_dir)
+
+    def tearDown(self):
+        self.server.shutdown()
+        shutil.rmtree(self.temp_dir)
+
+    def make_version(self, version, suffix=".tgz"):
+        root = "mongodb-linux-x86_64-{}".format(version)
+        files = {"bin/mongod": b"mongod " + version.encode(), "bin/mongo": b"mongo"}
+        archive = os.path.join(self.serve_dir, root + suffix)
+        if suffix == ".tgz":
+            _make_tgz(archive, root, files)
+        else:
+            _make_zip(archive, root, files)
+        return root, self.server.url(root + suffix)
+
+    def downloader(self, install_name, cache_dir=None):
+        return under_test.MultiVersionDownloader(
+            os.path.join(self.temp_dir, install_name), os.path.join(self.temp_dir, "link"),
+            "base", "linux", "x86_64", cache_dir=cache_dir)
+
+
+class TestDownloadAndExtract(_ServerTestCase):
+    def _check(self, suffix):
+        root, url = self.make_version("4.0.1", suffix)
+        dest_dir = os.path.join(self.temp_dir, "dest")
+        archive_file = os.path.join(self.temp_dir, "archive" + suffix)
+
+        digest, etag, first_file = under_test.download_and_extract(url, dest_dir, archive_file)
+
+        self.assertEqual(digest, _sha256(os.path.join(self.serve_dir, root + suffix)))
+        self.assertEqual(digest, _sha256(archive_file))
+        self.assertEqual(etag, "v1")
+        self.assertEqual(under_test.archive_root(first_file), root)
+        with open(os.path.join(dest_dir, root, "bin", "mongod"), "rb") as file_handle:
+            self.assertEqual(file_handle.read(), b"mongod 4.0.1")
+
+    def test_tgz_is_extracted_while_streaming(self):
+        self._check(".tgz")
+
+    def test_zip_is_extracted_after_download(self):
+        self._check(".zip")
+
+    def test_unsupported_suffix(self):
+        with self.assertRaises(Exception):
+            under_test.download_and_extract(
+                self.server.url("a.rpm"), os.path.join(self.temp_dir, "dest"),
+                os.path.join(self.temp_dir, "a.rpm"))
+
+
+class TestArtifactCache(_ServerTestCase):
+    def setUp(self):
+        super(TestArtifactCache, self).setUp()
+        self.cache_dir = os.path.join(self.temp_dir, "cache")
+        self.root, self.url = self.make_version("4.0.1")
+
+    def test_second_install_skips_download(self):
+        first = self.downloader("install1", self.cache_dir).fetch_install(self.url)
+        second = self.downloader("install2", self.cache_dir).fetch_install(self.url)
+
+        self.assertEqual(len(self.server.gets), 1)
+        self.assertEqual(os.path.basename(second), self.root)
+        self.assertTrue(
+            os.path.samefile(
+                os.path.join(first, "bin", "mongod"), os.path.join(second, "bin", "mongod")))
+
+    def test_changed_etag_downloads_again(self):
+        self.downloader("install1", self.cache_dir).fetch_install(self.url)
+        self.server.etag = "v2"
+        self.downloader("install2", self.cache_dir).fetch_install(self.url)
+
+        self.assertEqual(len(self.server.gets), 2)
+
+    def test_missing_tree_is_extracted_from_cached_archive(self):
+        self.downloader("install1", self.cache_dir).fetch_install(self.url)
+        shutil.rmtree(os.path.join(self.cache_dir, "trees"))
+        os.makedirs(os.path.join(self.cache_dir, "trees"))
+        installed_dir = self.downloader("install2", self.cache_dir).fetch_install(self.url)
+
+        self.assertEqual(len(self.server.gets), 1)
+        self.assertTrue(os.path.isfile(os.path.join(installed_dir, "bin", "mongod")))
+
+    def test_corrupt_archive_downloads_again(self):
+        self.downloader("install1", self.cache_dir).fetch_install(self.url)
+        shutil.rmtree(os.path.join(self.cache_dir, "trees"))
+        os.makedirs(os.path.join(self.cache_dir, "trees"))
+        archives_dir = os.path.join(self.cache_dir, "archives")
+        for name in os.listdir(archives_dir):
+            with open(os.path.join(archives_dir, name), "ab") as file_handle:
+                file_handle.write(b"garbage")
+        installed_dir = self.downloader("install2", self.cache_dir).fetch_install(self.url)
+
+        self.assertEqual(len(self.server.gets), 2)
+        self.assertTrue(os.path.isfile(os.path.join(installed_dir, "bin", "mongod")))
+
+
+class TestDownloadInstallAll(_ServerTestCase):
+    def test_concurrent_installs(self):
+        versions = ["3.6.5", "4.0.1", "4.2.0"]
+        downloader = self.downloader("install")
+        downloader._links = {}
+        downloader._generic_links = {}
+        for version in versions:
+            _, downloader._links[version] = self.make_version(version)
+
+        downloader.download_install_all(versions, jobs=3)
+
+        link_dir = os.path.join(self.temp_dir, "link")
+        for version in versions:
+            with open(os.path.join(link_dir, "mongod-" + version), "rb") as file_handle:
+                self.assertEqual(file_handle.read(), b"mongod " + version.encode())
+        self.assertEqual(len(self.server.gets), len(versions))
+        self.assertEqual(
+            sorted(os.listdir(os.path.join(self.temp_dir, "install"))),
+            ["mongodb-linux-x86_64-" + version for version in versions])
@@ -12,10 +12,12 @@ class Stats:
         self.encrypt_calls = 0
         self.decrypt_calls = 0
         self.fault_calls = 0
+        self.latencies = {}
 
     def __repr__(self):
         return json.dumps({
             'decrypts': self.decrypt_calls,
             'encrypts': self.encrypt_calls,
             'faults': self.fault_calls,
+            'latencies': self.latencies,
         })
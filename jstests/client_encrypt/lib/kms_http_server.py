@@ -3,14 +3,12 @@
 
 import argparse
 import base64
-import collections
-import http.server
+import http
 import json
 import logging
-import socketserver
+import os
 import sys
 import urllib.parse
-import ssl
 
 from botocore.auth import SigV4Auth, S3SigV4Auth
 from botocore.awsrequest import AWSRequest
@@ -18,14 +16,18 @@ from botocore.credentials import Credentials
 
 import kms_http_common
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'libs'))
+
+import mock_http_async
+
 SECRET_PREFIX = "00SECRET"
 
-# Pass this data out of band instead of storing it in AwsKmsHandler since the
-# BaseHTTPRequestHandler does not call the methods as object methods but as class methods. This
-# means there is not self.
+# State shared by all requests. They are all handled on the server's event loop, one at a time,
+# so it needs no locking.
 stats = kms_http_common.Stats()
 disable_faults = False
 fault_type = None
+server = None
 
 """Fault which causes encrypt to return 500."""
 FAULT_ENCRYPT = "fault_encrypt"
@@ -67,245 +69,202 @@ def get_dict_subset(headers, subset):
             ret[header] = headers[header]
     return ret
 
-class AwsKmsHandler(http.server.BaseHTTPRequestHandler):
+def _reply(data, status=http.HTTPStatus.OK, operation=None):
+    print("Sending Response: " + data.decode())
+    return mock_http_async.Response(data, status, operation=operation)
+
+
+def handle_request(request):
     """
     Handle requests from AWS KMS Monitoring and test commands
     """
-    protocol_version = "HTTP/1.1"
-
-    def do_GET(self):
-        """Serve a Test GET request."""
-        parts = urllib.parse.urlsplit(self.path)
-        path = parts[2]
+    parts = urllib.parse.urlsplit(request.path)
+    path = parts[2]
 
+    if request.method == "GET":
         if path == kms_http_common.URL_PATH_STATS:
-            self._do_stats()
+            return mock_http_async.Response(
+                mock_http_async.stats_json(stats, server).encode('utf-8'))
         elif path == kms_http_common.URL_DISABLE_FAULTS:
-            self._do_disable_faults()
+            return _do_disable_faults()
         elif path == kms_http_common.URL_ENABLE_FAULTS:
-            self._do_enable_faults()
-        else:
-            self.send_response(http.HTTPStatus.NOT_FOUND)
-            self.end_headers()
-            self.wfile.write("Unknown URL".encode())
-
-    def do_POST(self):
-        """Serve a POST request."""
-        parts = urllib.parse.urlsplit(self.path)
-        path = parts[2]
-
-        if path == "/":
-            self._do_post()
-        else:
-            self.send_response(http.HTTPStatus.NOT_FOUND)
-            self.end_headers()
-            self.wfile.write("Unknown URL".encode())
+            return _do_enable_faults()
+    elif request.method == "POST" and path == "/":
+        return _do_post(request.headers, request.body)
 
-    def _send_reply(self, data, status=http.HTTPStatus.OK):
-        print("Sending Response: " + data.decode())
+    return mock_http_async.Response("Unknown URL".encode(), http.HTTPStatus.NOT_FOUND)
 
-        self.send_response(status)
-        self.send_header("content-type", "application/octet-stream")
-        self.send_header("Content-Length", str(len(data)))
-        self.end_headers()
 
-        self.wfile.write(data)
+def _do_post(headers, raw_input):
+    print("RAW INPUT: " + str(raw_input))
 
-    def _do_post(self):
-        global stats
-        clen = int(self.headers.get('content-length'))
+    if not headers["Host"] == "localhost":
+        data = "Unexpected host"
+        return _reply(data.encode("utf-8"))
 
-        raw_input = self.rfile.read(clen)
+    if not _validate_signature(headers, raw_input):
+        data = "Bad Signature"
+        return _reply(data.encode("utf-8"))
 
-        print("RAW INPUT: " + str(raw_input))
+    # X-Amz-Target: TrentService.Encrypt
+    aws_operation = headers['X-Amz-Target']
 
-        if not self.headers["Host"] == "localhost":
-            data = "Unexpected host"
-            self._send_reply(data.encode("utf-8"))
+    if aws_operation == "TrentService.Encrypt":
+        stats.encrypt_calls += 1
+        return _do_encrypt(raw_input)
+    elif aws_operation == "TrentService.Decrypt":
+        stats.decrypt_calls += 1
+        return _do_decrypt(raw_input)
 
-        if not self._validate_signature(self.headers, raw_input):
-            data = "Bad Signature"
-            self._send_reply(data.encode("utf-8"))
+    data = "Unknown AWS Operation"
+    return _reply(data.encode("utf-8"))
 
 
-        # X-Amz-Target: TrentService.Encrypt
-        aws_operation = self.headers['X-Amz-Target']
+def _validate_signature(headers, raw_input):
+    auth_header = headers["Authorization"]
+    signed_headers_start = auth_header.find("SignedHeaders")
+    signed_headers = auth_header[signed_headers_start:auth_header.find(",", signed_headers_start)]
+    signed_headers_dict = get_dict_subset(headers, signed_headers)
 
-        if aws_operation == "TrentService.Encrypt":
-            stats.encrypt_calls += 1
-            self._do_encrypt(raw_input)
-        elif aws_operation == "TrentService.Decrypt":
-            stats.decrypt_calls += 1
-            self._do_decrypt(raw_input)
-        else:
-            data = "Unknown AWS Operation"
-            self._send_reply(data.encode("utf-8"))
+    request = AWSRequest(method="POST", url="/", data=raw_input, headers=signed_headers_dict)
+    # SigV4Auth assumes this header exists even though it is not required by the algorithm
+    request.context['timestamp'] = headers['X-Amz-Date']
 
+    region_start = auth_header.find("Credential=access/") + len("Credential=access/YYYYMMDD/")
+    region = auth_header[region_start:auth_header.find("/", region_start)]
 
-    def _validate_signature(self, headers, raw_input):
-        auth_header = headers["Authorization"]
-        signed_headers_start = auth_header.find("SignedHeaders")
-        signed_headers = auth_header[signed_headers_start:auth_header.find(",", signed_headers_start)]
-        signed_headers_dict = get_dict_subset(headers, signed_headers)
+    credentials = Credentials("access", "secret")
+    auth = SigV4Auth(credentials, "kms", region)
+    string_to_sign = auth.string_to_sign(request, auth.canonical_request(request))
+    expected_signature = auth.signature(string_to_sign, request)
 
-        request = AWSRequest(method="POST", url="/", data=raw_input, headers=signed_headers_dict)
-        # SigV4Auth assumes this header exists even though it is not required by the algorithm
-        request.context['timestamp'] = headers['X-Amz-Date']
+    signature_headers_start = auth_header.find("Signature=") + len("Signature=")
+    actual_signature = auth_header[signature_headers_start:]
 
-        region_start = auth_header.find("Credential=access/") + len("Credential=access/YYYYMMDD/")
-        region = auth_header[region_start:auth_header.find("/", region_start)]
+    return expected_signature == actual_signature
 
-        credentials = Credentials("access", "secret")
-        auth = SigV4Auth(credentials, "kms", region)
-        string_to_sign = auth.string_to_sign(request, auth.canonical_request(request))
-        expected_signature = auth.signature(string_to_sign, request)
 
-        signature_headers_start = auth_header.find("Signature=") + len("Signature=")
-        actual_signature = auth_header[signature_headers_start:]
+def _do_encrypt(raw_input):
+    request = json.loads(raw_input)
 
-        return expected_signature == actual_signature
+    print(request)
 
+    plaintext = request["Plaintext"]
+    keyid = request["KeyId"]
 
-    def _do_encrypt(self, raw_input):
-        request = json.loads(raw_input)
+    ciphertext = SECRET_PREFIX.encode() + plaintext.encode()
+    ciphertext = base64.b64encode(ciphertext).decode()
 
-        print(request)
+    if fault_type and fault_type.startswith(FAULT_ENCRYPT) and not disable_faults:
+        return _do_encrypt_faults(ciphertext)
 
-        plaintext = request["Plaintext"]
-        keyid = request["KeyId"]
+    response = {
+        "CiphertextBlob" : ciphertext,
+        "KeyId" : keyid,
+    }
 
-        ciphertext = SECRET_PREFIX.encode() + plaintext.encode()
-        ciphertext = base64.b64encode(ciphertext).decode()
+    return _reply(json.dumps(response).encode('utf-8'), operation="encrypt")
 
-        if fault_type and fault_type.startswith(FAULT_ENCRYPT) and not disable_faults:
-            return self._do_encrypt_faults(ciphertext)
+def _do_encrypt_faults(raw_ciphertext):
+    stats.fault_calls += 1
 
+    if fault_type == FAULT_ENCRYPT:
+        return _reply("Internal Error of some sort.".encode(),
+                      http.HTTPStatus.INTERNAL_SERVER_ERROR, operation="encrypt_fault")
+    elif fault_type == FAULT_ENCRYPT_WRONG_FIELDS:
         response = {
-            "CiphertextBlob" : ciphertext,
-            "KeyId" : keyid,
+            "SomeBlob" : raw_ciphertext,
+            "KeyId" : "foo",
         }
 
-        self._send_reply(json.dumps(response).encode('utf-8'))
+        return _reply(json.dumps(response).encode('utf-8'), operation="encrypt_fault")
+    elif fault_type == FAULT_ENCRYPT_BAD_BASE64:
+        response = {
+            "CiphertextBlob" : "foo",
+            "KeyId" : "foo",
+        }
 
-    def _do_encrypt_faults(self, raw_ciphertext):
-        stats.fault_calls += 1
+        return _reply(json.dumps(response).encode('utf-8'), operation="encrypt_fault")
+    elif fault_type == FAULT_ENCRYPT_CORRECT_FORMAT:
+        response = {
+            "__type" : "NotFoundException",
+            "Message" : "Error encrypting message",
+        }
 
-        if fault_type == FAULT_ENCRYPT:
-            self._send_reply("Internal Error of some sort.".encode(), http.HTTPStatus.INTERNAL_SERVER_ERROR)
-            return
-        elif fault_type == FAULT_ENCRYPT_WRONG_FIELDS:
-            response = {
-                "SomeBlob" : raw_ciphertext,
-                "KeyId" : "foo",
-            }
+        return _reply(json.dumps(response).encode('utf-8'), operation="encrypt_fault")
 
-            self._send_reply(json.dumps(response).encode('utf-8'))
-            return
-        elif fault_type == FAULT_ENCRYPT_BAD_BASE64:
-            response = {
-                "CiphertextBlob" : "foo",
-                "KeyId" : "foo",
-            }
+    raise ValueError("Unknown Fault Type: " + fault_type)
 
-            self._send_reply(json.dumps(response).encode('utf-8'))
-            return
-        elif fault_type == FAULT_ENCRYPT_CORRECT_FORMAT:
-            response = {
-                "__type" : "NotFoundException",
-                "Message" : "Error encrypting message",
-            }
+def _do_decrypt(raw_input):
+    request = json.loads(raw_input)
+    blob = base64.b64decode(request["CiphertextBlob"]).decode()
 
-            self._send_reply(json.dumps(response).encode('utf-8'))
-            return
+    print("FOUND SECRET: " + blob)
 
-        raise ValueError("Unknown Fault Type: " + fault_type)
+    # our "encrypted" values start with the word SECRET_PREFIX otherwise they did not come from us
+    if not blob.startswith(SECRET_PREFIX):
+        raise ValueError()
 
-    def _do_decrypt(self, raw_input):
-        request = json.loads(raw_input)
-        blob = base64.b64decode(request["CiphertextBlob"]).decode()
+    blob = blob[len(SECRET_PREFIX):]
 
-        print("FOUND SECRET: " + blob)
+    if fault_type and fault_type.startswith(FAULT_DECRYPT) and not disable_faults:
+        return _do_decrypt_faults(blob)
 
-        # our "encrypted" values start with the word SECRET_PREFIX otherwise they did not come from us
-        if not blob.startswith(SECRET_PREFIX):
-            raise ValueError()
+    response = {
+        "Plaintext" : blob,
+        "KeyId" : "Not a clue",
+    }
 
-        blob = blob[len(SECRET_PREFIX):]
+    return _reply(json.dumps(response).encode('utf-8'), operation="decrypt")
 
-        if fault_type and fault_type.startswith(FAULT_DECRYPT) and not disable_faults:
-            return self._do_decrypt_faults(blob)
+def _do_decrypt_faults(blob):
+    stats.fault_calls += 1
 
+    if fault_type == FAULT_DECRYPT:
+        return _reply("Internal Error of some sort.".encode(),
+                      http.HTTPStatus.INTERNAL_SERVER_ERROR, operation="decrypt_fault")
+    elif fault_type == FAULT_DECRYPT_WRONG_KEY:
         response = {
-            "Plaintext" : blob,
+            "Plaintext" : "ta7DXE7J0OiCRw03dYMJSeb8nVF5qxTmZ9zWmjuX4zW/SOorSCaY8VMTWG+cRInMx/rr/+QeVw2WjU2IpOSvMg==",
             "KeyId" : "Not a clue",
         }
 
-        self._send_reply(json.dumps(response).encode('utf-8'))
-
-    def _do_decrypt_faults(self, blob):
-        stats.fault_calls += 1
-
-        if fault_type == FAULT_DECRYPT:
-            self._send_reply("Internal Error of some sort.".encode(), http.HTTPStatus.INTERNAL_SERVER_ERROR)
-            return
-        elif fault_type == FAULT_DECRYPT_WRONG_KEY:
-            response = {
-                "Plaintext" : "ta7DXE7J0OiCRw03dYMJSeb8nVF5qxTmZ9zWmjuX4zW/SOorSCaY8VMTWG+cRInMx/rr/+QeVw2WjU2IpOSvMg==",
-                "KeyId" : "Not a clue",
-            }
-
-            self._send_reply(json.dumps(response).encode('utf-8'))
-            return
-        elif fault_type == FAULT_DECRYPT_CORRECT_FORMAT:
-            response = {
-                "__type" : "NotFoundException",
-                "Message" : "Error decrypting message",
-            }
-
-            self._send_reply(json.dumps(response).encode('utf-8'))
-            return
-
-        raise ValueError("Unknown Fault Type: " + fault_type)
-
-    def _send_header(self):
-        self.send_response(http.HTTPStatus.OK)
-        self.send_header("content-type", "application/octet-stream")
-        self.end_headers()
+        return _reply(json.dumps(response).encode('utf-8'), operation="decrypt_fault")
+    elif fault_type == FAULT_DECRYPT_CORRECT_FORMAT:
+        response = {
+            "__type" : "NotFoundException",
+            "Message" : "Error decrypting message",
+        }
 
-    def _do_stats(self):
-        self._send_header()
+        return _reply(json.dumps(response).encode('utf-8'), operation="decrypt_fault")
 
-        self.wfile.write(str(stats).encode('utf-8'))
+    raise ValueError("Unknown Fault Type: " + fault_type)
 
-    def _do_disable_faults(self):
-        global disable_faults
-        disable_faults = True
-        self._send_header()
+def _do_disable_faults():
+    global disable_faults
+    disable_faults = True
+    return mock_http_async.Response()
 
-    def _do_enable_faults(self):
-        global disable_faults
-        disable_faults = False
-        self._send_header()
+def _do_enable_faults():
+    global disable_faults
+    disable_faults = False
+    return mock_http_async.Response()
 
-def run(port, cert_file, ca_file, server_class=http.server.HTTPServer, handler_class=AwsKmsHandler):
+def run(port, cert_file, ca_file):
     """Run web server."""
     server_address = ('', port)
 
-    httpd = server_class(server_address, handler_class)
-
-    httpd.socket = ssl.wrap_socket (httpd.socket,
-        certfile=cert_file,
-        ca_certs=ca_file, server_side=True)
+    ssl_context = mock_http_async.server_ssl_context(cert_file, ca_file)
 
-    print("Mock KMS Web Server Listening on %s" % (str(server_address)))
-
-    httpd.serve_forever()
+    server.serve_forever(port, ssl_context, on_listening=lambda: print(
+        "Mock KMS Web Server Listening on %s" % (str(server_address))))
 
 
 def main():
     """Main Method."""
     global fault_type
     global disable_faults
+    global server
 
     parser = argparse.ArgumentParser(description='MongoDB Mock AWS KMS Endpoint.')
 
@@ -321,6 +280,8 @@ def main():
 
     parser.add_argument('--cert_file', type=str, required=True, help="TLS Server PEM file")
 
+    mock_http_async.add_arguments(parser)
+
     args = parser.parse_args()
     if args.verbose:
         logging.basicConfig(level=logging.DEBUG)
@@ -335,6 +296,9 @@ def main():
     if args.disable_faults:
         disable_faults = True
 
+    server = mock_http_async.MockHttpServer.from_args(handle_request, args,
+                                                      faults_enabled=lambda: not disable_faults)
+
     run(args.port, args.cert_file, args.ca_file)
 
 
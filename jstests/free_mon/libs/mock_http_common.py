@@ -15,10 +15,12 @@ class Stats:
         self.register_calls = 0
         self.metrics_calls = 0
         self.fault_calls = 0
+        self.latencies = {}
 
     def __repr__(self):
         return json.dumps({
             'metrics': self.metrics_calls,
             'registers': self.register_calls,
             'faults': self.fault_calls,
+            'latencies': self.latencies,
         })
@@ -2,11 +2,9 @@
 """Mock Free Monitoring Endpoint."""
 
 import argparse
-import collections
-import http.server
-import json
+import http
 import logging
-import socketserver
+import os
 import sys
 import urllib.parse
 
@@ -15,14 +13,18 @@ from bson.codec_options import CodecOptions
 from bson.json_util import dumps
 import mock_http_common
 
-# Pass this data out of band instead of storing it in FreeMonHandler since the
-# BaseHTTPRequestHandler does not call the methods as object methods but as class methods. This
-# means there is not self.
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'libs'))
+
+import mock_http_async
+
+# State shared by all requests. They are all handled on the server's event loop, one at a time,
+# so it needs no locking.
 stats = mock_http_common.Stats()
 last_metrics = None
 last_register = None
 disable_faults = False
 fault_type = None
+server = None
 """Fault which causes the server to return an HTTP failure on register."""
 FAULT_FAIL_REGISTER = "fail_register"
 """Fault which causes the server to return a response with a document with a bad version."""
@@ -51,227 +53,185 @@ URL_POST_REGISTER = '/register'
 URL_POST_METRICS = '/metrics'
 
 
-class FreeMonHandler(http.server.BaseHTTPRequestHandler):
+def _reply(data, operation=None):
+    return mock_http_async.Response(data, operation=operation)
+
+
+def handle_request(request):
     """
     Handle requests from Free Monitoring and test commands
     """
+    parts = urllib.parse.urlsplit(request.path)
+    path = parts[2]
 
-    def do_GET(self):
-        """Serve a Test GET request."""
-        parts = urllib.parse.urlsplit(self.path)
-        path = parts[2]
-
+    if request.method == "GET":
         if path == mock_http_common.URL_PATH_STATS:
-            self._do_stats()
+            return _reply(mock_http_async.stats_json(stats, server).encode('utf-8'))
         elif path == mock_http_common.URL_PATH_LAST_REGISTER:
-            self._do_last_register()
+            return _reply(str(last_register).encode('utf-8'))
         elif path == mock_http_common.URL_PATH_LAST_METRICS:
-            self._do_last_metrics()
+            return _reply(str(last_metrics).encode('utf-8'))
         elif path == mock_http_common.URL_DISABLE_FAULTS:
-            self._do_disable_faults()
+            return _do_disable_faults()
         elif path == mock_http_common.URL_ENABLE_FAULTS:
-            self._do_enable_faults()
-        else:
-            self.send_response(http.HTTPStatus.NOT_FOUND)
-            self.end_headers()
-            self.wfile.write("Unknown URL".encode())
-
-    def do_POST(self):
-        """Serve a Free Monitoring POST request."""
-        parts = urllib.parse.urlsplit(self.path)
-        path = parts[2]
-
+            return _do_enable_faults()
+    elif request.method == "POST":
         if path == URL_POST_REGISTER:
-            self._do_registration()
+            return _do_registration(request.body)
         elif path == URL_POST_METRICS:
-            self._do_metrics()
-        else:
-            self.send_response(http.HTTPStatus.NOT_FOUND)
-            self.end_headers()
-            self.wfile.write("Unknown URL".encode())
-
-    def _send_header(self):
-        self.send_response(http.HTTPStatus.OK)
-        self.send_header("content-type", "application/octet-stream")
-        self.end_headers()
-
-    def _do_registration(self):
-        global stats
-        global last_register
-        clen = int(self.headers.get('content-length'))
-
-        stats.register_calls += 1
-
-        raw_input = self.rfile.read(clen)
-        decoded_doc = bson.BSON.decode(raw_input)
-        last_register = dumps(decoded_doc)
-
-        if not disable_faults and fault_type == FAULT_FAIL_REGISTER:
-            stats.fault_calls += 1
-            self.send_response(http.HTTPStatus.INTERNAL_SERVER_ERROR)
-            self.send_header("content-type", "application/octet-stream")
-            self.end_headers()
-            self.wfile.write("Internal Error of some sort.".encode())
-            return
-
-        if not disable_faults and fault_type == FAULT_INVALID_REGISTER:
-            stats.fault_calls += 1
-            data = bson.BSON.encode({
-                'version': bson.int64.Int64(42),
-                'haltMetricsUploading': False,
-                'id': '',
-                'informationalURL': 'http://www.example.com/123',
-                'message': 'Welcome to the Mock Free Monitoring Endpoint',
-                'reportingInterval': bson.int64.Int64(1),
-            })
-        else:
-            reg_id = 'mock123_' + str(stats.register_calls)
-            if 'id' in decoded_doc:
-                reg_id = decoded_doc['id']
-
-            data = bson.BSON.encode({
-                'version':
-                    bson.int64.Int64(1),
-                'haltMetricsUploading':
-                    False,
-                'id':
-                    reg_id,
-                'informationalURL':
-                    'http://www.example.com/' + reg_id,
-                'message':
-                    'Welcome to the Mock Free Monitoring Endpoint',
-                'reportingInterval':
-                    bson.int64.Int64(1),
-                'userReminder':
-                    """To see your monitoring data, navigate to the unique URL below.
+            return _do_metrics(request.body)
+
+    return mock_http_async.Response("Unknown URL".encode(), http.HTTPStatus.NOT_FOUND)
+
+
+def _do_registration(raw_input):
+    global stats
+    global last_register
+    stats.register_calls += 1
+
+    decoded_doc = bson.BSON.decode(raw_input)
+    last_register = dumps(decoded_doc)
+
+    if not disable_faults and fault_type == FAULT_FAIL_REGISTER:
+        stats.fault_calls += 1
+        return mock_http_async.Response("Internal Error of some sort.".encode(),
+                                        http.HTTPStatus.INTERNAL_SERVER_ERROR,
+                                        operation="register_fault")
+
+    if not disable_faults and fault_type == FAULT_INVALID_REGISTER:
+        stats.fault_calls += 1
+        data = bson.BSON.encode({
+            'version': bson.int64.Int64(42),
+            'haltMetricsUploading': False,
+            'id': '',
+            'informationalURL': 'http://www.example.com/123',
+            'message': 'Welcome to the Mock Free Monitoring Endpoint',
+            'reportingInterval': bson.int64.Int64(1),
+        })
+    else:
+        reg_id = 'mock123_' + str(stats.register_calls)
+        if 'id' in decoded_doc:
+            reg_id = decoded_doc['id']
+
+        data = bson.BSON.encode({
+            'version':
+                bson.int64.Int64(1),
+            'haltMetricsUploading':
+                False,
+            'id':
+                reg_id,
+            'informationalURL':
+                'http://www.example.com/' + reg_id,
+            'message':
+                'Welcome to the Mock Free Monitoring Endpoint',
+            'reportingInterval':
+                bson.int64.Int64(1),
+            'userReminder':
+                """To see your monitoring data, navigate to the unique URL below.
 Anyone you share the URL with will also be able to view this page.
 
 https://localhost:8080/someUUID6v5jLKTIZZklDvN5L8sZ
 
 You can disable monitoring at any time by running db.disableFreeMonitoring().""",
-            })
-
-        self._send_header()
-
-        self.wfile.write(data)
-
-    def _do_metrics(self):
-        global stats
-        global last_metrics
-        clen = int(self.headers.get('content-length'))
-
-        stats.metrics_calls += 1
-
-        raw_input = self.rfile.read(clen)
-        decoded_doc = bson.BSON.decode(raw_input)
-        last_metrics = dumps(decoded_doc)
-
-        if not disable_faults and \
-            stats.metrics_calls > 5 and \
-            fault_type == FAULT_HALT_METRICS_5:
-            stats.fault_calls += 1
-            data = bson.BSON.encode({
-                'version': bson.int64.Int64(1),
-                'haltMetricsUploading': True,
-                'permanentlyDelete': False,
-                'id': 'mock123',
-                'reportingInterval': bson.int64.Int64(1),
-                'message': 'Thanks for all the metrics',
-            })
-        elif not disable_faults and \
-            stats.metrics_calls > 3 and fault_type == FAULT_PERMANENTLY_DELETE_AFTER_3:
-            stats.fault_calls += 1
-            data = bson.BSON.encode({
-                'version': bson.int64.Int64(1),
-                'haltMetricsUploading': False,
-                'permanentlyDelete': True,
-                'id': 'mock123',
-                'reportingInterval': bson.int64.Int64(1),
-                'message': 'Thanks for all the metrics',
-            })
-        elif not disable_faults and \
-            stats.metrics_calls > 3 and \
-            stats.fault_calls < 1 and fault_type == FAULT_RESEND_REGISTRATION_ONCE:
-            stats.fault_calls += 1
-            data = bson.BSON.encode({
-                'version': bson.int64.Int64(2),
-                'haltMetricsUploading': False,
-                'permanentlyDelete': False,
-                'id': 'mock123',
-                'reportingInterval': bson.int64.Int64(1),
-                'message': 'Thanks for all the metrics',
-                'resendRegistration': True,
-            })
-        elif not disable_faults and \
-            stats.metrics_calls == 3 and fault_type == FAULT_RESEND_REGISTRATION_AT_3:
-            stats.fault_calls += 1
-            data = bson.BSON.encode({
-                'version': bson.int64.Int64(2),
-                'haltMetricsUploading': False,
-                'permanentlyDelete': False,
-                'id': 'mock123',
-                'reportingInterval': bson.int64.Int64(1),
-                'message': 'Thanks for all the metrics',
-                'resendRegistration': True,
-            })
-        else:
-            data = bson.BSON.encode({
-                'version': bson.int64.Int64(1),
-                'haltMetricsUploading': False,
-                'permanentlyDelete': False,
-                'id': decoded_doc['id'],
-                'reportingInterval': bson.int64.Int64(1),
-                'message': 'Thanks for all the metrics',
-            })
-
-        # TODO: test what if header is sent first?
-        self._send_header()
-
-        self.wfile.write(data)
-
-    def _do_stats(self):
-        self._send_header()
-
-        self.wfile.write(str(stats).encode('utf-8'))
-
-    def _do_last_register(self):
-        self._send_header()
-
-        self.wfile.write(str(last_register).encode('utf-8'))
-
-    def _do_last_metrics(self):
-        self._send_header()
-
-        self.wfile.write(str(last_metrics).encode('utf-8'))
-
-    def _do_disable_faults(self):
-        global disable_faults
-        disable_faults = True
-        self._send_header()
+        })
+
+    return _reply(data, operation="register")
+
+
+def _do_metrics(raw_input):
+    global stats
+    global last_metrics
+    stats.metrics_calls += 1
+
+    decoded_doc = bson.BSON.decode(raw_input)
+    last_metrics = dumps(decoded_doc)
+
+    if not disable_faults and \
+        stats.metrics_calls > 5 and \
+        fault_type == FAULT_HALT_METRICS_5:
+        stats.fault_calls += 1
+        data = bson.BSON.encode({
+            'version': bson.int64.Int64(1),
+            'haltMetricsUploading': True,
+            'permanentlyDelete': False,
+            'id': 'mock123',
+            'reportingInterval': bson.int64.Int64(1),
+            'message': 'Thanks for all the metrics',
+        })
+    elif not disable_faults and \
+        stats.metrics_calls > 3 and fault_type == FAULT_PERMANENTLY_DELETE_AFTER_3:
+        stats.fault_calls += 1
+        data = bson.BSON.encode({
+            'version': bson.int64.Int64(1),
+            'haltMetricsUploading': False,
+            'permanentlyDelete': True,
+            'id': 'mock123',
+            'reportingInterval': bson.int64.Int64(1),
+            'message': 'Thanks for all the metrics',
+        })
+    elif not disable_faults and \
+        stats.metrics_calls > 3 and \
+        stats.fault_calls < 1 and fault_type == FAULT_RESEND_REGISTRATION_ONCE:
+        stats.fault_calls += 1
+        data = bson.BSON.encode({
+            'version': bson.int64.Int64(2),
+            'haltMetricsUploading': False,
+            'permanentlyDelete': False,
+            'id': 'mock123',
+            'reportingInterval': bson.int64.Int64(1),
+            'message': 'Thanks for all the metrics',
+            'resendRegistration': True,
+        })
+    elif not disable_faults and \
+        stats.metrics_calls == 3 and fault_type == FAULT_RESEND_REGISTRATION_AT_3:
+        stats.fault_calls += 1
+        data = bson.BSON.encode({
+            'version': bson.int64.Int64(2),
+            'haltMetricsUploading': False,
+            'permanentlyDelete': False,
+            'id': 'mock123',
+            'reportingInterval': bson.int64.Int64(1),
+            'message': 'Thanks for all the metrics',
+            'resendRegistration': True,
+        })
+    else:
+        data = bson.BSON.encode({
+            'version': bson.int64.Int64(1),
+            'haltMetricsUploading': False,
+            'permanentlyDelete': False,
+            'id': decoded_doc['id'],
+            'reportingInterval': bson.int64.Int64(1),
+            'message': 'Thanks for all the metrics',
+        })
+
+    return _reply(data, operation="metrics")
+
+
+def _do_disable_faults():
+    global disable_faults
+    disable_faults = True
+    return _reply(b"")
+
 
-    def _do_enable_faults(self):
-        global disable_faults
-        disable_faults = False
-        self._send_header()
+def _do_enable_faults():
+    global disable_faults
+    disable_faults = False
+    return _reply(b"")
 
 
-def run(port, server_class=http.server.HTTPServer, handler_class=FreeMonHandler):
+def run(port):
     """Run web server."""
     server_address = ('', port)
 
-    http.server.HTTPServer.protocol_version = "HTTP/1.1"
-
-    httpd = server_class(server_address, handler_class)
-
-    print("Mock Web Server Listening on %s" % (str(server_address)))
-
-    httpd.serve_forever()
+    server.serve_forever(port, on_listening=lambda: print(
+        "Mock Web Server Listening on %s" % (str(server_address))))
 
 
 def main():
     """Main Method."""
     global fault_type
     global disable_faults
+    global server
 
     parser = argparse.ArgumentParser(description='MongoDB Mock Free Monitoring Endpoint.')
 
@@ -283,6 +243,8 @@ def main():
 
     parser.add_argument('--disable-faults', action='store_true', help="Disable faults on startup")
 
+    mock_http_async.add_arguments(parser)
+
     args = parser.parse_args()
     if args.verbose:
         logging.basicConfig(level=logging.DEBUG)
@@ -298,6 +260,9 @@ def main():
     if args.disable_faults:
         disable_faults = True
 
+    server = mock_http_async.MockHttpServer.from_args(handle_request, args,
+                                                      faults_enabled=lambda: not disable_faults)
+
     run(args.port)
 
 
@@ -0,0 +1,236 @@
+"""Concurrent HTTP/1.1 server for the mock HTTP endpoints used by jstests.
+
+The mocks (KMS, free monitoring) only need to turn a request into a response. This module
+serves them from a single asyncio event loop, so many clients can connect, handshake and be
+answered at the same time, and connections are kept alive between requests. With TLS, the
+server issues session tickets so reconnecting clients can resume their sessions.
+
+It can also slow down or fail operations, which are the POST requests, to drive load tests of
+the clients: every operation can be delayed by a fixed latency plus random jitter, answered with
+a 500, or have its connection dropped without a reply, at configurable rates. The time taken
+to answer each operation is recorded per operation name.
+"""
+
+import asyncio
+import http
+import http.client
+import io
+import random
+import ssl
+import time
+import traceback
+
+# Keep the latest samples per operation, so long load tests run in bounded memory.
+MAX_LATENCY_SAMPLES = 100000
+
+# Largest request body accepted, well above anything the mocked clients send.
+MAX_BODY_SIZE = 16 * 1024 * 1024
+
+
+class Request:
+    """An HTTP request, with the headers parsed as http.server would."""
+
+    def __init__(self, method, path, version, headers, body):
+        self.method = method
+        self.path = path
+        self.version = version
+        self.headers = headers
+        self.body = body
+
+
+class Response:
+    """An HTTP response. operation names the operation it answers, for latency stats."""
+
+    def __init__(self, body=b"", status=http.HTTPStatus.OK,
+                 content_type="application/octet-stream", operation=None):
+        self.body = body
+        self.status = status
+        self.content_type = content_type
+        self.operation = operation
+
+
+class LatencyStats:
+    """Per operation latencies, summarized as percentiles."""
+
+    def __init__(self):
+        self._samples = {}
+        self._counts = {}
+
+    def record(self, operation, seconds):
+        """Record that an operation took the given time."""
+        samples = self._samples.setdefault(operation, [])
+        if len(samples) >= MAX_LATENCY_SAMPLES:
+            samples[self._counts[operation] % MAX_LATENCY_SAMPLES] = seconds
+        else:
+            samples.append(seconds)
+        self._counts[operation] = self._counts.get(operation, 0) + 1
+
+    def summary(self):
+        """Return a dict of operation to its count and latency percentiles in ms."""
+        summary = {}
+        for operation, samples in self._samples.items():
+            ordered = sorted(samples)
+
+            def percentile(fraction, ordered=ordered):
+                return round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] * 1000,
+                             3)
+
+            summary[operation] = {
+                "count": self._counts[operation],
+                "p50_ms": percentile(0.5),
+                "p90_ms": percentile(0.9),
+                "p99_ms": percentile(0.99),
+                "max_ms": round(ordered[-1] * 1000, 3),
+            }
+        return summary
+
+
+def add_arguments(parser):
+    """Add the latency and fault injection options to an argparse parser."""
+    parser.add_argument('--latency-ms', type=float, default=0,
+                        help="Delay every operation by this many milliseconds")
+    parser.add_argument('--latency-jitter-ms', type=float, default=0,
+                        help="Delay every operation by up to this many more milliseconds")
+    parser.add_argument('--error-rate', type=float, default=0,
+                        help="Fraction of operations answered with a 500")
+    parser.add_argument('--drop-rate', type=float, default=0,
+                        help="Fraction of operations whose connection is closed without a reply")
+
+
+class MockHttpServer:
+    """Serves requests with handler, a function from a Request to a Response.
+
+    The handler is called on the event loop, so it needs no locking to share state with other
+    requests. faults_enabled is called before injecting an error or drop, so the mocks'
+    disable_faults control turns those off too; latency is always added.
+    """
+
+    def __init__(self, handler, latency_ms=0, latency_jitter_ms=0, error_rate=0, drop_rate=0,
+                 faults_enabled=lambda: True):
+        self.handler = handler
+        self.latency = latency_ms / 1000.0
+        self.latency_jitter = latency_jitter_ms / 1000.0
+        self.error_rate = error_rate
+        self.drop_rate = drop_rate
+        self.faults_enabled = faults_enabled
+        self.latency_stats = LatencyStats()
+
+    @classmethod
+    def from_args(cls, handler, args, faults_enabled=lambda: True):
+        """Create a server with the options added by add_arguments."""
+        return cls(handler, latency_ms=args.latency_ms, latency_jitter_ms=args.latency_jitter_ms,
+                   error_rate=args.error_rate, drop_rate=args.drop_rate,
+                   faults_enabled=faults_enabled)
+
+    async def _read_request(self, reader):
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except (asyncio.IncompleteReadError, ConnectionError, ssl.SSLError):
+            return None
+
+        request_line, _, header_block = head.partition(b"\r\n")
+        method, path, version = request_line.decode("latin-1").split(" ", 2)
+        headers = http.client.parse_headers(io.BytesIO(header_block))
+
+        if "chunked" in headers.get("Transfer-Encoding", "").lower():
+            raise ValueError("chunked request bodies are not supported")
+        length = int(headers.get("Content-Length", 0))
+        if length > MAX_BODY_SIZE:
+            raise ValueError("request body of %d bytes is too large" % length)
+        body = await reader.readexactly(length) if length else b""
+
+        return Request(method, path, version, headers, body)
+
+    @staticmethod
+    def _keep_alive(request):
+        connection = request.headers.get("Connection", "").lower()
+        if request.version == "HTTP/1.0":
+            return connection == "keep-alive"
+        return connection != "close"
+
+    async def _write_response(self, writer, response, keep_alive):
+        status = http.HTTPStatus(response.status)
+        head = [
+            "HTTP/1.1 %d %s" % (status.value, status.phrase),
+            "Content-Type: %s" % response.content_type,
+            "Content-Length: %d" % len(response.body),
+            "Connection: %s" % ("keep-alive" if keep_alive else "close"),
+        ]
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + response.body)
+        await writer.drain()
+
+    async def _handle_request(self, request):
+        is_operation = request.method == "POST"
+        if is_operation:
+            delay = self.latency + random.uniform(0, self.latency_jitter)
+            if delay:
+                await asyncio.sleep(delay)
+        if is_operation and self.faults_enabled():
+            if self.drop_rate and random.random() < self.drop_rate:
+                return None
+            if self.error_rate and random.random() < self.error_rate:
+                return Response(b"Injected error.", http.HTTPStatus.INTERNAL_SERVER_ERROR,
+                                operation="injected_error")
+
+        try:
+            return self.handler(request)
+        except Exception:  # pylint: disable=broad-except
+            traceback.print_exc()
+            return Response(b"Internal Error of some sort.", http.HTTPStatus.INTERNAL_SERVER_ERROR)
+
+    async def _serve_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except (ValueError, asyncio.LimitOverrunError) as err:
+                    await self._write_response(
+                        writer, Response(str(err).encode(), http.HTTPStatus.BAD_REQUEST), False)
+                    break
+                if request is None:
+                    break
+
+                start = time.monotonic()
+                response = await self._handle_request(request)
+                if response is None:
+                    break
+
+                keep_alive = self._keep_alive(request)
+                await self._write_response(writer, response, keep_alive)
+                if response.operation:
+                    self.latency_stats.record(response.operation, time.monotonic() - start)
+                if not keep_alive:
+                    break
+        except (ConnectionError, ssl.SSLError):
+            pass
+        finally:
+            writer.close()
+
+    async def _serve(self, port, ssl_context, on_listening):
+        server = await asyncio.start_server(self._serve_connection, port=port, ssl=ssl_context,
+                                            backlog=1024)
+        on_listening()
+        async with server:
+            await server.serve_forever()
+
+    def serve_forever(self, port, ssl_context=None, on_listening=lambda: None):
+        """Listen on port, with TLS if ssl_context is given, and serve until killed."""
+        asyncio.run(self._serve(port, ssl_context, on_listening))
+
+
+def server_ssl_context(cert_file, ca_file):
+    """Return a server TLS context for the PEM file with the server's certificate and key.
+
+    Session tickets are left enabled, so clients can resume their sessions on new connections
+    without a full handshake.
+    """
+    context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH, cafile=ca_file)
+    context.load_cert_chain(certfile=cert_file)
+    context.options &= ~ssl.OP_NO_TICKET
+    return context
+
+
+def stats_json(stats, server):
+    """Return the JSON of a mock's Stats, with the server's latency percentiles filled in."""
+    stats.latencies = server.latency_stats.summary()
+    return str(stats)
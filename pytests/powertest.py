@@ -18,6 +18,7 @@ This script will either download a MongoDB tarball or use an existing setup.
 
 import atexit
 import collections
+import concurrent.futures
 import copy
 import datetime
 import distutils.spawn  # pylint: disable=no-name-in-module
@@ -1643,41 +1644,62 @@ def mongo_reconfig_replication(mongo, host_port, repl_set):
     return 0 if ret["ok"] == 1 and primary_available else 1
 
 
-def mongo_seed_docs(mongo, db_name, coll_name, num_docs):
+def mongo_seed_docs(  # pylint: disable=too-many-locals
+        mongo, db_name, coll_name, num_docs, num_threads=4):
     """Seed a collection with random document values."""
 
-    def rand_string(max_length=1024):
-        """Return random string of random length."""
-        return ''.join(
-            random.choice(string.ascii_letters) for _ in range(random.randint(1, max_length)))
-
-    LOGGER.info("Seeding DB '%s' collection '%s' with %d documents, %d already exist", db_name,
-                coll_name, num_docs, mongo[db_name][coll_name].count())
-    random.seed()
     base_num = 100000
+    max_length = 1024
+    # Maps every byte value to a letter, so random bytes become a random string in one pass.
+    letters_table = bytes(ord(string.ascii_letters[i % len(string.ascii_letters)])
+                          for i in range(256))
+
+    def insert_batch(num_batch_docs):
+        """Insert a batch of documents with random strings of random length, return the count."""
+        rand = random.Random()
+        payload = os.urandom(num_batch_docs * max_length).translate(letters_table).decode("ascii")
+        docs = []
+        for i in range(num_batch_docs):
+            offset = i * max_length
+            docs.append({
+                "x": rand.randint(0, base_num),
+                "doc": payload[offset:offset + rand.randint(1, max_length)]
+            })
+        res = mongo[db_name][coll_name].insert_many(docs, ordered=False)
+        return len(res.inserted_ids)
+
+    num_coll_docs = mongo[db_name][coll_name].count()
+    LOGGER.info("Seeding DB '%s' collection '%s' with %d documents, %d already exist", db_name,
+                coll_name, num_docs, num_coll_docs)
     bulk_num = min(num_docs, 10000)
-    bulk_loops = num_docs // bulk_num
-    for _ in range(bulk_loops):
-        num_coll_docs = mongo[db_name][coll_name].count()
-        if num_coll_docs >= num_docs:
-            break
-        mongo[db_name][coll_name].insert_many(
-            [{"x": random.randint(0, base_num), "doc": rand_string(1024)} for _ in range(bulk_num)])
-    LOGGER.info("After seeding there are %d documents in the collection",
-                mongo[db_name][coll_name].count())
+    if num_coll_docs < num_docs:
+        # Progress is tracked from the inserted ids instead of counting the collection before
+        # every batch. The MongoClient connection pool gives each thread its own connection.
+        bulk_loops = min(num_docs // bulk_num, -(-(num_docs - num_coll_docs) // bulk_num))
+        with concurrent.futures.ThreadPoolExecutor(max_workers=num_threads) as executor:
+            num_coll_docs += sum(executor.map(insert_batch, [bulk_num] * bulk_loops))
+    LOGGER.info("After seeding there are %d documents in the collection", num_coll_docs)
     return 0
 
 
-def mongo_validate_collections(mongo):
+def mongo_validate_collections(mongo, num_threads=4):
     """Validate the mongo collections, return 0 if all are valid."""
 
+    def validate_collection(db_coll):
+        """Run a full validate on the collection, return its result."""
+        db_name, coll_name = db_coll
+        return mongo[db_name].command({"validate": coll_name, "full": True})
+
     LOGGER.info("Validating all collections")
-    invalid_colls = []
-    ebusy_colls = []
+    colls = []
     for db_name in mongo.database_names():
         for coll in mongo[db_name].list_collections(filter={"type": "collection"}):
-            coll_name = coll["name"]
-            res = mongo[db_name].command({"validate": coll_name, "full": True})
+            colls.append((db_name, coll["name"]))
+
+    invalid_colls = []
+    ebusy_colls = []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=num_threads) as executor:
+        for (db_name, coll_name), res in zip(colls, executor.map(validate_collection, colls)):
             LOGGER.info("Validating %s %s: %s", db_name, coll_name, res)
             ebusy = "EBUSY" in res["errors"] or "EBUSY" in res["warnings"]
             if not res["valid"]:
@@ -58,6 +58,8 @@ import SCons.Errors
 import SCons.Scanner
 import SCons.Util
 
+from transitive_closure import CycleError, TransitiveClosure
+
 
 class Constants:
     Libdeps = "LIBDEPS"
@@ -78,6 +80,9 @@ class dependency(object):
     def __init__(self, value, deptype):
         self.target_node = value
         self.dependency_type = deptype
+        # dependency_type may be mapped for the kind of link, this keeps the
+        # type the edge was declared with.
+        self.declared_type = deptype
 
     def __str__(self):
         return str(self.target_node)
@@ -101,6 +106,11 @@ class LibdepLinter(object):
     skip_linting = False
     print_linter_errors = False
 
+    # Path to the dead LIBDEPS edges found by dagger's libdeps analyzer, which
+    # linter_rule_no_dead_edges checks libdeps against.
+    dead_edges_report = None
+    _dead_edges = None
+
     linting_time = 0
     linting_infractions = 0
     linting_rules_run = 0
@@ -195,6 +205,22 @@ class LibdepLinter(object):
         if lint_tag in target_env.get(Constants.LibdepsTags, []):
             return True
 
+    @classmethod
+    def _get_dead_edges(cls):
+        """
+        Loads the dead edges report once, mapping each
+        (library, libdep) pair to its report entry.
+        """
+        if cls._dead_edges is None:
+            import json
+            with open(cls.dead_edges_report) as report_file:
+                report = json.load(report_file)
+            cls._dead_edges = {
+                (os.path.normpath(edge['from']), os.path.normpath(edge['to'])): edge
+                for edge in report['dead_edges']
+            }
+        return cls._dead_edges
+
     def _get_deps_dependents(self, env=None):
         """ util function to get all types of DEPS_DEPENDENTS"""
         target_env = env if env else self.env
@@ -315,6 +341,42 @@ class LibdepLinter(object):
                     {dep_type_val} must be setup as a list."""
                 ))
 
+    @linter_rule
+    def linter_rule_no_dead_edges(self, libdep):
+        """
+        LIBDEP RULE:
+            A Library shall not link a libdep which resolves none of its symbols,
+            as found by the last dagger analysis of the build, because such edges
+            needlessly add libraries to the link of every binary depending on it.
+            Edges in LIBDEPS_INTERFACE are exempt, as they are declared for the
+            library's dependents.
+        """
+        if not self.__class__.dead_edges_report:
+            return
+
+        if libdep.dependency_type == dependency.Interface:
+            return
+
+        if self._check_for_lint_tags('lint-allow-dead-libdeps'):
+            return
+
+        edge = self._get_dead_edges().get(
+            (os.path.normpath(str(self.target[0])), os.path.normpath(str(libdep))))
+        if edge is None:
+            return
+
+        target_type = self.target[0].builder.get_name(self.env)
+        lib = os.path.basename(str(libdep))
+        if edge['kind'] == 'removable':
+            advice = "It can be removed"
+        else:
+            advice = (f"Other libraries rely on it to link '{lib}', so it can be moved "
+                      f"to {Constants.LibdepsInterface}")
+        self._raise_libdep_lint_exception(textwrap.dedent(f"""\
+            {target_type} '{self.target[0]}' links '{lib}' but uses none of its symbols.
+            {advice}, saving {edge['bytes']} bytes and {edge['objects']} objects of linking."""
+        ))
+
 dependency_visibility_ignored = {
     dependency.Public: dependency.Public,
     dependency.Private: dependency.Public,
@@ -358,27 +420,17 @@ def __get_sorted_direct_libdeps(node):
     return direct_sorted
 
 
-def __libdeps_visit(n, marked, tsorted, walking):
-    if n.target_node in marked:
-        return
+def __get_public_libdeps(node):
+    return [
+        child.target_node for child in __get_sorted_direct_libdeps(node)
+        if child.dependency_type != dependency.Private
+    ]
 
-    if n.target_node in walking:
-        raise DependencyCycleError(n.target_node)
 
-    walking.add(n.target_node)
-
-    try:
-        for child in __get_sorted_direct_libdeps(n.target_node):
-            if child.dependency_type != dependency.Private:
-                __libdeps_visit(child, marked, tsorted, walking=walking)
-
-        marked.add(n.target_node)
-        tsorted.append(n.target_node)
-
-    except DependencyCycleError as e:
-        if len(e.cycle_nodes) == 1 or e.cycle_nodes[0] != e.cycle_nodes[-1]:
-            e.cycle_nodes.insert(0, n.target_node)
-        raise
+# The libraries a library's dependents link transitively through it, which
+# are the same however many dependents ask, so every closure is computed once
+# and shared. __append_direct_libdeps invalidates it whenever an edge is added.
+__libdeps_closure = TransitiveClosure(__get_public_libdeps)
 
 
 def __get_libdeps(node):
@@ -388,19 +440,21 @@ def __get_libdeps(node):
     """
 
     cache = getattr(node.attributes, Constants.LibdepsCached, None)
-    if cache is not None:
-        return cache
-
-    tsorted = []
-    marked = set()
-    walking = set()
+    if cache is not None and cache[0] == __libdeps_closure.generation:
+        return cache[1]
 
-    for child in __get_sorted_direct_libdeps(node):
-        if child.dependency_type != dependency.Interface:
-            __libdeps_visit(child, marked, tsorted, walking)
+    roots = [
+        child.target_node for child in __get_sorted_direct_libdeps(node)
+        if child.dependency_type != dependency.Interface
+    ]
+    try:
+        tsorted = __libdeps_closure.reach(roots, topological=True)
+    except CycleError as e:
+        error = DependencyCycleError(e.cycle_nodes[0])
+        error.cycle_nodes = e.cycle_nodes
+        raise error
 
-    tsorted.reverse()
-    setattr(node.attributes, Constants.LibdepsCached, tsorted)
+    setattr(node.attributes, Constants.LibdepsCached, (__libdeps_closure.generation, tsorted))
 
     return tsorted
 
@@ -505,6 +559,8 @@ def __append_direct_libdeps(node, prereq_nodes):
     if getattr(node.attributes, "libdeps_direct", None) is None:
         node.attributes.libdeps_direct = []
     node.attributes.libdeps_direct.extend(prereq_nodes)
+    node.attributes.libdeps_direct_sorted = False
+    __libdeps_closure.invalidate()
 
 
 def __get_node_with_ixes(env, node, node_builder_type):
@@ -668,11 +724,12 @@ def expand_libdeps_with_extraction_flags(source, target, env, for_signature):
     return result
 
 
-def setup_environment(env, emitting_shared=False, linting='on'):
+def setup_environment(env, emitting_shared=False, linting='on', dead_edges_report=None):
     """Set up the given build environment to do LIBDEPS tracking."""
 
     LibdepLinter.skip_linting = linting == 'off'
     LibdepLinter.print_linter_errors = linting == 'print'
+    LibdepLinter.dead_edges_report = dead_edges_report
 
     try:
         env["_LIBDEPS"]
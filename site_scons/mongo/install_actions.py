@@ -1,9 +1,21 @@
 # -*- mode: python; -*-
 
+import errno
 import os
 import shutil
 import stat
 
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# From linux/fs.h: _IOW(0x94, 9, int)
+_FICLONE = 0x40049409
+
+# The ways of installing that have been found to work, per pair of source and
+# destination filesystems, so that each file doesn't have to rediscover them.
+_link_capabilities = {}
 
 
 def _copy(src, dst):
@@ -20,9 +32,70 @@ def _hardlink(src, dst):
     except:
         _copy(src, dst)
 
+def _clone(src, dst):
+    """Make dst a copy-on-write clone of src, sharing its extents."""
+    with open(src, 'rb') as src_file, open(dst, 'wb') as dst_file:
+        fcntl.ioctl(dst_file.fileno(), _FICLONE, src_file.fileno())
+    shutil.copystat(src, dst)
+    st = os.stat(src)
+    os.chmod(dst, stat.S_IMODE(st[stat.ST_MODE]) | stat.S_IWRITE)
+
+def _is_unchanged(src_st, dst):
+    """Whether dst is already src, as a hard link or as an earlier copy or clone of it."""
+    try:
+        dst_st = os.stat(dst)
+    except OSError:
+        return False
+    if (dst_st.st_dev, dst_st.st_ino) == (src_st.st_dev, src_st.st_ino):
+        return True
+    return dst_st.st_size == src_st.st_size and dst_st.st_mtime_ns == src_st.st_mtime_ns
+
+def _reflink(src, dst):
+    """Install src as a reflink where the filesystem supports it, else as a
+    hard link, else as a copy. Destinations which already match are left alone."""
+    src_st = os.stat(src)
+    if _is_unchanged(src_st, dst):
+        return
+
+    try:
+        os.remove(dst)
+    except OSError:
+        pass
+
+    dst_dir_st = os.stat(os.path.dirname(os.path.abspath(dst)))
+    key = (src_st.st_dev, dst_dir_st.st_dev)
+    capabilities = _link_capabilities.setdefault(key, {
+        'reflink': fcntl is not None,
+        'hardlink': src_st.st_dev == dst_dir_st.st_dev,
+    })
+
+    if capabilities['reflink']:
+        try:
+            _clone(src, dst)
+            return
+        except OSError as e:
+            if e.errno not in (errno.EOPNOTSUPP, errno.ENOTTY, errno.EXDEV, errno.EINVAL,
+                               errno.ENOSYS):
+                raise
+            capabilities['reflink'] = False
+            os.remove(dst)
+
+    if capabilities['hardlink']:
+        try:
+            os.link(src, dst)
+            return
+        except OSError as e:
+            if e.errno not in (errno.EPERM, errno.EXDEV, errno.EMLINK, errno.ENOTSUP):
+                raise
+            if e.errno != errno.EMLINK:
+                capabilities['hardlink'] = False
+
+    _copy(src, dst)
+
 available_actions = {
     "copy" : _copy,
     "hardlink" : _hardlink,
+    "reflink" : _reflink,
     "symlink" : _symlink,
 }
 
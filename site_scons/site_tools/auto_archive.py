@@ -100,40 +100,15 @@ def collect_transitive_files(env, entry):
     """
     Collect all installed and transitively installed files for entry.
     """
-    cache = set()
-    files = []
-    stack = [entry]
-
     # Find all the files directly contained in the component DAG for entry and
-    # it's dependencies.
-    while stack:
-        s = stack.pop()
-        if s in cache:
-            continue
-        cache.add(s)
-
-        stack.extend(s.dependencies)
-        files.extend(s.files)
-
-    cache.clear()
-    files, stack = stack, files
-
-    # Now we will call the scanner to find the transtive files of any files that
-    # we found from the component DAG.
-
-    while stack:
-        s = stack.pop()
-        if s in cache:
-            continue
-        cache.add(s)
-
-        files.append(s)
-        # scan_for_transitive_install is memoized so it's safe to call it in
-        # this loop. If it hasn't already run for a file we need to run it
-        # anyway.
-        stack.extend(env.GetTransitivelyInstalledFiles(s))
-
-    return sorted(files)
+    # it's dependencies, then all the files those transitively install. Both
+    # closures are memoized by auto_install_binaries, so archives of
+    # overlapping components don't walk the same parts of the graph again.
+    files = set()
+    for s in env.GetTransitiveRoleEntries(entry):
+        files.update(s.files)
+
+    return sorted(env.GetTransitivelyInstalledClosure(files))
 
 
 def auto_archive_gen(first_env, make_archive_script, pkg_fmt):
@@ -26,6 +26,7 @@ from collections import defaultdict, namedtuple
 
 import SCons
 from SCons.Tool import install
+from transitive_closure import CycleError, TransitiveClosure
 
 ALIAS_MAP = "AIB_ALIAS_MAP"
 BASE_COMPONENT = "AIB_BASE_COMPONENT"
@@ -38,6 +39,8 @@ META_COMPONENT = "AIB_META_COMPONENT"
 META_ROLE = "AIB_META_ROLE"
 ROLE = "AIB_ROLE"
 ROLE_DECLARATIONS = "AIB_ROLE_DECLARATIONS"
+ROLE_CLOSURE = "AIB_ROLE_CLOSURE"
+INSTALLED_FILES_CLOSURE = "AIB_INSTALLED_FILES_CLOSURE"
 SUFFIX_MAP = "AIB_SUFFIX_MAP"
 TASKS = "AIB_TASKS"
 
@@ -173,6 +176,13 @@ def generate_alias_name(env, component, role, task):
     )
 
 
+def add_role_dependency(env, entry, dependency):
+    """Make entry depend on the component/role entry dependency."""
+    if dependency not in entry.dependencies:
+        entry.dependencies.add(dependency)
+        env[ROLE_CLOSURE].invalidate()
+
+
 def get_alias_map_entry(env, component, role):
     c_entry = env[ALIAS_MAP][component]
 
@@ -185,17 +195,17 @@ def get_alias_map_entry(env, component, role):
         declaration = env[ROLE_DECLARATIONS].get(role)
         for dep in declaration.dependencies:
             dep_entry = get_alias_map_entry(env, component, dep)
-            r_entry.dependencies.add(dep_entry)
+            add_role_dependency(env, r_entry, dep_entry)
 
         meta_component = env.get(META_COMPONENT)
         if meta_component and component != meta_component:
             meta_c_entry = get_alias_map_entry(env, meta_component, role)
-            meta_c_entry.dependencies.add(r_entry)
+            add_role_dependency(env, meta_c_entry, r_entry)
 
         base_component = env.get(BASE_COMPONENT)
         if base_component and component != base_component:
             base_c_entry = get_alias_map_entry(env, base_component, role)
-            r_entry.dependencies.add(base_c_entry)
+            add_role_dependency(env, r_entry, base_c_entry)
 
         meta_role = env.get(META_ROLE)
         if (
@@ -206,7 +216,7 @@ def get_alias_map_entry(env, component, role):
         ):
             meta_r_entry = get_alias_map_entry(env, component, meta_role)
             meta_c_r_entry = get_alias_map_entry(env, meta_component, meta_role)
-            meta_c_r_entry.dependencies.add(meta_r_entry)
+            add_role_dependency(env, meta_c_r_entry, meta_r_entry)
 
         return r_entry
 
@@ -298,7 +308,7 @@ def scan_for_transitive_install(node, env, _path):
                     child_entry.files.discard(f)
                 entry.files.update(auto_installed_files)
             elif component != child_component:
-                entry.dependencies.add(child_entry)
+                add_role_dependency(env, entry, child_entry)
 
             results.update(auto_installed_files)
 
@@ -313,6 +323,29 @@ def scan_for_transitive_install_pseudobuilder(env, node):
     return scan_for_transitive_install(node, env, None)
 
 
+def reach_allowing_cycles(closure, roots):
+    """Return the roots and every node reachable from them in closure.
+
+    AIB_COMPONENTS_EXTRA and transitively installed files can tie components
+    into a cycle, which the memoized closure cannot handle. Those graphs are
+    walked without memoizing instead.
+    """
+    try:
+        return closure.reach(roots)
+    except CycleError:
+        return closure.walk(roots)
+
+
+def get_transitive_role_entries(env, entry):
+    """Return entry and every component/role entry it transitively depends on."""
+    return reach_allowing_cycles(env[ROLE_CLOSURE], [entry])
+
+
+def get_transitively_installed_closure(env, files):
+    """Return files and every file they transitively install."""
+    return reach_allowing_cycles(env[INSTALLED_FILES_CLOSURE], files)
+
+
 def tag_components(env, target, **kwargs):
     """Create component and role dependency objects"""
     target = env.Flatten([target])
@@ -336,6 +369,9 @@ def tag_components(env, target, **kwargs):
         setattr(t.attributes, COMPONENT, component)
         setattr(t.attributes, ROLE, role)
 
+    # Tagging a file changes what it transitively installs.
+    env[INSTALLED_FILES_CLOSURE].invalidate()
+
     entry = get_alias_map_entry(env, component, role)
 
     # We cannot wire back dependencies to any combination of meta role, meta
@@ -349,7 +385,7 @@ def tag_components(env, target, **kwargs):
     ):
         for component in kwargs.get(REVERSE_COMPONENT_DEPENDENCIES, []):
             component_dep = get_alias_map_entry(env, component, role)
-            component_dep.dependencies.add(entry)
+            add_role_dependency(env, component_dep, entry)
 
     return entry
 
@@ -582,6 +618,14 @@ def generate(env):  # pylint: disable=too-many-statements
     env[SUFFIX_MAP] = {}
     env[ALIAS_MAP] = defaultdict(dict)
 
+    # Closures over the component/role DAG and over the files each installed
+    # file transitively installs. Every archive walks large, overlapping parts
+    # of both, so they are memoized here for all of them.
+    env[ROLE_CLOSURE] = TransitiveClosure(lambda entry: entry.dependencies)
+    env[INSTALLED_FILES_CLOSURE] = TransitiveClosure(
+        lambda node: scan_for_transitive_install(node, env, None)
+    )
+
     env[TASKS] = {
         "install": auto_install_task,
     }
@@ -589,6 +633,10 @@ def generate(env):  # pylint: disable=too-many-statements
     env.AddMethod(
         scan_for_transitive_install_pseudobuilder, "GetTransitivelyInstalledFiles"
     )
+    env.AddMethod(get_transitive_role_entries, "GetTransitiveRoleEntries")
+    env.AddMethod(
+        get_transitively_installed_closure, "GetTransitivelyInstalledClosure"
+    )
     env.AddMethod(get_role_declaration, "GetRoleDeclaration")
     env.AddMethod(get_auto_installed_files, "GetAutoInstalledFiles")
     env.AddMethod(tag_components, "TagComponents")
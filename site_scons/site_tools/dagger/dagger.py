@@ -56,14 +56,22 @@ To generate the graph, run the command "SCons dagger"
 #     See the License for the specific language governing permissions and
 #     limitations under the License.
 
+import concurrent.futures
+import hashlib
 import logging
+import os
+import struct
 import subprocess
 import sys
 
 import SCons
 
+from libdeps import dependency
+
+from . import elf
 from . import graph
 from . import graph_consts
+from . import libdeps_analyzer
 
 
 LIB_DB = []  # Stores every SCons library nodes
@@ -71,6 +79,9 @@ OBJ_DB = []  # Stores every SCons object file node
 EXE_DB = (
     {}
 )  # Stores every SCons executable node, with the object files that build into it {Executable: [object files]}
+INTERFACE_EDGES = set()  # Stores the (library, dependency) pairs declared in LIBDEPS_INTERFACE
+
+DEMANGLE_BATCH_SIZE = 10000  # Number of symbols demangled by each c++filt process
 
 
 def list_process(items):
@@ -94,11 +105,10 @@ def list_process(items):
     return r
 
 
-# TODO: Use the python library to read elf files,
-# so we know the file exists at this point
 def get_symbol_worker(object_file, task):
     """From WIL, launches a worker subprocess which collects either symbols defined
-    or symbols required by an object file"""
+    or symbols required by an object file. Only used where object files are not
+    ELF files; see read_object_symbols."""
 
     platform = "linux" if sys.platform.startswith("linux") else "darwin"
 
@@ -122,6 +132,121 @@ def get_symbol_worker(object_file, task):
         return list_process([use.strip() for use in uses.split("\n") if use != ""])
 
 
+_KNOWN_DIGESTS = frozenset()
+
+
+def _set_known_digests(digests):
+    global _KNOWN_DIGESTS
+    _KNOWN_DIGESTS = digests
+
+
+def read_object_symbols(object_file):
+    """Runs in a worker process. Returns the sha256 of an object file's contents
+    and, unless the digest is already known, a tuple of the (used, defined)
+    mangled symbol names it reads from the file's ELF symbol table."""
+
+    with open(object_file, "rb") as f:
+        data = f.read()
+    digest = hashlib.sha256(data).hexdigest()
+
+    if digest in _KNOWN_DIGESTS:
+        return digest, None
+
+    try:
+        used, defined = elf.read_symbols(data)
+    except (ValueError, IndexError, struct.error) as e:
+        logging.warning("Could not read symbols from %s: %s", object_file, e)
+        return digest, ([], [])
+    return digest, (list_process(used), list_process(defined))
+
+
+def demangle(symbols):
+    """Returns a dict of each of the given C++ symbols to its demangled name.
+    The symbols are demangled in batches, in parallel, rather than with a
+    c++filt process per object file."""
+
+    symbols = list(symbols)
+    batches = [
+        symbols[i : i + DEMANGLE_BATCH_SIZE]
+        for i in range(0, len(symbols), DEMANGLE_BATCH_SIZE)
+    ]
+
+    def demangle_batch(batch):
+        p = subprocess.run(
+            ["c++filt"],
+            input="\n".join(batch) + "\n",
+            stdout=subprocess.PIPE,
+            universal_newlines=True,
+            check=True,
+        )
+        return p.stdout.split("\n")[: len(batch)]
+
+    demangled = {}
+    with concurrent.futures.ThreadPoolExecutor() as pool:
+        for batch, names in zip(batches, pool.map(demangle_batch, batches)):
+            demangled.update(zip(batch, names))
+    return demangled
+
+
+def get_object_symbols(object_files, symbol_cache):
+    """Returns a dict of each object file to its (used, defined) lists of
+    demangled symbols, along with the cache for the next run. symbol_cache maps
+    the sha256 of an object file's contents to its symbols, so only object files
+    which have changed since the cache was written are read."""
+
+    if not sys.platform.startswith("linux"):
+        return (
+            {
+                object_file: (
+                    get_symbol_worker(object_file, task="used"),
+                    get_symbol_worker(object_file, task="defined"),
+                )
+                for object_file in object_files
+            },
+            {},
+        )
+
+    with concurrent.futures.ProcessPoolExecutor(
+        initializer=_set_known_digests, initargs=(frozenset(symbol_cache),)
+    ) as pool:
+        results = list(pool.map(read_object_symbols, object_files, chunksize=64))
+
+    mangled = set()
+    for _, symbols in results:
+        if symbols is not None:
+            mangled.update(symbols[0])
+            mangled.update(symbols[1])
+    demangled = demangle(sorted(mangled))
+
+    object_symbols = {}
+    new_cache = {}
+    for object_file, (digest, symbols) in zip(object_files, results):
+        if symbols is None:
+            symbols = symbol_cache[digest]
+        else:
+            symbols = tuple([demangled[s] for s in names] for names in symbols)
+        object_symbols[object_file] = symbols
+        new_cache[digest] = symbols
+
+    logging.info(
+        "Read symbols from %d of %d object files",
+        sum(symbols is not None for _, symbols in results),
+        len(results),
+    )
+    return object_symbols, new_cache
+
+
+def load_symbol_cache(filename):
+    """Returns the symbol cache stored with the binary graph from a previous run"""
+    if not os.path.exists(filename):
+        return {}
+    try:
+        return graph.read_pickle(filename)["metadata"]["symbols"]
+    except Exception as e:
+        logging.warning("Ignoring unreadable dependency graph %s: %s", filename, e)
+        return {}
+
+
 def emit_obj_db_entry(target, source, env):
     """Emitter for object files. We add each object file
     built into a global variable for later use"""
@@ -180,6 +305,8 @@ def __generate_lib_rels(lib, g):
 
         lib_dep = g.find_node(str(child), graph_consts.NODE_LIB)
         g.add_edge(graph_consts.LIB_LIB, lib_node.id, lib_dep.id)
+        if getattr(child, "declared_type", None) == dependency.Interface:
+            INTERFACE_EDGES.add((lib_node.id, lib_dep.id))
 
     object_files = lib.all_children()
     for obj in object_files:
@@ -189,16 +316,13 @@ def __generate_lib_rels(lib, g):
         lib_node.add_defined_file(obj_node.id)
 
 
-def __generate_sym_rels(obj, g):
+def __generate_sym_rels(obj, g, symbols_used, symbols_defined):
     """Generate all to symbol dependency and definition location information
     """
 
     object_path = str(obj)
     file_node = g.find_node(object_path, graph_consts.NODE_FILE)
 
-    symbols_used = get_symbol_worker(object_path, task="used")
-    symbols_defined = get_symbol_worker(object_path, task="defined")
-
     for symbol in symbols_defined:
         symbol_node = g.find_node(symbol, graph_consts.NODE_SYM)
         symbol_node.add_library(file_node.library)
@@ -254,15 +378,29 @@ def write_obj_db(target, source, env):
     """The bulk of the tool. This method takes all the objects and libraries
     which we have stored in the global LIB_DB and OBJ_DB variables and
     creates the build dependency graph. The graph is then exported to a JSON
-    file for use with the separate query tool/visualizer
+    file for use with the separate query tool/visualizer, and to a binary file
+    next to it which also caches the symbols of each object file for the next run.
+    The LIBDEPS edges which resolve no symbols are written to a third file, for
+    use with --libdeps-dead-edges
     """
     g = graph.Graph()
 
+    # target is given as a list of target SCons nodes - this builder is only responsible for
+    # building the json target, so this list is of length 1. export_to_json
+    # expects a filename, whereas target is a list of SCons nodes so we cast target[0] to str
+    json_path = str(target[0])
+    pickle_path = os.path.splitext(json_path)[0] + ".pickle"
+    dead_edges_path = os.path.splitext(json_path)[0] + ".dead_edges.json"
+
+    object_symbols, symbol_cache = get_object_symbols(
+        [str(obj) for obj in OBJ_DB], load_symbol_cache(pickle_path)
+    )
+
     for lib in LIB_DB:
         __generate_lib_rels(lib, g)
 
     for obj in OBJ_DB:
-        __generate_sym_rels(obj, g)
+        __generate_sym_rels(obj, g, *object_symbols[str(obj)])
 
     for obj in OBJ_DB:
         __generate_file_rels(obj, g)
@@ -270,8 +408,12 @@ def write_obj_db(target, source, env):
     for exe in list(EXE_DB.keys()):
         __generate_exe_rels(exe, g)
 
-    # target is given as a list of target SCons nodes - this builder is only responsible for
-    # building the json target, so this list is of length 1. export_to_json
-    # expects a filename, whereas target is a list of SCons nodes so we cast target[0] to str
+    g.export_to_json(json_path)
+    g.export_to_pickle(pickle_path, metadata={"symbols": symbol_cache})
 
-    g.export_to_json(str(target[0]))
+    dead_edges = libdeps_analyzer.export_dead_edges(g, dead_edges_path, INTERFACE_EDGES)
+    logging.info(
+        "Found %d LIBDEPS edges which resolve no symbols, see %s",
+        len(dead_edges),
+        dead_edges_path,
+    )
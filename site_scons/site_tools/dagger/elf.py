@@ -0,0 +1,100 @@
+# Copyright 2020 MongoDB Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+#
+
+"""A minimal reader for the symbol table of ELF files. It lists the same symbols
+as `nm` does by default, without starting a process per file.
+"""
+
+import struct
+
+ELF_MAGIC = b"\x7fELF"
+
+SHT_SYMTAB = 2
+SHN_UNDEF = 0
+STT_SECTION = 3
+STT_FILE = 4
+
+
+def read_symbols(data):
+    """Returns a tuple of (used, defined) lists of the raw symbol names in the
+    ELF file whose contents are data. Used symbols are the undefined ones.
+    """
+    if data[:4] != ELF_MAGIC:
+        raise ValueError("not an ELF file")
+
+    is_64 = data[4] == 2
+    endian = "<" if data[5] == 1 else ">"
+    if is_64:
+        header_format = endian + "HHIQQQIHHHHHH"
+        section_format = endian + "IIQQQQIIQQ"
+        symbol_format = endian + "IBBHQQ"
+    else:
+        header_format = endian + "HHIIIIIHHHHHH"
+        section_format = endian + "IIIIIIIIII"
+        symbol_format = endian + "IIIBBH"
+
+    header = struct.unpack_from(header_format, data, 16)
+    section_offset, section_size, section_count = header[5], header[10], header[11]
+    if section_offset == 0:
+        return [], []
+
+    def section(index):
+        return struct.unpack_from(
+            section_format, data, section_offset + index * section_size
+        )
+
+    # Files with too many sections for e_shnum, which -ffunction-sections can
+    # produce, store the real count in the size of the first section header.
+    if section_count == 0:
+        section_count = section(0)[5]
+
+    used = []
+    defined = []
+    symbol_size = struct.calcsize(symbol_format)
+    for index in range(section_count):
+        shdr = section(index)
+        sh_type, sh_offset, sh_size, sh_link = shdr[1], shdr[4], shdr[5], shdr[6]
+        if sh_type != SHT_SYMTAB:
+            continue
+
+        strtab = section(sh_link)
+        strings = data[strtab[4] : strtab[4] + strtab[5]]
+        table = data[sh_offset : sh_offset + sh_size - sh_size % symbol_size]
+
+        # The first entry of the table is always the null symbol.
+        for entry in struct.iter_unpack(symbol_format, table[symbol_size:]):
+            if is_64:
+                st_name, st_info, _, st_shndx = entry[:4]
+            else:
+                st_name, st_info, st_shndx = entry[0], entry[3], entry[5]
+            if st_name == 0 or st_info & 0xF in (STT_SECTION, STT_FILE):
+                continue
+
+            name = strings[st_name : strings.index(b"\0", st_name)].decode(
+                errors="replace"
+            )
+            if st_shndx == SHN_UNDEF:
+                used.append(name)
+            else:
+                defined.append(name)
+
+    return used, defined
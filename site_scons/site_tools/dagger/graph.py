@@ -25,6 +25,7 @@ import logging
 import abc
 import json
 import copy
+import pickle
 
 from . import graph_consts
 
@@ -36,12 +37,22 @@ class Graph(object):
     imported from a pickle or JSON file.
     """
 
+    # Version of the layout written by export_to_pickle.
+    PICKLE_VERSION = 1
+
     def __init__(self, input=None):
         """
-        A graph can be initialized with a .json file, graph object, or with no args
+        A graph can be initialized with a .json or .pickle file, graph object, or with no args
         """
         if isinstance(input, str):
-            if input.endswith(".json"):
+            if input.endswith(".pickle"):
+                data = read_pickle(input)
+                self._nodes = {
+                    id: node_factory(id, int(node_dict["type"]), dict_source=node_dict)
+                    for id, node_dict in data["nodes"]
+                }
+                self._edges = data["edges"]
+            elif input.endswith(".json"):
                 with open(input, "r") as f:
                     data = json.load(f, encoding="ascii")
                 nodes = {}
@@ -108,6 +119,11 @@ class Graph(object):
     def get_node(self, id):
         return self._nodes.get(id)
 
+    def get_node_ids(self, type):
+        """returns the ids of all nodes of the given type, without
+        copying the nodes themselves"""
+        return [id for id, node in self._nodes.items() if node.type == type]
+
     def find_node(self, id, type):
         """returns the node if it exists, otherwise, generates
         it"""
@@ -192,6 +208,21 @@ class Graph(object):
         with open(filename, "w", encoding="ascii") as outfile:
             json.dump(data, outfile, indent=4)
 
+    def export_to_pickle(self, filename="graph.pickle", metadata=None):
+        """Writes the graph in a compact binary form which, unlike the JSON form,
+        keeps the edge sets as sets. metadata is stored alongside the graph and
+        can be read back with read_pickle().
+        """
+        data = {
+            "version": self.PICKLE_VERSION,
+            "nodes": [(id, vars(node)) for id, node in self._nodes.items()],
+            "edges": self._edges,
+            "metadata": metadata,
+        }
+
+        with open(filename, "wb") as outfile:
+            pickle.dump(data, outfile, protocol=pickle.HIGHEST_PROTOCOL)
+
     def __str__(self):
         return ("<Number of Nodes : {0}, Number of Edges : {1}, " "Hash: {2}>").format(
             len(list(self._nodes.keys())),
@@ -631,3 +662,13 @@ def node_factory(id, nodetype, dict_source=None):
         return types[nodetype](id, id, input=dict_source)
     else:
         return types[nodetype](id, id)
+
+
+def read_pickle(filename):
+    """Returns the contents of a file written by Graph.export_to_pickle"""
+    with open(filename, "rb") as f:
+        data = pickle.load(f)
+
+    if data.get("version") != Graph.PICKLE_VERSION:
+        raise ValueError("unsupported graph pickle version: %s" % data.get("version"))
+    return data
@@ -26,6 +26,8 @@ from JSON
 """
 
 import json
+import os
+import tempfile
 import unittest
 from . import graph
 from . import graph_consts
@@ -264,6 +266,22 @@ class TestGraphMethods(unittest.TestCase, CustomAssertions):
 
         self.assertEqual(graph_fromJSON.edges, correct_graph.edges)
 
+    def test_pickle_round_trip(self):
+        correct_graph = generate_graph()
+        with tempfile.TemporaryDirectory() as temp_dir:
+            filename = os.path.join(temp_dir, "graph.pickle")
+            correct_graph.export_to_pickle(filename, metadata={"symbols": {}})
+            graph_fromPickle = graph.Graph(filename)
+            metadata = graph.read_pickle(filename)["metadata"]
+
+        for id in list(correct_graph.nodes.keys()):
+            self.assertNodeEquals(
+                graph_fromPickle.get_node(id), correct_graph.get_node(id)
+            )
+
+        self.assertEqual(graph_fromPickle.edges, correct_graph.edges)
+        self.assertEqual(metadata, {"symbols": {}})
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,187 @@
+# Copyright 2020 MongoDB Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+#
+
+"""Finds the LIBDEPS edges of a dagger graph which resolve no symbols for the
+library declaring them.
+
+An edge from library A to library B is dead if no object file in A uses a symbol
+defined in B. A dead edge is either:
+
+    removable - no binary linking A needs anything from the libraries it would
+                stop linking if the edge were removed.
+    demotable - something else linked into a binary relies on the edge to pull
+                in B, so the edge belongs in A's LIBDEPS_INTERFACE (or in the
+                LIBDEPS of whatever really uses B) rather than in A's own link.
+
+Edges declared in LIBDEPS_INTERFACE are never reported: they exist to pull B
+into the link of A's dependents, not for A itself.
+
+Each dead edge is ranked by its link-time impact: the bytes and object files of
+the libraries that removing it would drop from the link of each binary (or, for
+a demotable edge, from A's own link).
+"""
+
+import json
+import os
+
+from . import graph_consts
+
+REMOVABLE = "removable"
+DEMOTABLE = "demotable"
+
+
+class LibdepsAnalyzer(object):
+    """Joins the symbol relationships of a dagger graph with its declared
+    library dependencies.
+    """
+
+    def __init__(self, g, lib_size=os.path.getsize, interface_edges=()):
+        self._graph = g
+        self._lib_size = lib_size
+        self._sizes = {}
+        self._interface_edges = set(interface_edges)
+
+        self._libdeps = g.get_edge_type(graph_consts.LIB_LIB)
+        self._libs = g.get_node_ids(graph_consts.NODE_LIB)
+        self._exes = g.get_node_ids(graph_consts.NODE_EXE)
+
+        file_syms = g.get_edge_type(graph_consts.FIL_SYM)
+        self._used = {}
+        for lib in self._libs:
+            used = set()
+            for file in g.get_node(lib).defined_files:
+                used.update(file_syms.get(file, ()))
+            self._used[lib] = used
+        for exe in self._exes:
+            used = set()
+            for file in g.get_node(exe).contained_files:
+                used.update(file_syms.get(file, ()))
+            self._used[exe] = used
+
+        # The libraries an executable is linked with are recorded as EXE_LIB
+        # edges to every library on its link line; the ones which no other
+        # library on it depends on are its direct dependencies.
+        exe_libs = g.get_edge_type(graph_consts.EXE_LIB)
+        self._exe_roots = {}
+        self._exe_closures = {}
+        for exe in self._exes:
+            libs = exe_libs.get(exe, set())
+            reached = set()
+            for lib in libs:
+                reached.update(self.closure([lib]) - {lib})
+            self._exe_roots[exe] = libs - reached
+            self._exe_closures[exe] = self.closure(self._exe_roots[exe])
+
+    def closure(self, roots, skip_edge=None):
+        """Returns the libraries reachable from roots, including the roots,
+        optionally as though skip_edge were not declared"""
+        seen = set(roots)
+        stack = list(roots)
+        while stack:
+            lib = stack.pop()
+            for dep in self._libdeps.get(lib, ()):
+                if (lib, dep) == skip_edge or dep in seen:
+                    continue
+                seen.add(dep)
+                stack.append(dep)
+        return seen
+
+    def _defined(self, lib):
+        node = self._graph.get_node(lib)
+        return node.defined_symbols if node is not None else set()
+
+    def _size(self, lib):
+        if lib not in self._sizes:
+            try:
+                self._sizes[lib] = self._lib_size(lib)
+            except OSError:
+                self._sizes[lib] = 0
+        return self._sizes[lib]
+
+    def _objects(self, lib):
+        return len(self._graph.get_node(lib).defined_files)
+
+    def _uses_any(self, users, libs):
+        defined = set()
+        for lib in libs:
+            defined.update(self._defined(lib))
+        return any(self._used.get(user, set()) & defined for user in users)
+
+    def analyze_edge(self, lib, dep):
+        """Returns the report entry for the edge lib -> dep, or None if lib uses
+        a symbol defined in dep"""
+        if self._used[lib] & self._defined(dep):
+            return None
+
+        edge = (lib, dep)
+        kind = REMOVABLE
+        binaries = []
+        dropped_total = []
+        for exe in self._exes:
+            if lib not in self._exe_closures[exe]:
+                continue
+            remaining = self.closure(self._exe_roots[exe], skip_edge=edge)
+            dropped = self._exe_closures[exe] - remaining
+            if not dropped:
+                continue
+            if self._uses_any(remaining | {exe}, dropped):
+                kind = DEMOTABLE
+                break
+            binaries.append(exe)
+            dropped_total.extend(dropped)
+
+        if kind == DEMOTABLE:
+            binaries = []
+            dropped_total = self.closure([lib]) - self.closure([lib], skip_edge=edge)
+
+        return {
+            "from": lib,
+            "to": dep,
+            "kind": kind,
+            "binaries": sorted(binaries),
+            "bytes": sum(self._size(dropped) for dropped in dropped_total),
+            "objects": sum(self._objects(dropped) for dropped in dropped_total),
+        }
+
+    def dead_edges(self):
+        """Returns the report entries for every dead edge, most expensive first"""
+        report = []
+        for lib in self._libs:
+            for dep in sorted(self._libdeps.get(lib, ())):
+                if self._graph.get_node(dep) is None or (lib, dep) in self._interface_edges:
+                    continue
+                entry = self.analyze_edge(lib, dep)
+                if entry is not None:
+                    report.append(entry)
+
+        report.sort(key=lambda e: (-e["bytes"], -e["objects"], e["from"], e["to"]))
+        return report
+
+
+def export_dead_edges(g, filename, interface_edges=()):
+    """Writes the dead edges of the graph to a JSON report, which LibdepLinter
+    reads when given --libdeps-dead-edges. interface_edges are the
+    (library, dependency) pairs declared in LIBDEPS_INTERFACE."""
+    report = LibdepsAnalyzer(g, interface_edges=interface_edges).dead_edges()
+    with open(filename, "w") as outfile:
+        json.dump({"dead_edges": report}, outfile, indent=4)
+    return report
@@ -0,0 +1,143 @@
+# Copyright 2020 MongoDB Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+#
+
+"""Tests for the analyzer of dead LIBDEPS edges in a dagger graph"""
+
+import unittest
+from . import graph
+from . import graph_consts
+from . import libdeps_analyzer
+
+
+def generate_graph(with_libc=True):
+    """Generates a graph in which the executable 'prog' links 'liba', which
+    declares edges to 'libb', 'libc' and 'libd'. liba only uses a symbol from
+    libb, and prog itself uses a symbol from libd, which libc also depends on.
+    Without libc, prog only links libd through liba's edge to it.
+    """
+
+    g = graph.Graph()
+
+    def add_lib(name, defined=(), used=()):
+        lib = g.find_node(name, graph_consts.NODE_LIB)
+        obj = g.find_node(name + ".o", graph_consts.NODE_FILE)
+        obj.library = lib.id
+        lib.add_defined_file(obj.id)
+        for symbol in defined:
+            sym = g.find_node(symbol, graph_consts.NODE_SYM)
+            lib.add_defined_symbol(sym.id)
+        for symbol in used:
+            sym = g.find_node(symbol, graph_consts.NODE_SYM)
+            g.add_edge(graph_consts.FIL_SYM, obj.id, sym.id)
+        return lib
+
+    add_lib("liba", defined=["a"], used=["b"])
+    add_lib("libb", defined=["b"])
+    add_lib("libc", defined=["c"], used=["d"])
+    add_lib("libd", defined=["d"])
+    add_lib("libe", defined=["e"])
+
+    g.add_edge(graph_consts.LIB_LIB, "liba", "libb")
+    g.add_edge(graph_consts.LIB_LIB, "liba", "libd")
+    g.add_edge(graph_consts.LIB_LIB, "libc", "libd")
+    g.add_edge(graph_consts.LIB_LIB, "libc", "libe")
+    if with_libc:
+        g.add_edge(graph_consts.LIB_LIB, "liba", "libc")
+
+    prog = g.find_node("prog", graph_consts.NODE_EXE)
+    prog_obj = g.find_node("prog.o", graph_consts.NODE_FILE)
+    prog.contained_files = {prog_obj.id}
+    g.add_edge(graph_consts.FIL_SYM, prog_obj.id, "a")
+    g.add_edge(graph_consts.FIL_SYM, prog_obj.id, "d")
+    linked = ["liba", "libb", "libc", "libd", "libe"] if with_libc else ["liba", "libb", "libd"]
+    for lib in linked:
+        g.add_edge(graph_consts.EXE_LIB, prog.id, lib)
+
+    return g
+
+
+SIZES = {"liba": 1, "libb": 10, "libc": 100, "libd": 1000, "libe": 10000}
+
+
+class TestLibdepsAnalyzer(unittest.TestCase):
+    def setUp(self):
+        self.analyzer = libdeps_analyzer.LibdepsAnalyzer(
+            generate_graph(), lib_size=SIZES.__getitem__
+        )
+
+    def test_closure(self):
+        self.assertEqual(
+            self.analyzer.closure(["liba"]),
+            {"liba", "libb", "libc", "libd", "libe"},
+        )
+        self.assertEqual(
+            self.analyzer.closure(["liba"], skip_edge=("liba", "libc")),
+            {"liba", "libb", "libd"},
+        )
+
+    def test_used_edge_is_not_dead(self):
+        self.assertIsNone(self.analyzer.analyze_edge("liba", "libb"))
+        self.assertIsNone(self.analyzer.analyze_edge("libc", "libd"))
+
+    def test_removable_edge(self):
+        entry = self.analyzer.analyze_edge("liba", "libc")
+        self.assertEqual(entry["kind"], libdeps_analyzer.REMOVABLE)
+        self.assertEqual(entry["binaries"], ["prog"])
+        # libd is still linked through liba's own edge to it.
+        self.assertEqual(entry["bytes"], 10100)
+        self.assertEqual(entry["objects"], 2)
+
+    def test_redundant_edge_is_removable(self):
+        entry = self.analyzer.analyze_edge("liba", "libd")
+        self.assertEqual(entry["kind"], libdeps_analyzer.REMOVABLE)
+        self.assertEqual(entry["binaries"], [])
+        self.assertEqual(entry["bytes"], 0)
+
+    def test_demotable_edge(self):
+        analyzer = libdeps_analyzer.LibdepsAnalyzer(
+            generate_graph(with_libc=False), lib_size=SIZES.__getitem__
+        )
+        entry = analyzer.analyze_edge("liba", "libd")
+        self.assertEqual(entry["kind"], libdeps_analyzer.DEMOTABLE)
+        self.assertEqual(entry["binaries"], [])
+        self.assertEqual(entry["bytes"], 1000)
+
+    def test_dead_edges_are_ranked_by_bytes(self):
+        report = self.analyzer.dead_edges()
+        self.assertEqual(
+            [(e["from"], e["to"]) for e in report],
+            [("liba", "libc"), ("libc", "libe"), ("liba", "libd")],
+        )
+
+    def test_interface_edge_is_not_reported(self):
+        analyzer = libdeps_analyzer.LibdepsAnalyzer(
+            generate_graph(), lib_size=SIZES.__getitem__,
+            interface_edges=[("liba", "libc")]
+        )
+        self.assertEqual(
+            [(e["from"], e["to"]) for e in analyzer.dead_edges()],
+            [("libc", "libe"), ("liba", "libd")],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -20,6 +20,98 @@
 # WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 #
 
+import json
+import os
+
+# Bump when the layout of the cache file changes.
+CACHE_VERSION = 1
+
+
+def _load_cache(cache_file):
+    try:
+        with open(cache_file) as f:
+            cache = json.load(f)
+    except (IOError, OSError, ValueError):
+        return None
+    if cache.get("version") != CACHE_VERSION:
+        return None
+    return cache
+
+
+def _save_cache(cache_file, cache):
+    # Write to a temporary file first, so that an interrupted build can't
+    # leave behind a truncated cache.
+    tmp_file = cache_file + ".tmp"
+    try:
+        os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+        with open(tmp_file, "w") as f:
+            json.dump(cache, f)
+        os.replace(tmp_file, cache_file)
+    except (IOError, OSError):
+        pass
+
+
+def _read_index_entries(env, repo, cache):
+    """Return the map of git path to [blob sha1, SCons path] for the index.
+
+    Running ls-files over the whole repository, and more so turning every
+    path it lists into a SCons node, is slow. The parsed entries are kept in
+    the cache, which is reused as long as the git index has not been written
+    since. When it has, only entries whose blob changed are looked up again.
+    """
+    index_file = os.path.join(env.Dir("#").abspath, repo.rev_parse("--git-path", "index"))
+    try:
+        index_stat = os.stat(index_file)
+        index_key = [index_stat.st_mtime_ns, index_stat.st_size]
+    except OSError:
+        index_key = None
+
+    previous = {}
+    if cache is not None:
+        if index_key is not None and cache.get("index") == index_key:
+            return cache["entries"], False
+        previous = cache.get("entries", {})
+
+    entries = {}
+    for line in repo.ls_files("--stage").split("\n"):
+        # <mode> <sha1> <stage>\t<path>
+        info, _, path = line.partition("\t")
+        if not path:
+            continue
+        sha1 = info.split()[1]
+        known = previous.get(path)
+        if known is not None and known[0] == sha1:
+            entries[path] = known
+        else:
+            entries[path] = [sha1, env.File(path).path]
+
+    if cache is not None:
+        cache["index"] = index_key
+        cache["entries"] = entries
+    return entries, True
+
+
+def _dirty_paths(repo):
+    """Return the git paths whose working tree contents differ from the index.
+
+    Working tree changes don't touch the index, so this can't come from the
+    cache; it is the same check `git status` makes for unstaged changes.
+    """
+    dirty = set()
+    status = repo.status("--porcelain", "-z", "--untracked-files=no")
+    records = iter(status.split("\0"))
+    for record in records:
+        if len(record) < 4:
+            continue
+        index_status, worktree_status, path = record[0], record[1], record[3:]
+        if index_status in "RC":
+            # Renames and copies are followed by the path they came from.
+            next(records, None)
+        if worktree_status != " ":
+            dirty.add(path)
+    return dirty
+
+
 def generate(env, **kwargs):
 
     # Grab the existing decider functions out of the environment
@@ -31,17 +123,28 @@ def generate(env, **kwargs):
     from git import Git
 
     thisRepo = Git(env.Dir("#").abspath)
-    currentGitState = thisRepo.ls_files("--stage")
-    lines = currentGitState.split("\n")
 
-    file_sha1_map = {}
-    for line in lines:
-        line_content = line.split()
-        file_sha1_map[env.File(line_content[3]).path] = line_content[1]
+    # GIT_DECIDER_CACHE names a file in which the parsed index is kept
+    # between invocations of SCons.
+    cache_file = env.get("GIT_DECIDER_CACHE")
+    cache = None
+    if cache_file:
+        cache_file = env.File(cache_file).abspath
+        cache = _load_cache(cache_file) or {"version": CACHE_VERSION}
+
+    # Files modified in the working tree are left to the base decider, so
+    # that they are content hashed rather than trusted to their index sha1.
+    # This runs first, as git may refresh the stat data in the index while
+    # checking, which would otherwise invalidate the cache on every run.
+    dirty = _dirty_paths(thisRepo)
+
+    entries, changed = _read_index_entries(env, thisRepo, cache)
+    if cache is not None and changed:
+        _save_cache(cache_file, cache)
 
-    for m in thisRepo.ls_files("-m").split("\n"):
-        if m:
-            del file_sha1_map[env.File(m).path]
+    file_sha1_map = {
+        scons_path: sha1 for path, (sha1, scons_path) in entries.items() if path not in dirty
+    }
 
     def is_known_to_git(dependency):
         return str(dependency) in file_sha1_map
@@ -71,7 +174,7 @@ def exists(env):
     try:
         from git import Git
 
-        Git(env.Dir("#").abspath).ls_files("--stage")
+        Git(env.Dir("#").abspath).rev_parse("--git-dir")
         return True
     except:
         return False
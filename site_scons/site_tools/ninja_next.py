@@ -26,6 +26,7 @@ import sys
 import os
 import importlib
 import io
+import json
 import shutil
 import shlex
 import textwrap
@@ -45,6 +46,8 @@ NINJA_RULES = "__NINJA_CUSTOM_RULES"
 NINJA_POOLS = "__NINJA_CUSTOM_POOLS"
 NINJA_CUSTOM_HANDLERS = "__NINJA_CUSTOM_HANDLERS"
 NINJA_BUILD = "NINJA_BUILD"
+NINJA_WEIGHTS = "NINJA_WEIGHTS"
+NINJA_WEIGHTS_VERSION = 1
 NINJA_WHEREIS_MEMO = {}
 NINJA_STAT_MEMO = {}
 
@@ -398,6 +401,48 @@ class SConsToNinjaTranslator:
         raise Exception("Unhandled list action with rule: " + results[0]["rule"])
 
 
+def load_ninja_weights(env):
+    """
+    Load the weight file written by buildscripts/ninja_profile.py from
+    the .ninja_log of previous builds, if NINJA_WEIGHTS names one.
+    """
+    path = env.get(NINJA_WEIGHTS)
+    if not path:
+        return None
+
+    path = env.File(path).abspath
+    if not os.path.exists(path):
+        print("Ninja weight file {} does not exist, ignoring it.".format(path))
+        return None
+
+    with open(path) as weights_file:
+        weights = json.load(weights_file)
+    if weights.get("version") != NINJA_WEIGHTS_VERSION:
+        print("Ninja weight file {} has an unknown version, ignoring it.".format(path))
+        return None
+    return weights
+
+
+def physical_memory_bytes():
+    """Return the physical memory of this machine, or None if unknown."""
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def memory_bound_pool_size(pool_stats, default, memory_fraction=0.75):
+    """
+    Size a pool so the jobs in it fit in the memory of this machine,
+    going by the peak memory observed for them in previous builds.
+    """
+    peak = pool_stats.get("p90_peak_memory_bytes")
+    memory = physical_memory_bytes()
+    if not peak or not memory:
+        return default
+    return max(1, min(default, int(memory * memory_fraction // peak)))
+
+
 # pylint: disable=too-many-instance-attributes
 class NinjaState:
     """Maintains state of Ninja build system as it's translated from SCons."""
@@ -552,6 +597,17 @@ class NinjaState:
             "scons_pool": 1,
         }
 
+        # When profiles of previous builds are available, links and the
+        # slowest compiles get their own pools, sized by the memory they
+        # were observed to use, and builds are written heaviest first.
+        self.weights = load_ninja_weights(env)
+        if self.weights:
+            pools = self.weights.get("pools", {})
+            num_jobs = self.env.GetOption("num_jobs")
+            self.pools["link_pool"] = memory_bound_pool_size(pools.get("link", {}), num_jobs)
+            self.pools["heavy_compile_pool"] = memory_bound_pool_size(
+                pools.get("heavy_compile", {}), max(1, num_jobs // 2))
+
         for rule in ["CC", "CXX"]:
             if env["PLATFORM"] == "win32":
                 self.rules[rule]["deps"] = "msvc"
@@ -579,6 +635,38 @@ class NinjaState:
         self.built.update(build["outputs"])
         return True
 
+    def build_weight(self, build):
+        """Return the observed weight of a build, or 0 if it is unknown."""
+        if not self.weights:
+            return 0
+        outputs = build["outputs"] if is_List(build["outputs"]) else [build["outputs"]]
+        target = self.weights["targets"].get(outputs[0]) if outputs else None
+        return target["weight_ms"] if target else 0
+
+    def sorted_build_keys(self):
+        """
+        Return the keys of the builds in the order they are written.
+
+        Ninja starts ready builds in the order they appear in the file,
+        so when weights are available the builds which the most work
+        waits on are written first. Otherwise they are sorted by name.
+        """
+        if not self.weights:
+            return sorted(self.builds.keys())
+        return sorted(self.builds.keys(), key=lambda key: (-self.build_weight(self.builds[key]), key))
+
+    def assign_weighted_pool(self, build):
+        """Put links and heavy compiles in their pools, unless a pool was chosen already."""
+        if not self.weights or "pool" in build:
+            return
+
+        if build["rule"] == "LINK":
+            build["pool"] = "link_pool"
+        elif build["rule"] in ("CC", "CXX"):
+            output = build["outputs"][0] if is_List(build["outputs"]) else build["outputs"]
+            if self.weights["targets"].get(output, {}).get("heavy"):
+                build["pool"] = "heavy_compile_pool"
+
     def is_generated_source(self, output):
         """Check if output ends with a known generated suffix."""
         _, suffix = splitext(output)
@@ -645,11 +733,13 @@ class NinjaState:
 
         template_builders = []
 
-        for build in [self.builds[key] for key in sorted(self.builds.keys())]:
+        for build in [self.builds[key] for key in self.sorted_build_keys()]:
             if build["rule"] == "TEMPLATE":
                 template_builders.append(build)
                 continue
 
+            self.assign_weighted_pool(build)
+
             if "implicit" in build:
                 build["implicit"].sort()
 
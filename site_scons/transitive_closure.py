@@ -0,0 +1,172 @@
+# Copyright 2020 MongoDB Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be included
+# in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY
+# KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE
+# WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE
+# LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION
+# OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION
+# WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+#
+
+"""Memoized transitive closures over the dependency graphs of the build.
+
+libdeps, auto_install_binaries and auto_archive all need the set of nodes
+reachable from some node, for many nodes whose closures largely overlap.
+TransitiveClosure gives every node it sees a dense integer id and computes
+the closure of each node once, as a bitset (a Python int with bit i set for
+node i) built from the closures of its children in reverse topological
+order. The closure of any node reached along the way is kept, so later
+queries for it or anything depending on it are a few bitwise ors.
+
+The memoized closures are only valid for the graph they were computed from.
+Whoever adds an edge to the graph calls invalidate(), which drops them.
+"""
+
+
+class CycleError(Exception):
+    """Raised when the graph has a cycle, which has no transitive closure."""
+
+    def __init__(self, cycle_nodes):
+        super(CycleError, self).__init__()
+        self.cycle_nodes = cycle_nodes
+
+    def __str__(self):
+        return "Dependency cycle detected: " + " => ".join(str(n) for n in self.cycle_nodes)
+
+
+class TransitiveClosure:
+    """The transitive closure of the graph given by children(node).
+
+    children must return the same nodes for a node until invalidate() is
+    called. Nodes must be hashable.
+    """
+
+    def __init__(self, children):
+        self._children = children
+        self._ids = {}
+        self._nodes = []
+        self._closures = {}
+        self._heights = {}
+        self._sort_keys = {}
+        self.generation = 0
+
+    def invalidate(self):
+        """Forget every memoized closure, after the graph has changed."""
+        self._closures.clear()
+        self._heights.clear()
+        self._sort_keys.clear()
+        self.generation += 1
+
+    def _id(self, node):
+        node_id = self._ids.get(node)
+        if node_id is None:
+            node_id = len(self._nodes)
+            self._ids[node] = node_id
+            self._nodes.append(node)
+        return node_id
+
+    def _compute(self, root_id):
+        # An iterative post-order walk, so a child's closure is always
+        # complete before its parent's is built from it. Each stack frame
+        # is [node id, child ids, index of the next child to visit].
+        walking = {root_id}
+        stack = [[root_id, [self._id(c) for c in self._children(self._nodes[root_id])], 0]]
+        while stack:
+            frame = stack[-1]
+            node_id, child_ids, index = frame
+            if index < len(child_ids):
+                frame[2] += 1
+                child_id = child_ids[index]
+                if child_id in self._closures:
+                    continue
+                if child_id in walking:
+                    path = [f[0] for f in stack]
+                    cycle = path[path.index(child_id):] + [child_id]
+                    raise CycleError([self._nodes[i] for i in cycle])
+                walking.add(child_id)
+                child = self._nodes[child_id]
+                stack.append([child_id, [self._id(c) for c in self._children(child)], 0])
+                continue
+
+            closure = 0
+            height = 0
+            for child_id in child_ids:
+                closure |= (1 << child_id) | self._closures[child_id]
+                height = max(height, self._heights[child_id] + 1)
+            self._closures[node_id] = closure
+            self._heights[node_id] = height
+            walking.discard(node_id)
+            stack.pop()
+
+    def closure_bits(self, node):
+        """Return the bitset of the nodes reachable from node, excluding node
+        itself unless it is on a cycle."""
+        node_id = self._id(node)
+        closure = self._closures.get(node_id)
+        if closure is None:
+            self._compute(node_id)
+            closure = self._closures[node_id]
+        return closure
+
+    def reach_bits(self, roots):
+        """Return the bitset of the roots and every node reachable from them."""
+        bits = 0
+        for root in roots:
+            bits |= (1 << self._id(root)) | self.closure_bits(root)
+        return bits
+
+    def reach(self, roots, topological=False):
+        """Return the roots and every node reachable from them.
+
+        With topological=True, the nodes are sorted so that every node comes
+        before the nodes it reaches, with ties broken by name, which makes the
+        order independent of the order closures were computed in. Otherwise
+        they are in no particular order.
+        """
+        nodes = self.nodes(self.reach_bits(roots))
+        if topological:
+            nodes.sort(key=self._sort_key)
+        return nodes
+
+    def walk(self, roots):
+        """Return the roots and every node reachable from them, like reach(),
+        but without memoizing anything, so that cycles are allowed."""
+        seen = set()
+        stack = list(roots)
+        while stack:
+            node = stack.pop()
+            if node in seen:
+                continue
+            seen.add(node)
+            stack.extend(self._children(node))
+        return list(seen)
+
+    def nodes(self, bits):
+        """Return the nodes of a bitset."""
+        nodes = []
+        while bits:
+            low = bits & -bits
+            nodes.append(self._nodes[low.bit_length() - 1])
+            bits ^= low
+        return nodes
+
+    def _sort_key(self, node):
+        node_id = self._ids[node]
+        key = self._sort_keys.get(node_id)
+        if key is None:
+            self.closure_bits(node)
+            key = (-self._heights[node_id], str(node))
+            self._sort_keys[node_id] = key
+        return key
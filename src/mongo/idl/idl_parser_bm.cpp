@@ -0,0 +1,120 @@
+/**
+ *    Copyright (C) 2020-present MongoDB, Inc.
+ *
+ *    This program is free software: you can redistribute it and/or modify
+ *    it under the terms of the Server Side Public License, version 1,
+ *    as published by MongoDB, Inc.
+ *
+ *    This program is distributed in the hope that it will be useful,
+ *    but WITHOUT ANY WARRANTY; without even the implied warranty of
+ *    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+ *    Server Side Public License for more details.
+ *
+ *    You should have received a copy of the Server Side Public License
+ *    along with this program. If not, see
+ *    <http://www.mongodb.com/licensing/server-side-public-license>.
+ *
+ *    As a special exception, the copyright holders give permission to link the
+ *    code of portions of this program with the OpenSSL library under certain
+ *    conditions as described in each individual source file and distribute
+ *    linked combinations including the program with the OpenSSL library. You
+ *    must comply with the Server Side Public License in all respects for
+ *    all of the code used other than as permitted herein. If you modify file(s)
+ *    with this exception, you may extend this exception to your version of the
+ *    file(s), but you are not obligated to do so. If you do not wish to do so,
+ *    delete this exception statement from your version. If you delete this
+ *    exception statement from all source files in the program, then also delete
+ *    it in the license file.
+ */
+
+#include "mongo/platform/basic.h"
+
+#include <benchmark/benchmark.h>
+
+#include "mongo/bson/bsonobjbuilder.h"
+#include "mongo/idl/idl_parser_bm_gen.h"
+
+namespace mongo {
+namespace idl {
+namespace bm {
+namespace {
+
+const BSONObj kCursorOptions =
+    BSON("batchSize" << 101 << "singleBatch" << false << "noCursorTimeout" << true << "awaitData"
+                     << false << "tailable" << false);
+
+const BSONObj kManyFields = BSON("filter" << BSON("a" << 1) << "projection" << BSON("b" << 1)
+                                          << "sort" << BSON("c" << -1) << "hint" << BSON("c" << 1)
+                                          << "collation" << BSON("locale"
+                                                                 << "simple")
+                                          << "skip" << 10LL << "limit" << 100LL << "min"
+                                          << BSON("c" << 0) << "max" << BSON("c" << 1000)
+                                          << "comment"
+                                          << "benchmark"
+                                          << "maxTimeMS" << 1000LL << "returnKey" << false
+                                          << "showRecordId" << true << "allowDiskUse" << true
+                                          << "allowPartialResults" << false << "readOnce"
+                                          << false);
+
+const BSONObj kCommand = BSON("benchmarkFind"
+                              << "coll"
+                              << "filter" << BSON("a" << 1) << "sort" << BSON("c" << -1)
+                              << "limit" << 100LL << "batchSize" << 101 << "singleBatch" << false
+                              << "comment"
+                              << "benchmark"
+                              << "maxTimeMS" << 1000LL << "lsid" << BSON("id" << 1)
+                              << "$db"
+                              << "test");
+
+void BM_ParseCursorOptions(benchmark::State& state) {
+    IDLParserErrorContext ctxt("benchmark");
+    for (auto _ : state) {
+        benchmark::DoNotOptimize(BenchmarkCursorOptions::parse(ctxt, kCursorOptions));
+    }
+    state.SetItemsProcessed(state.iterations() * kCursorOptions.nFields());
+}
+
+void BM_ParseManyFields(benchmark::State& state) {
+    IDLParserErrorContext ctxt("benchmark");
+    for (auto _ : state) {
+        benchmark::DoNotOptimize(BenchmarkManyFields::parse(ctxt, kManyFields));
+    }
+    state.SetItemsProcessed(state.iterations() * kManyFields.nFields());
+}
+
+void BM_ParseCommand(benchmark::State& state) {
+    IDLParserErrorContext ctxt("benchmark");
+    for (auto _ : state) {
+        benchmark::DoNotOptimize(BenchmarkFind::parse(ctxt, kCommand));
+    }
+    state.SetItemsProcessed(state.iterations() * kCommand.nFields());
+}
+
+void BM_SerializeManyFields(benchmark::State& state) {
+    IDLParserErrorContext ctxt("benchmark");
+    const auto parsed = BenchmarkManyFields::parse(ctxt, kManyFields);
+    for (auto _ : state) {
+        benchmark::DoNotOptimize(parsed.toBSON());
+    }
+    state.SetItemsProcessed(state.iterations() * kManyFields.nFields());
+}
+
+void BM_SerializeCommand(benchmark::State& state) {
+    IDLParserErrorContext ctxt("benchmark");
+    const auto parsed = BenchmarkFind::parse(ctxt, kCommand);
+    for (auto _ : state) {
+        benchmark::DoNotOptimize(parsed.toBSON(BSONObj()));
+    }
+    state.SetItemsProcessed(state.iterations() * kCommand.nFields());
+}
+
+BENCHMARK(BM_ParseCursorOptions);
+BENCHMARK(BM_ParseManyFields);
+BENCHMARK(BM_ParseCommand);
+BENCHMARK(BM_SerializeManyFields);
+BENCHMARK(BM_SerializeCommand);
+
+}  // namespace
+}  // namespace bm
+}  // namespace idl
+}  // namespace mongo
@@ -0,0 +1,322 @@
+#!/usr/bin/env python
+#
+# Public Domain 2014-2020 MongoDB, Inc.
+# Public Domain 2008-2014 WiredTiger, Inc.
+#
+# This is free and unencumbered software released into the public domain.
+#
+# Anyone is free to copy, modify, publish, use, compile, sell, or
+# distribute this software, either in source code form or as a compiled
+# binary, for any purpose, commercial or non-commercial, and by any
+# means.
+#
+# In jurisdictions that recognize copyright laws, the author or authors
+# of this software dedicate any and all copyright interest in the
+# software to the public domain. We make this dedication for the benefit
+# of the public at large and to the detriment of our heirs and
+# successors. We intend this dedication to be an overt act of
+# relinquishment in perpetuity of all present and future rights to this
+# software under copyright law.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+
+# latency_histogram.py
+# Mergeable latency histograms, and streaming latency analysis of the
+# monitor.json files produced by workgen runs.
+#
+# Exact percentiles require the run to set Workload.options.sample_histogram,
+# which adds each interval's latency buckets to monitor.json.  For older
+# files, the histograms are rebuilt from the percentiles reported for each
+# interval, and results are flagged as approximate.
+from __future__ import print_function
+import json, sys
+from datetime import datetime
+
+# A log-linear histogram of latencies in microseconds, in the style of
+# HdrHistogram.  Values below 2^sub_bucket_bits are counted exactly; above
+# that, each power of two is split into 2^(sub_bucket_bits - 1) buckets, so
+# a value is reported with a relative error below 1/2^(sub_bucket_bits - 1).
+# Bucket counts are kept sparsely, and histograms of the same precision can
+# be merged, so percentiles can be taken over any combination of intervals,
+# phases or runs.
+class LatencyHistogram:
+    def __init__(self, sub_bucket_bits=7):
+        self.sub_bucket_bits = sub_bucket_bits
+        self.counts = {}
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = 0
+
+    def _index(self, value):
+        shift = value.bit_length() - self.sub_bucket_bits
+        if shift <= 0:
+            return value
+        return (shift << (self.sub_bucket_bits - 1)) + (value >> shift)
+
+    # The lowest and highest values counted by a bucket.
+    def _range(self, index):
+        if index < (1 << self.sub_bucket_bits):
+            return index, index
+        shift = (index >> (self.sub_bucket_bits - 1)) - 1
+        mantissa = index - (shift << (self.sub_bucket_bits - 1))
+        return mantissa << shift, ((mantissa + 1) << shift) - 1
+
+    def record(self, value, count=1):
+        value = int(value)
+        if value < 0:
+            raise ValueError('negative latency: ' + str(value))
+        if count <= 0:
+            return
+        index = self._index(value)
+        self.counts[index] = self.counts.get(index, 0) + count
+        self.count += count
+        self.total += value * count
+        if self.min == None or value < self.min:
+            self.min = value
+        self.update_max(value)
+
+    # The largest latency may be known more precisely than its bucket.
+    def update_max(self, value):
+        if value > self.max:
+            self.max = int(value)
+
+    def merge(self, other):
+        if other.sub_bucket_bits != self.sub_bucket_bits:
+            raise ValueError('cannot merge histograms of different precision')
+        for index, count in other.counts.items():
+            self.counts[index] = self.counts.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        if other.min != None and (self.min == None or other.min < self.min):
+            self.min = other.min
+        self.update_max(other.max)
+        return self
+
+    def __iadd__(self, other):
+        return self.merge(other)
+
+    def __add__(self, other):
+        return LatencyHistogram(self.sub_bucket_bits).merge(self).merge(other)
+
+    def mean(self):
+        if self.count == 0:
+            return 0.0
+        return float(self.total) / self.count
+
+    # The latency that the given percent of operations did not exceed.
+    def percentile(self, percent):
+        if self.count == 0:
+            return 0
+        target = max(1, int(-(-percent * self.count // 100)))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= target:
+                return min(self._range(index)[1], self.max)
+        return self.max
+
+    def to_json(self):
+        return {'sub_bucket_bits': self.sub_bucket_bits,
+                'counts': sorted(self.counts.items()),
+                'total': self.total, 'min': self.min, 'max': self.max}
+
+    @staticmethod
+    def from_json(data):
+        hist = LatencyHistogram(data['sub_bucket_bits'])
+        for index, count in data['counts']:
+            hist.counts[index] = count
+            hist.count += count
+        hist.total = data['total']
+        hist.min = data['min']
+        hist.max = data['max']
+        return hist
+
+# Yield the entries of a monitor.json file, one line at a time.
+def monitor_entries(filename):
+    with open(filename) as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+def entry_time(entry):
+    return datetime.strptime(entry['localTime'], '%Y-%m-%dT%H:%M:%S.%fZ')
+
+# When an interval has no latency histogram, its latencies are assumed to
+# be spread between the percentiles workgen reports for it.
+APPROXIMATE_SPREAD = [('50% latency', 0.50), ('95% latency', 0.45),
+    ('99% latency', 0.04), ('max latency', 0.01)]
+
+# Latency histograms for each operation type, split by whether a checkpoint
+# was running, accumulated from any number of monitor.json files.  Only
+# intervals that end within [start, end) seconds of the first entry of
+# their file are included.
+class MonitorLatency:
+    optypes = ['read', 'insert', 'update']
+    phases = ['checkpoint', 'normal']
+
+    def __init__(self, start=None, end=None, sub_bucket_bits=7):
+        self.start = start
+        self.end = end
+        self.sub_bucket_bits = sub_bucket_bits
+        self.histograms = {}
+        for optype in self.optypes:
+            for phase in self.phases:
+                self.histograms[(optype, phase)] = \
+                    LatencyHistogram(sub_bucket_bits)
+        self.seconds = dict((phase, 0.0) for phase in self.phases)
+        self.checkpoints = 0
+        self.approximate = False
+
+    def add_file(self, filename):
+        self.add_entries(monitor_entries(filename))
+
+    def add_entries(self, entries):
+        first = prev = None
+        ckpt_in_progress = False
+        for entry in entries:
+            dt = entry_time(entry)
+            is_ckpt = entry['workgen']['checkpoint']['active'] > 0
+            if first == None:
+                # The first entry has no elapsed time, ignore its data.
+                first = prev = dt
+                ckpt_in_progress = is_ckpt
+                continue
+            seconds = (dt - prev).total_seconds()
+            if seconds <= 0.0:
+                raise Exception('invalid time span between entries')
+            prev = dt
+            offset = (dt - first).total_seconds()
+            if (self.start != None and offset < self.start) or \
+              (self.end != None and offset >= self.end):
+                ckpt_in_progress = is_ckpt
+                continue
+            if is_ckpt and not ckpt_in_progress:
+                self.checkpoints += 1
+            ckpt_in_progress = is_ckpt
+            phase = 'checkpoint' if is_ckpt else 'normal'
+            self.seconds[phase] += seconds
+            for optype in self.optypes:
+                self._add_interval(self.histograms[(optype, phase)],
+                    entry['workgen'][optype], seconds)
+
+    def _add_interval(self, hist, track, seconds):
+        if 'latency histogram' in track:
+            for usecs, count in track['latency histogram']:
+                hist.record(usecs, count)
+        else:
+            ops = int(round(track['ops per sec'] * seconds))
+            if ops == 0:
+                return
+            self.approximate = True
+            for name, fraction in APPROXIMATE_SPREAD:
+                if name in track:
+                    hist.record(track[name], int(round(ops * fraction)))
+        if track['max latency'] > 0:
+            hist.update_max(track['max latency'])
+
+    # The histogram for an operation type, over one phase or both.
+    def histogram(self, optype, phase=None):
+        result = LatencyHistogram(self.sub_bucket_bits)
+        for p in ([phase] if phase else self.phases):
+            result.merge(self.histograms[(optype, p)])
+        return result
+
+    def merge(self, other):
+        for key, hist in other.histograms.items():
+            self.histograms[key].merge(hist)
+        for phase in self.phases:
+            self.seconds[phase] += other.seconds[phase]
+        self.checkpoints += other.checkpoints
+        self.approximate = self.approximate or other.approximate
+        return self
+
+    def to_json(self):
+        return {'histograms': [[optype, phase, hist.to_json()]
+                    for (optype, phase), hist in sorted(
+                        self.histograms.items())],
+                'seconds': self.seconds, 'checkpoints': self.checkpoints,
+                'approximate': self.approximate}
+
+    @staticmethod
+    def from_json(data):
+        result = None
+        for optype, phase, hist in data['histograms']:
+            hist = LatencyHistogram.from_json(hist)
+            if result == None:
+                result = MonitorLatency(sub_bucket_bits=hist.sub_bucket_bits)
+            result.histograms[(optype, phase)] = hist
+        result.seconds.update(data['seconds'])
+        result.checkpoints = data['checkpoints']
+        result.approximate = data['approximate']
+        return result
+
+    def report(self, percentiles=(50, 99, 99.9), fh=sys.stdout):
+        cols = ['ops', 'mean us'] + \
+            ['p%g us' % p for p in percentiles] + ['max us']
+        print('%-22s' % '' + ''.join('%12s' % c for c in cols), file=fh)
+        for optype in self.optypes:
+            for phase in self.phases + [None]:
+                hist = self.histogram(optype, phase)
+                if hist.count == 0:
+                    continue
+                row = [hist.count, '%.1f' % hist.mean()] + \
+                    [hist.percentile(p) for p in percentiles] + [hist.max]
+                name = optype + ' ' + (phase if phase else 'all')
+                print('%-22s' % name + ''.join('%12s' % c for c in row),
+                    file=fh)
+        print('checkpoint time: %.1f secs of %.1f, %d checkpoints started' %
+            (self.seconds['checkpoint'], sum(self.seconds.values()),
+            self.checkpoints), file=fh)
+        if self.approximate:
+            print('WARNING: some intervals have no latency histogram, ' +
+                'percentiles are approximate', file=fh)
+
+def usage():
+    print('Usage: python latency_histogram.py [ --start secs ] [ --end secs ]')
+    print('           [ --save file.json ] file...')
+    print('  input files are monitor.json files produced by workgen, or')
+    print('  files written by --save; all inputs are merged')
+    sys.exit(1)
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    start = end = save = None
+    files = []
+    while args:
+        arg = args.pop(0)
+        if arg in ('--start', '--end', '--save'):
+            if not args:
+                usage()
+            value = args.pop(0)
+            if arg == '--start':
+                start = float(value)
+            elif arg == '--end':
+                end = float(value)
+            else:
+                save = value
+        else:
+            files.append(arg)
+    if not files:
+        usage()
+    total = MonitorLatency(start, end)
+    for filename in files:
+        # Files written by --save hold a single JSON line.
+        with open(filename) as f:
+            first = json.loads(f.readline())
+        if 'histograms' in first:
+            total.merge(MonitorLatency.from_json(first))
+        else:
+            total.add_file(filename)
+    total.report()
+    if save:
+        with open(save, 'w') as f:
+            json.dump(total.to_json(), f)
@@ -29,8 +29,8 @@
 
 # latency_metric.py
 # Print latency metrics for workgen runs that generate monitor.json
-import json, sys
-from datetime import datetime
+import sys
+from latency_histogram import LatencyHistogram, entry_time, monitor_entries
 
 # A 'safe' divide shown as a string.
 def divide(a, b):
@@ -56,8 +56,17 @@ class Digest:
         self.lat_99_raw = 0
         self.lat_max = 0
         self.secs = 0.0
+        # True percentiles are available if every entry has a histogram.
+        self.hist = LatencyHistogram()
+        self.exact = True
 
-    def entry(self, secs, ops, lat, lat_99, lat_max):
+    def entry(self, secs, ops, lat, lat_99, lat_max, histogram=None):
+        if histogram == None:
+            self.exact = False
+        else:
+            for usecs, count in histogram:
+                self.hist.record(usecs, count)
+            self.hist.update_max(lat_max)
         self.secs += secs
         self.ops += ops
         self.lat += lat * ops
@@ -73,6 +82,13 @@ class Digest:
     def latency_99_raw_average(self):
         return float(self.lat_99_raw) / float(self.entries)
 
+    # The 99th percentile latency over all entries if it can be computed,
+    # otherwise the average of the entries' 99th percentiles.
+    def latency_99(self):
+        if self.exact and self.hist.count > 0:
+            return float(self.hist.percentile(99))
+        return self.latency_99_raw_average()
+
     def latency_max(self):
         return self.lat_max
 
@@ -85,6 +101,8 @@ class Digest:
         print(prefix + 'total latency us: ' + str(self.lat))
         print(prefix + 'latency 99% us, weighted sum: ' + str(self.lat_99))
         print(prefix + 'latency 99% us, raw sum: ' + str(self.lat_99_raw))
+        if self.exact:
+            print(prefix + 'latency 99% us: ' + str(self.hist.percentile(99)))
         print(prefix + 'latency max us: ' + str(self.lat_max))
         print(prefix + 'elapsed secs: ' + str(self.secs))
 
@@ -128,13 +146,16 @@ class FileMetrics:
 
         # This is the ratio of 99% latency reads, checkpoint vs normal.
         # That is, for all 1-second intervals that occur during a checkpoint,
-        # we take the 99 percentile latency for read operations, and average
-        # them, weighted by how many read operations were performed in each
-        # interval.  We do the same for all 1-second intervals that occur
-        # outside of a checkpoint, and finally take the ratio between these
-        # two numbers.  This is a more sophisticated measure of the smoothness
-        # of overall response times, looking at all latencies, rather than
-        # focusing on the one worst latency.
+        # we take the 99 percentile latency of all read operations in them.
+        # We do the same for all 1-second intervals that occur outside of a
+        # checkpoint, and finally take the ratio between these two numbers.
+        # This is a more sophisticated measure of the smoothness of overall
+        # response times, looking at all latencies, rather than focusing on
+        # the one worst latency.
+        #
+        # The percentiles are exact if the run set the sample_histogram
+        # workload option; otherwise, we can only average the 99 percentile
+        # latencies reported for each interval.
         #
         # Lower is better (best is 1.0), it means more predictable response
         # times.
@@ -153,13 +174,12 @@ class FileMetrics:
         self.read_all = None
 
     def calculate(self):
-        with open(self.filename) as f:
-            lines = f.readlines()
-            s = '{ "ts" : [' + ','.join(lines) + '] }'
-            json_data = json.loads(s)
-            self.calculate_using_json(json_data)
+        self.calculate_using_entries(monitor_entries(self.filename))
 
     def calculate_using_json(self, json_data):
+        self.calculate_using_entries(json_data['ts'])
+
+    def calculate_using_entries(self, entries):
         ckpt_in_progress = False
         ckpt_count = 0
         prev_dt = None
@@ -168,9 +188,8 @@ class FileMetrics:
         self.read_normal = Digest()
         self.read_ckpt = Digest()
         self.read_all = Digest()
-        for entry in json_data['ts']:
-            time_s = entry['localTime']
-            dt = datetime.strptime(time_s, '%Y-%m-%dT%H:%M:%S.%fZ')
+        for entry in entries:
+            dt = entry_time(entry)
             is_ckpt = entry['workgen']['checkpoint']['active'] > 0
             if not ckpt_in_progress and is_ckpt:
                 ckpt_count += 1
@@ -192,8 +211,10 @@ class FileMetrics:
                 lat_avg = rentry['average latency']
                 lat_99 = rentry['99% latency']
                 lat_max = rentry['max latency']
-                digest.entry(seconds, ops, lat_avg, lat_99, lat_max)
-                self.read_all.entry(seconds, ops, lat_avg, lat_99, lat_max)
+                histogram = rentry.get('latency histogram')
+                digest.entry(seconds, ops, lat_avg, lat_99, lat_max, histogram)
+                self.read_all.entry(
+                    seconds, ops, lat_avg, lat_99, lat_max, histogram)
             prev_dt = dt
         if self.read_all.time_secs() == 0.0:
             raise(Exception(self.filename +
@@ -214,8 +235,8 @@ class FileMetrics:
             float(self.read_all.latency_max()) /
             float(self.read_all.latency_average()))
         self.ratio_latency_99.set_value(
-            self.read_ckpt.latency_99_raw_average() /
-            self.read_normal.latency_99_raw_average())
+            self.read_ckpt.latency_99() /
+            self.read_normal.latency_99())
         self.proportion_checkpoint_time.set_value(
             self.read_ckpt.time_secs() /
             self.read_all.time_secs())
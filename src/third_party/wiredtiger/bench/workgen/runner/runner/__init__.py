@@ -84,5 +84,10 @@ except:
     sys.path.insert(0, os.path.join(wt_builddir, 'bench', 'workgen'))
     import workgen
 
+# Shared latency tools live with the workgen sources.
+if workgen_src not in sys.path:
+    sys.path.append(workgen_src)
+
 from .core import txn, extensions_config, op_append, op_group_transaction, op_log_like, op_multi_table, op_populate_with_range, sleep, timed
-from .latency import workload_latency
+from .latency import track_histogram, workload_latency, workload_latency_histograms
+from .populate_cache import populate_cache_restore, populate_cache_save
@@ -30,6 +30,7 @@
 #      Utility functions for showing latency statistics
 from __future__ import print_function
 import sys
+from latency_histogram import LatencyHistogram
 
 def _show_buckets(fh, title, mult, buckets, n):
     shown = False
@@ -43,17 +44,14 @@ def _show_buckets(fh, title, mult, buckets, n):
             shown = True
     print(s, file=fh)
 
-def _latency_preprocess(arr, merge):
-    mx = 0
-    cur = 0
-    # SWIG arrays have a clunky interface
-    for i in range(0, arr.__len__()):
-        if i % merge == 0:
-            cur = 0
-        cur += arr[i]
-        if cur > mx:
-            mx = cur
-    arr.height = mx
+# SWIG arrays have a clunky interface, and each element access is a call
+# into the extension: copy the buckets out once.
+def _buckets(arr):
+    return [arr[i] for i in range(0, arr.__len__())]
+
+def _latency_height(buckets, merge):
+    return max([sum(buckets[i:i + merge])
+        for i in range(0, len(buckets), merge)] + [0])
 
 def _latency_plot(box, ch, left, width, arr, merge, scale):
     pos = 0
@@ -80,13 +78,11 @@ def _latency_optype(fh, name, ch, t):
     print('  avg: ' + str(t.latency/t.latency_ops) + \
           ', min: ' + str(t.min_latency) + ', max: ' + str(t.max_latency),
           file=fh)
-    us = t.us()
-    ms = t.ms()
-    sec = t.sec()
-    _latency_preprocess(us, 40)
-    _latency_preprocess(ms, 40)
-    _latency_preprocess(sec, 4)
-    max_height = max(us.height, ms.height, sec.height)
+    us = _buckets(t.us())
+    ms = _buckets(t.ms())
+    sec = _buckets(t.sec())
+    max_height = max(_latency_height(us, 40), _latency_height(ms, 40),
+                     _latency_height(sec, 4))
     if max_height == 0:
         return
     height = 20    # 20 chars high
@@ -109,6 +105,27 @@ def _latency_optype(fh, name, ch, t):
     _show_buckets(fh, name + ' sec', 1000000, sec, 100)
     print('', file=fh)
 
+# Return a LatencyHistogram of a Track's latency buckets.
+def track_histogram(t):
+    hist = LatencyHistogram()
+    for mult, buckets in ((1, t.us()), (1000, t.ms()), (1000000, t.sec())):
+        for i, count in enumerate(_buckets(buckets)):
+            hist.record(i * mult, count)
+    if t.latency_ops != 0:
+        hist.update_max(t.max_latency)
+    return hist
+
+# Return a LatencyHistogram for each operation type of a finished workload,
+# these can be merged with those of other runs.
+def workload_latency_histograms(workload):
+    stats = workload.stats
+    return {'insert': track_histogram(stats.insert),
+            'read': track_histogram(stats.read),
+            'remove': track_histogram(stats.remove),
+            'update': track_histogram(stats.update),
+            'truncate': track_histogram(stats.truncate),
+            'not found': track_histogram(stats.not_found)}
+
 def workload_latency(workload, outfilename = None):
     if outfilename:
         fh = open(outfilename, 'w')
@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+#
+# Public Domain 2014-2020 MongoDB, Inc.
+# Public Domain 2008-2014 WiredTiger, Inc.
+#
+# This is free and unencumbered software released into the public domain.
+#
+# Anyone is free to copy, modify, publish, use, compile, sell, or
+# distribute this software, either in source code form or as a compiled
+# binary, for any purpose, commercial or non-commercial, and by any
+# means.
+#
+# In jurisdictions that recognize copyright laws, the author or authors
+# of this software dedicate any and all copyright interest in the
+# software to the public domain. We make this dedication for the benefit
+# of the public at large and to the detriment of our heirs and
+# successors. We intend this dedication to be an overt act of
+# relinquishment in perpetuity of all present and future rights to this
+# software under copyright law.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+#
+# runner/populate_cache.py
+#   Keep copies of populated database home directories, so that runs that
+#   only differ in their workload phase can skip the populate phase.
+import hashlib, os, shutil, sys
+import wiredtiger
+
+# Linux ioctl to share a file's extents copy-on-write, from <linux/fs.h>.
+_FICLONE = 0x40049409
+
+# Copy a file, cloning it rather than copying the data when the filesystem
+# supports it.  Hard links can't be used: WiredTiger updates its files in
+# place, which would modify the cached copy.
+def _clone_file(src, dest):
+    if sys.platform.startswith('linux'):
+        import fcntl
+        with open(src, 'rb') as fsrc:
+            with open(dest, 'wb') as fdest:
+                try:
+                    fcntl.ioctl(fdest.fileno(), _FICLONE, fsrc.fileno())
+                    cloned = True
+                except (IOError, OSError):
+                    cloned = False
+        if cloned:
+            shutil.copystat(src, dest)
+            return
+    shutil.copy2(src, dest)
+
+def _clone_tree(src, dest):
+    os.makedirs(dest)
+    for name in os.listdir(src):
+        srcname = os.path.join(src, name)
+        destname = os.path.join(dest, name)
+        if os.path.isdir(srcname):
+            _clone_tree(srcname, destname)
+        else:
+            _clone_file(srcname, destname)
+
+# The cache entry for a populate configuration, distinct for each
+# WiredTiger version as the file formats may change.
+def _cache_path(cache_dir, key):
+    version = wiredtiger.wiredtiger_version()[0]
+    digest = hashlib.sha1((version + '\n' + key).encode()).hexdigest()
+    return os.path.join(cache_dir, digest)
+
+# populate_cache_restore --
+#   Fill the context's home directory from the populate cache.  Returns
+#   True if a cached copy was found, and so the populate can be skipped.
+#   With rebuild, any cached copy is discarded.
+def populate_cache_restore(context, cache_dir, key, rebuild=False):
+    context.initialize()
+    path = _cache_path(cache_dir, key)
+    if rebuild:
+        shutil.rmtree(path, True)
+        return False
+    if not os.path.isdir(path):
+        return False
+    home = context.args.home
+    shutil.rmtree(home, True)
+    _clone_tree(path, home)
+    return True
+
+# populate_cache_save --
+#   Add the context's home directory to the populate cache.  The connection
+#   must have been closed, so the copy is cleanly checkpointed.
+def populate_cache_save(context, cache_dir, key):
+    path = _cache_path(cache_dir, key)
+    if os.path.isdir(path):
+        return
+    # Copy to a temporary name, so concurrent runs never see a partial copy.
+    tmp_path = path + '.tmp.' + str(os.getpid())
+    shutil.rmtree(tmp_path, True)
+    _clone_tree(context.args.home, tmp_path)
+    try:
+        os.rename(tmp_path, path)
+    except OSError:
+        # Another run saved the same configuration first.
+        shutil.rmtree(tmp_path, True)
@@ -435,6 +435,10 @@ int Monitor::run() {
                 for (_i = 0; (percentiles)[_i] != 0; _i++)                 \
                     (f) << ",\"" << (percentiles)[_i] << "% latency\":"    \
                         << (t).percentile_latency(percentiles[_i]);        \
+                if (options->sample_histogram) {                           \
+                    (f) << ",\"latency histogram\":";                      \
+                    (t).histogram_json(f);                                 \
+                }                                                          \
                 (f) << "}";                                                \
             } while(0)
 
@@ -1715,6 +1719,28 @@ uint64_t Track::percentile_latency(int percent) const {
     return (0);
 }
 
+// Write the nonzero latency buckets as a JSON list of [usecs, count] pairs,
+// where usecs is the lowest latency counted by the bucket.
+void Track::histogram_json(std::ostream &os) const {
+    bool first = true;
+
+    os << "[";
+    if (us != NULL) {
+#define BUCKETS_JSON(buckets, n, mult)                                     \
+        for (int i = 0; i < (n); i++)                                      \
+            if ((buckets)[i] != 0) {                                       \
+                os << (first ? "" : ",") << "[" << (uint64_t)i * (mult)    \
+                   << "," << (buckets)[i] << "]";                          \
+                first = false;                                             \
+            }
+        BUCKETS_JSON(us, LATENCY_US_BUCKETS, 1);
+        BUCKETS_JSON(ms, LATENCY_MS_BUCKETS, THOUSAND);
+        BUCKETS_JSON(sec, LATENCY_SEC_BUCKETS, MILLION);
+#undef BUCKETS_JSON
+    }
+    os << "]";
+}
+
 void Track::subtract(const Track &other) {
     ops_in_progress -= other.ops_in_progress;
     ops -= other.ops;
@@ -1934,8 +1960,8 @@ TableInternal::~TableInternal() {}
 
 WorkloadOptions::WorkloadOptions() : max_latency(0),
     report_file("workload.stat"), report_interval(0), run_time(0),
-    sample_file("monitor.json"), sample_interval_ms(0), sample_rate(1),
-    warmup(0), oldest_timestamp_lag(0.0), stable_timestamp_lag(0.0),
+    sample_file("monitor.json"), sample_histogram(false),
+    sample_interval_ms(0), sample_rate(1), warmup(0), oldest_timestamp_lag(0.0), stable_timestamp_lag(0.0),
     timestamp_advance(0.0), _options() {
     _options.add_int("max_latency", max_latency,
       "prints warning if any latency measured exceeds this number of "
@@ -1955,6 +1981,10 @@ WorkloadOptions::WorkloadOptions() : max_latency(0),
       "When set to the empty string, no JSON is emitted.");
     _options.add_int("sample_interval_ms", sample_interval_ms,
       "performance logging every interval milliseconds, 0 to disable");
+    _options.add_bool("sample_histogram", sample_histogram,
+      "include the latency histogram of each operation type in every "
+      "sample_file entry, so exact percentiles can be computed over "
+      "any span of the run. Requires sample_interval to be configured.");
     _options.add_int("sample_rate", sample_rate,
       "how often the latency of operations is measured. 1 for every operation, "
       "2 for every second operation, 3 for every third operation etc.");
@@ -1972,7 +2002,8 @@ WorkloadOptions::WorkloadOptions() : max_latency(0),
 WorkloadOptions::WorkloadOptions(const WorkloadOptions &other) :
     max_latency(other.max_latency), report_interval(other.report_interval),
     run_time(other.run_time), sample_interval_ms(other.sample_interval_ms),
-    sample_rate(other.sample_rate), _options(other._options) {}
+    sample_rate(other.sample_rate),
+    sample_histogram(other.sample_histogram), _options(other._options) {}
 WorkloadOptions::~WorkloadOptions() {}
 
 Workload::Workload(Context *context, const ThreadListWrapper &tlw) :
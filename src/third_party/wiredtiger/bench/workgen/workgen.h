@@ -109,6 +109,7 @@ struct Track {
     void complete();
     void complete_with_latency(uint64_t usecs);
     uint64_t percentile_latency(int percent) const;
+    void histogram_json(std::ostream &os) const;
     void subtract(const Track&);
     void track_latency(bool);
     bool track_latency() const { return (us != NULL); }
@@ -437,6 +438,7 @@ struct WorkloadOptions {
     int sample_interval_ms;
     int sample_rate;
     std::string sample_file;
+    bool sample_histogram;
     int warmup;
     double oldest_timestamp_lag;
     double stable_timestamp_lag;
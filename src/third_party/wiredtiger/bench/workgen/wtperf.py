@@ -34,7 +34,7 @@
 # See also the usage() function.
 #
 from __future__ import print_function
-import os, shutil, sys, subprocess, tempfile
+import hashlib, os, shutil, sys, subprocess, tempfile
 
 def eprint(*args, **kwargs):
     print(*args, file=sys.stderr, **kwargs)
@@ -52,11 +52,14 @@ class Options(object):
     pass
 
 class Translator:
-    def __init__(self, filename, prefix, verbose, homedir):
+    def __init__(self, filename, prefix, verbose, homedir,
+                 populate_cache = None, populate_rebuild = False):
         self.filename = filename
         self.prefix = prefix
         self.verbose = verbose
         self.homedir = homedir
+        self.populate_cache = populate_cache
+        self.populate_rebuild = populate_rebuild
         self.linenum = 0
         self.opts_map = {}
         self.opts_used = {}
@@ -390,7 +393,9 @@ class Translator:
                                  divisor_name + ', this is not handled ' +
                                  'precisely by wtperf.py')
 
-    def translate_table_create(self):
+    # If guard_create is set, tables are only created if the populate
+    # cache did not supply them.
+    def translate_table_create(self, guard_create = False):
         opts = self.options
         s = ''
         s += 'wtperf_table_config = "key_format=S,value_format=S," +\\\n'
@@ -412,8 +417,13 @@ class Translator:
             indent = '    '
 
         s += indent + 'table = Table(tname)\n'
+        if guard_create:
+            s += indent + 'if not populated:\n'
+            indent += '    '
         s += indent + 's.create(tname, wtperf_table_config +\\\n'
         s += indent + '         compress_table_config + table_config)\n'
+        if guard_create:
+            indent = indent[:-4]
         s += indent + 'table.options.key_size = ' + str(opts.key_sz) + '\n'
         s += indent + 'table.options.value_size = ' + str(opts.value_sz) + '\n'
         if opts.random_value:
@@ -511,6 +521,39 @@ class Translator:
 
         return s
 
+    # Wrap the table creation and populate phase so that a copy of the
+    # populated home directory is kept in the populate cache, and later runs
+    # with the same configuration start from that copy instead.  The cache
+    # key is a hash of all the generated code that determines the populated
+    # contents.
+    def translate_populate_cache(self, conn_src, sess_config):
+        table_create = self.translate_table_create(True)
+        populate = self.translate_populate()
+        key = hashlib.sha1(
+            (conn_src + table_create + populate).encode()).hexdigest()
+        s = 'populate_cache_dir = "' + \
+            os.path.abspath(self.populate_cache) + '"\n'
+        s += 'populate_cache_key = "' + key + '"\n'
+        s += 'populated = populate_cache_restore(context, ' + \
+            'populate_cache_dir, populate_cache_key, ' + \
+            str(self.populate_rebuild) + ')\n'
+        s += 'conn = context.wiredtiger_open("create," + conn_config)\n'
+        s += 's = conn.open_session("' + sess_config + '")\n'
+        s += '\n'
+        s += table_create
+        s += '\nif populated:\n'
+        s += '    print("populate: using cached copy")\n'
+        s += 'else:\n'
+        for line in populate.strip('\n').splitlines():
+            s += ('    ' + line).rstrip() + '\n'
+        s += '    # Save a cleanly checkpointed copy of the populated database.\n'
+        s += '    conn.close()\n'
+        s += '    populate_cache_save(context, populate_cache_dir, ' + \
+            'populate_cache_key)\n'
+        s += '    conn = context.wiredtiger_open("create," + conn_config)\n'
+        s += '    s = conn.open_session("' + sess_config + '")\n'
+        return s
+
     def translate_inner(self):
         workloadopts = ''
         input_as_string = ''
@@ -602,6 +645,7 @@ class Translator:
             s += '\n'
         s += 'context = Context()\n'
         extra_config = ''
+        conn_start = len(s)
         s += 'conn_config = ""\n'
 
         if async_config != '':
@@ -615,12 +659,15 @@ class Translator:
                 s += 'conn_config += extensions_config(["compressors/' + \
                     compression + '"])\n'
             compression = 'block_compressor=' + compression + ','
-        s += 'conn = context.wiredtiger_open("create," + conn_config)\n'
-        s += 's = conn.open_session("' + sess_config + '")\n'
-        s += '\n'
-        s += self.translate_table_create()
-        if create:
-            s += self.translate_populate()
+        if create and opts.icount != 0 and self.populate_cache != None:
+            s += self.translate_populate_cache(s[conn_start:], sess_config)
+        else:
+            s += 'conn = context.wiredtiger_open("create," + conn_config)\n'
+            s += 's = conn.open_session("' + sess_config + '")\n'
+            s += '\n'
+            s += self.translate_table_create()
+            if create:
+                s += self.translate_populate()
 
         thread_config = self.get_string_opt('threads', '')
         checkpoint_threads = self.get_int_opt('checkpoint_threads', 0)
@@ -660,6 +707,12 @@ def usage():
         '\n'
         'Options:\n'
         '    --python            Python output generated on stdout\n'
+        '    --populate-cache=DIR\n'
+        '                        Keep a copy of the populated database in DIR,\n'
+        '                        and skip the populate phase when a later run\n'
+        '                        has the same table and populate configuration\n'
+        '    --rebuild-populate-cache\n'
+        '                        Discard any cached copy and populate again\n'
         ' -v --verbose           Verbose output\n'
         '\n'
         'If --python is not specified, the resulting workload is run.'))
@@ -675,16 +728,23 @@ prefix = (
 
 exit_status = 0
 homedir = 'WT_TEST'
+populate_cache = None
+populate_rebuild = False
 for arg in sys.argv[1:]:
     if arg == '--pydebug':
         import pdb
         pdb.set_trace()
     elif arg == '--python':
         py_out = True
+    elif arg.startswith('--populate-cache='):
+        populate_cache = arg[len('--populate-cache='):]
+    elif arg == '--rebuild-populate-cache':
+        populate_rebuild = True
     elif arg == '--verbose' or arg == '-v':
         verbose += 1
     elif arg.endswith('.wtperf'):
-        translator = Translator(arg, prefix, verbose, homedir)
+        translator = Translator(arg, prefix, verbose, homedir,
+                                populate_cache, populate_rebuild)
         pysrc = translator.translate()
         if translator.has_error:
             exit_status = 1
@@ -571,6 +571,7 @@ NOTFOUND_OK(__wt_cursor::remove)
 NOTFOUND_OK(__wt_cursor::search)
 NOTFOUND_OK(__wt_cursor::update)
 NOTFOUND_OK(__wt_cursor::_modify)
+NOTFOUND_OK(__wt_cursor::_get_batch)
 ANY_OK(__wt_modify::__wt_modify)
 ANY_OK(__wt_modify::~__wt_modify)
 
@@ -961,6 +962,112 @@ typedef int int_void;
 		return (self->modify(self, &list[1], count));
 	}
 
+	/*
+	 * Batched traversal: step the cursor up to count times in a single
+	 * call, appending a (key, value) tuple for each record to the list.
+	 * Keys and values are returned as packed bytes, except that record
+	 * numbers are decoded unless raw is set, and JSON cursors return
+	 * strings.  Returns WT_NOTFOUND if the cursor ran off the end.
+	 */
+	int _get_batch(PyObject *list, int count, int raw, int prev) {
+		WT_ITEM k, v;
+		PyObject *key, *pair, *value;
+		uint64_t recno;
+		const char *jk, *jv;
+		int column, i, json, ret;
+
+		json = ($self->flags & WT_CURSTD_DUMP_JSON) != 0;
+		column = strcmp($self->key_format, "r") == 0;
+		for (i = 0; i < count; i++) {
+			if ((ret = prev ?
+			    $self->prev($self) : $self->next($self)) != 0)
+				return (ret);
+			if (json) {
+				if ((ret = $self->get_key($self, &jk)) != 0 ||
+				    (ret = $self->get_value($self, &jv)) != 0)
+					return (ret);
+				key = PyUnicode_FromString(jk);
+				value = PyUnicode_FromString(jv);
+			} else {
+				if ((ret = $self->get_key($self, &k)) != 0 ||
+				    (ret = $self->get_value($self, &v)) != 0)
+					return (ret);
+				if (column && !raw) {
+					if ((ret = wiredtiger_struct_unpack(
+					    $self->session, k.data, k.size,
+					    "q", &recno)) != 0)
+						return (ret);
+					key = PyLong_FromUnsignedLongLong(recno);
+				} else
+					key = PyBytes_FromStringAndSize(
+					    (const char *)k.data,
+					    (Py_ssize_t)k.size);
+				value = PyBytes_FromStringAndSize(
+				    (const char *)v.data, (Py_ssize_t)v.size);
+			}
+			pair = (key == NULL || value == NULL) ?
+			    NULL : PyTuple_Pack(2, key, value);
+			Py_XDECREF(key);
+			Py_XDECREF(value);
+			/* The Python error is already set, any errno will do. */
+			if (pair == NULL)
+				return (ENOMEM);
+			ret = PyList_Append(list, pair);
+			Py_DECREF(pair);
+			if (ret != 0)
+				return (ENOMEM);
+		}
+		return (0);
+	}
+
+	/*
+	 * Batched insert: insert each (key, value) tuple of packed bytes in
+	 * the list, stopping at the first error.
+	 */
+	int _insert_batch(PyObject *list) {
+		WT_ITEM k, v;
+		PyObject *pair;
+		Py_ssize_t i, len;
+		size_t size;
+		void *data;
+		int ret;
+
+		if ((len = PyList_Size(list)) < 0)
+			return (EINVAL);
+		for (i = 0; i < len; i++) {
+			pair = PyList_GET_ITEM(list, i);
+			if (!PyTuple_Check(pair) || PyTuple_GET_SIZE(pair) != 2) {
+				SWIG_Error(SWIG_TypeError,
+				    "in method 'Cursor_insert_many', "
+				    "records must be (key, value) pairs");
+				return (EINVAL);
+			}
+			if (unpackBytesOrString(
+			    PyTuple_GET_ITEM(pair, 0), &data, &size) != 0) {
+				SWIG_Error(SWIG_TypeError,
+				    "in method 'Cursor_insert_many', "
+				    "bad packed key");
+				return (EINVAL);
+			}
+			k.data = data;
+			k.size = size;
+			if (unpackBytesOrString(
+			    PyTuple_GET_ITEM(pair, 1), &data, &size) != 0) {
+				SWIG_Error(SWIG_TypeError,
+				    "in method 'Cursor_insert_many', "
+				    "bad packed value");
+				return (EINVAL);
+			}
+			v.data = data;
+			v.size = size;
+			$self->set_key($self, &k);
+			$self->set_value($self, &v);
+			if ((ret = $self->insert($self)) != 0)
+				return (ret);
+		}
+		return (0);
+	}
+
 %pythoncode %{
 	def get_key(self):
 		'''get_key(self) -> object
@@ -1056,6 +1163,76 @@ typedef int int_void;
 		self.set_value(value)
 		if self.insert() != 0:
 			raise KeyError
+
+	def _batch(self, count, raw, prev):
+		batch = []
+		self._get_batch(batch, count, 1 if raw else 0, prev)
+		if raw:
+			return batch
+		if self.is_json:
+			return [[k, v] for k, v in batch]
+		value_format = self.value_format
+		if self.is_column:
+			return [[k] + unpack(value_format, v) for k, v in batch]
+		key_format = self.key_format
+		return [unpack(key_format, k) + unpack(value_format, v)
+		    for k, v in batch]
+
+	def next_batch(self, count, raw=False):
+		'''next_batch(self, count, raw=False) -> [record, ...]
+		
+		Call WT_CURSOR::next up to \c count times in a single native
+		call.  Each record is returned as iteration returns it, the keys
+		followed by the values; if \c raw is set, records are returned
+		as (key, value) tuples of packed bytes instead.  Fewer than
+		\c count records, possibly none, are returned when the end of
+		the cursor's range is reached.  As when WT_CURSOR::next returns
+		::WT_NOTFOUND, the cursor is then reset, so the next batch
+		starts again from the first record: stop when a batch is
+		shorter than \c count.'''
+		return self._batch(count, raw, 0)
+
+	def prev_batch(self, count, raw=False):
+		'''prev_batch(self, count, raw=False) -> [record, ...]
+		
+		Call WT_CURSOR::prev up to \c count times in a single native
+		call, see Cursor.next_batch.'''
+		return self._batch(count, raw, 1)
+
+	def _pack_key(self, key):
+		if type(key) != tuple:
+			key = (key,)
+		if self.is_column:
+			return pack('r', _wt_recno(key[0]))
+		return pack(self.key_format, *key)
+
+	def _pack_value(self, value):
+		if type(value) != tuple:
+			value = (value,)
+		return pack(self.value_format, *value)
+
+	def insert_many(self, records, raw=False, batch_size=1000):
+		'''insert_many(self, records, raw=False, batch_size=1000) -> None
+		
+		Insert each (key, value) pair from the \c records iterable,
+		calling WT_CURSOR::insert for up to \c batch_size records per
+		native call.  If \c raw is set, keys and values must already be
+		packed bytes and are inserted without packing.'''
+		if self.is_json:
+			for key, value in records:
+				self[key] = value
+			return
+		batch = []
+		for key, value in records:
+			if not raw:
+				key = self._pack_key(key)
+				value = self._pack_value(value)
+			batch.append((key, value))
+			if len(batch) >= batch_size:
+				self._insert_batch(batch)
+				batch = []
+		if batch:
+			self._insert_batch(batch)
 %}
 };
 
@@ -28,12 +28,17 @@
 #
 
 from __future__ import print_function
-import math, struct, sys
+import array, math, struct, sys
 try:
-    from wiredtiger.packutil import _chr, _ord, x00_entry, xff_entry
+    from wiredtiger.packutil import _chr, _ord, empty_pack, x00_entry, \
+        xff_entry
 except ImportError:
     # When WiredTiger is installed as a package, python2 needs this
-    from .packutil import _chr, _ord, x00_entry, xff_entry
+    from .packutil import _chr, _ord, empty_pack, x00_entry, xff_entry
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 # Variable-length integer packing
 # need: up to 64 bits, both signed and unsigned
@@ -124,6 +129,177 @@ def unpack_int(b):
         sz = getbits(marker, 4)
         return (POS_2BYTE_MAX + 1 + get_int(b[1:], sz), b[sz+1:])
 
+# Bulk packing and unpacking of int64 columns
+#
+# pack_ints and unpack_ints produce and consume the concatenation of the
+# pack_int encodings of a sequence of values.  With NumPy available, both
+# run as a fixed number of array operations over the whole column; without
+# it, they fall back to the scalar functions above.
+
+INT64_MAX = 2**63 - 1
+
+# Size of the encoding that starts with a given marker byte, 0 if the
+# marker is not one pack_int can produce.
+def _packed_size(marker):
+    if marker < NEG_MULTI_MARKER:
+        return 0
+    elif marker < NEG_2BYTE_MARKER:
+        sz = 8 - getbits(marker, 4)
+        return sz + 1 if sz > 0 else 0
+    elif marker < NEG_1BYTE_MARKER:
+        return 2
+    elif marker < POS_2BYTE_MARKER:
+        return 1
+    elif marker < POS_MULTI_MARKER:
+        return 2
+    else:
+        sz = getbits(marker, 4)
+        return sz + 1 if sz <= 8 else 0
+
+PACKED_SIZE = [_packed_size(marker) for marker in range(256)]
+PACKED_SIZE_TABLE = bytes(bytearray(PACKED_SIZE))
+
+def _pack_ints_numpy(values):
+    if not hasattr(values, '__len__'):
+        values = numpy.fromiter(values, dtype=numpy.int64)
+    x = numpy.asarray(values, dtype=numpy.int64).ravel()
+    u = x.view(numpy.uint64)
+    neg_multi = x < NEG_2BYTE_MIN
+    neg_2byte = (x >= NEG_2BYTE_MIN) & (x < NEG_1BYTE_MIN)
+    one_byte = (x >= NEG_1BYTE_MIN) & (x <= POS_1BYTE_MAX)
+    pos_2byte = (x > POS_1BYTE_MAX) & (x <= POS_2BYTE_MAX)
+    pos_multi = x > POS_2BYTE_MAX
+    multi = neg_multi | pos_multi
+
+    # Multi-byte encodings store the big-endian bytes of the payload with
+    # leading sign bytes stripped: for negative values that is the value
+    # itself, less its leading 0xff bytes, for positive values the offset
+    # from the 2-byte range, less its leading zero bytes (but at least one).
+    payload = numpy.where(pos_multi,
+        u - numpy.uint64(POS_2BYTE_MAX + 1), u)
+    significant = numpy.where(neg_multi, ~u, payload)
+    nbytes = numpy.zeros(len(x), dtype=numpy.intp)
+    for i in range(8):
+        nbytes += significant >= numpy.uint64(1 << (8 * i))
+    nbytes[pos_multi] = numpy.maximum(nbytes[pos_multi], 1)
+
+    sizes = numpy.where(multi, nbytes + 1,
+        numpy.where(one_byte, 1, 2))
+    offsets = numpy.cumsum(sizes) - sizes
+    out = numpy.empty(int(sizes.sum()), dtype=numpy.uint8)
+
+    # The one byte encodings, -2^6 to 2^6 - 1, map to 0x40 to 0xbf.
+    out[offsets[one_byte]] = x[one_byte] + POS_1BYTE_MARKER
+
+    for sel, base, marker in (
+            (neg_2byte, NEG_2BYTE_MIN, NEG_2BYTE_MARKER),
+            (pos_2byte, POS_1BYTE_MAX + 1, POS_2BYTE_MARKER)):
+        v = x[sel] - base
+        out[offsets[sel]] = marker | (v >> 8)
+        out[offsets[sel] + 1] = v & 0xff
+
+    out[offsets[neg_multi]] = \
+        NEG_MULTI_MARKER | ((8 - nbytes[neg_multi]) & 0xf)
+    out[offsets[pos_multi]] = POS_MULTI_MARKER | nbytes[pos_multi]
+    for i in range(8):
+        sel = multi & (nbytes > i)
+        if not sel.any():
+            break
+        shift = (8 * (nbytes[sel] - 1 - i)).astype(numpy.uint64)
+        out[offsets[sel] + 1 + i] = \
+            (payload[sel] >> shift) & numpy.uint64(0xff)
+    return out.tobytes()
+
+def _unpack_ints_numpy(b, count):
+    buf = numpy.frombuffer(b, dtype=numpy.uint8)
+    n = len(buf)
+    # Every marker byte determines the size of its encoding, so finding
+    # where each value starts is a walk over the marker bytes; the values
+    # themselves are then decoded all at once.
+    sizes = bytes(b).translate(PACKED_SIZE_TABLE)
+    starts = array.array('q')
+    append = starts.append
+    pos = 0
+    while pos < n and (count is None or len(starts) < count):
+        size = _ord(sizes[pos])
+        if size == 0:
+            raise ValueError(
+                'invalid packed integer marker 0x%02x' % buf[pos])
+        append(pos)
+        pos += size
+    if pos > n:
+        raise ValueError('truncated packed integer')
+    if count is not None and len(starts) < count:
+        raise ValueError('packed buffer holds fewer than %d integers' % count)
+    starts = numpy.frombuffer(starts, dtype=numpy.int64).astype(numpy.intp)
+    size = numpy.frombuffer(sizes, dtype=numpy.uint8)[starts]
+
+    marker = buf[starts].astype(numpy.int64)
+    payload = numpy.zeros(len(starts), dtype=numpy.uint64)
+    for i in range(8):
+        sel = size > i + 1
+        if not sel.any():
+            break
+        payload[sel] = (payload[sel] << numpy.uint64(8)) | \
+            buf[starts[sel] + 1 + i].astype(numpy.uint64)
+    result = numpy.empty(len(starts), dtype=numpy.int64)
+
+    sel = marker < NEG_2BYTE_MARKER
+    nbits = (8 * (size[sel] - 1)).astype(numpy.uint64)
+    sign = numpy.where(nbits < 64,
+        ~((numpy.uint64(1) << (nbits % numpy.uint64(64))) - numpy.uint64(1)),
+        numpy.uint64(0))
+    result[sel] = (payload[sel] | sign).view(numpy.int64)
+
+    for low, high, base in (
+            (NEG_2BYTE_MARKER, NEG_1BYTE_MARKER, NEG_2BYTE_MIN),
+            (POS_2BYTE_MARKER, POS_MULTI_MARKER, POS_1BYTE_MAX + 1)):
+        sel = (marker >= low) & (marker < high)
+        result[sel] = base + (((marker[sel] & 0x1f) << 8) |
+            payload[sel].astype(numpy.int64))
+
+    sel = (marker >= NEG_1BYTE_MARKER) & (marker < POS_2BYTE_MARKER)
+    result[sel] = marker[sel] - POS_1BYTE_MARKER
+
+    sel = marker >= POS_MULTI_MARKER
+    if (payload[sel] > numpy.uint64(INT64_MAX - POS_2BYTE_MAX - 1)).any():
+        raise OverflowError('packed integer does not fit in an int64')
+    result[sel] = POS_2BYTE_MAX + 1 + payload[sel].astype(numpy.int64)
+    return result
+
+def _unpack_ints_python(b, count):
+    result = array.array('q')
+    b = memoryview(b)
+    while len(b) and (count is None or len(result) < count):
+        size = PACKED_SIZE[_ord(b[0])]
+        if size == 0:
+            raise ValueError(
+                'invalid packed integer marker 0x%02x' % _ord(b[0]))
+        if size > len(b):
+            raise ValueError('truncated packed integer')
+        x, b = unpack_int(b)
+        result.append(x)
+    if count is not None and len(result) < count:
+        raise ValueError('packed buffer holds fewer than %d integers' % count)
+    return result
+
+def pack_ints(values):
+    '''Pack a sequence of int64 values (a NumPy array, an array.array or
+    any iterable of ints) into a single buffer, the concatenation of the
+    pack_int encodings of each value.'''
+    if numpy is not None:
+        return _pack_ints_numpy(values)
+    return empty_pack.join([pack_int(x) for x in values])
+
+def unpack_ints(b, count=None):
+    '''Unpack a buffer of packed integers into an int64 array, a NumPy
+    array if NumPy is available, otherwise an array.array.  If count is
+    given, only the first count integers are unpacked, otherwise the buffer
+    must hold whole encodings only.'''
+    if numpy is not None:
+        return _unpack_ints_numpy(b, count)
+    return _unpack_ints_python(b, count)
+
 # Sanity testing
 if __name__ == '__main__':
     import random
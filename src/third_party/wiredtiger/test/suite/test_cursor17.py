@@ -0,0 +1,144 @@
+#!/usr/bin/env python
+#
+# Public Domain 2014-2020 MongoDB, Inc.
+# Public Domain 2008-2014 WiredTiger, Inc.
+#
+# This is free and unencumbered software released into the public domain.
+#
+# Anyone is free to copy, modify, publish, use, compile, sell, or
+# distribute this software, either in source code form or as a compiled
+# binary, for any purpose, commercial or non-commercial, and by any
+# means.
+#
+# In jurisdictions that recognize copyright laws, the author or authors
+# of this software dedicate any and all copyright interest in the
+# software to the public domain. We make this dedication for the benefit
+# of the public at large and to the detriment of our heirs and
+# successors. We intend this dedication to be an overt act of
+# relinquishment in perpetuity of all present and future rights to this
+# software under copyright law.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS BE LIABLE FOR ANY CLAIM, DAMAGES OR
+# OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE,
+# ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#
+# test_cursor17.py
+#   Cursors: batched traversal and bulk insert from Python
+#
+
+import wiredtiger, wttest
+from wtscenario import make_scenarios
+
+class test_cursor17(wttest.WiredTigerTestCase):
+    uri = 'table:test_cursor17'
+    nentries = 1000
+
+    scenarios = make_scenarios([
+        ('col', dict(keyfmt='r', valfmt='S')),
+        ('fix', dict(keyfmt='r', valfmt='8t')),
+        ('row', dict(keyfmt='S', valfmt='S')),
+        ('row-multi', dict(keyfmt='Si', valfmt='SQ')),
+    ])
+
+    def genkey(self, i):
+        if self.keyfmt == 'r':
+            return i + 1
+        elif self.keyfmt == 'S':
+            return 'key%06d' % i
+        return ('key%06d' % i, i)
+
+    def genvalue(self, i):
+        if self.valfmt == '8t':
+            return i & 0xff
+        elif self.valfmt == 'S':
+            return 'value' + str(i)
+        return ('value' + str(i), i * 3)
+
+    def record(self, i):
+        key = self.genkey(i)
+        value = self.genvalue(i)
+        key = list(key) if type(key) == tuple else [key]
+        value = list(value) if type(value) == tuple else [value]
+        return key + value
+
+    def create(self):
+        self.session.create(self.uri,
+            'key_format=' + self.keyfmt + ',value_format=' + self.valfmt)
+        return self.session.open_cursor(self.uri)
+
+    # Records inserted in bulk are the same ones that iteration finds.
+    def test_insert_many(self):
+        cursor = self.create()
+        cursor.insert_many(
+            ((self.genkey(i), self.genvalue(i)) for i in range(self.nentries)),
+            batch_size=64)
+        self.assertEqual([list(r) for r in cursor],
+            [self.record(i) for i in range(self.nentries)])
+
+    # Batches cover the table in order in both directions.
+    def test_next_prev_batch(self):
+        cursor = self.create()
+        cursor.insert_many(
+            (self.genkey(i), self.genvalue(i)) for i in range(self.nentries))
+
+        records = []
+        while True:
+            batch = cursor.next_batch(300)
+            self.assertLessEqual(len(batch), 300)
+            records += batch
+            if len(batch) < 300:
+                break
+        self.assertEqual(records,
+            [self.record(i) for i in range(self.nentries)])
+
+        # Reaching the end resets the cursor, so the next batch wraps
+        # around to the first records.
+        self.assertEqual(cursor.next_batch(10),
+            [self.record(i) for i in range(10)])
+
+        # A table that is an exact multiple of the batch size ends with
+        # an empty batch.
+        cursor.reset()
+        self.assertEqual(len(cursor.next_batch(self.nentries)),
+            self.nentries)
+        self.assertEqual(cursor.next_batch(self.nentries), [])
+
+        cursor.reset()
+        records = cursor.prev_batch(self.nentries + 1)
+        self.assertEqual(records,
+            [self.record(i) for i in reversed(range(self.nentries))])
+
+    # Raw batches can be reinserted into another object without packing.
+    def test_raw_round_trip(self):
+        cursor = self.create()
+        cursor.insert_many(
+            (self.genkey(i), self.genvalue(i)) for i in range(self.nentries))
+        raw = cursor.next_batch(self.nentries, raw=True)
+        self.assertEqual(len(raw), self.nentries)
+        self.assertTrue(all(type(k) == bytes and type(v) == bytes
+            for k, v in raw))
+
+        copy_uri = self.uri + '_copy'
+        self.session.create(copy_uri,
+            'key_format=' + self.keyfmt + ',value_format=' + self.valfmt)
+        copy = self.session.open_cursor(copy_uri)
+        copy.insert_many(raw, raw=True)
+        self.assertEqual([list(r) for r in copy],
+            [self.record(i) for i in range(self.nentries)])
+
+    # A failing insert raises and stops the batch.
+    def test_insert_many_duplicate(self):
+        self.session.create(self.uri,
+            'key_format=' + self.keyfmt + ',value_format=' + self.valfmt)
+        cursor = self.session.open_cursor(self.uri, None, 'overwrite=false')
+        records = [(self.genkey(i), self.genvalue(i)) for i in range(10)]
+        cursor.insert_many(records)
+        self.assertRaises(wiredtiger.WiredTigerError,
+            lambda: cursor.insert_many(records))
+
+if __name__ == '__main__':
+    wttest.run()
@@ -30,7 +30,9 @@
 #    Tests integer packing using public methods
 #
 
+import array, random
 import wiredtiger, wttest
+from wiredtiger import intpacking
 from wtscenario import make_scenarios
 
 class PackTester:
@@ -171,5 +173,58 @@ class test_intpack(wttest.WiredTigerTestCase):
                 pt.check_range(i - 1, i + 1)
                 i <<= 1
 
+# Test bulk integer packing matches the scalar encoding
+class test_intpack_bulk(wttest.WiredTigerTestCase):
+    scenarios = make_scenarios([
+        ('numpy', dict(use_numpy=True)),
+        ('python', dict(use_numpy=False)),
+    ])
+
+    def setUp(self):
+        super(test_intpack_bulk, self).setUp()
+        self.numpy = intpacking.numpy
+        if not self.use_numpy:
+            intpacking.numpy = None
+        elif self.numpy is None:
+            self.skipTest('NumPy is not installed')
+
+    def tearDown(self):
+        intpacking.numpy = self.numpy
+        super(test_intpack_bulk, self).tearDown()
+
+    def values(self):
+        r = random.Random(1)
+        values = [-2**63, 2**63 - 1, 2**63 - 8257, 0, -1]
+        # Every boundary between encoding sizes, and either side of it.
+        for edge in (intpacking.NEG_2BYTE_MIN, intpacking.NEG_1BYTE_MIN,
+                intpacking.POS_1BYTE_MAX, intpacking.POS_2BYTE_MAX):
+            values += [edge - 1, edge, edge + 1]
+        for shift in range(8, 63, 8):
+            values += [(1 << shift) + d for d in (-1, 0, 1)]
+            values += [-(1 << shift) + d for d in (-1, 0, 1)]
+        for big in (100, 10000, 1 << 40, 1 << 62):
+            values += [r.randint(-big, big) for i in range(1000)]
+        return values
+
+    def test_round_trip(self):
+        values = self.values()
+        packed = intpacking.empty_pack.join(
+            [intpacking.pack_int(x) for x in values])
+        self.assertEqual(intpacking.pack_ints(values), packed)
+        self.assertEqual(intpacking.pack_ints(array.array('q', values)),
+            packed)
+        self.assertEqual(list(intpacking.unpack_ints(packed)), values)
+        self.assertEqual(list(intpacking.unpack_ints(packed, 10)),
+            values[:10])
+        self.assertEqual(list(intpacking.unpack_ints(b'')), [])
+
+    def test_errors(self):
+        packed = intpacking.pack_ints(self.values())
+        self.assertRaises(ValueError, intpacking.unpack_ints, packed[:-1])
+        self.assertRaises(ValueError, intpacking.unpack_ints, b'\x00')
+        self.assertRaises(ValueError, intpacking.unpack_ints, packed[:5], 100)
+        self.assertRaises(OverflowError, intpacking.unpack_ints,
+            intpacking.pack_int(2**64 - 1))
+
 if __name__ == '__main__':
     wttest.run()
@@ -40,6 +40,11 @@
 #                   of the build directory.
 #    --verbose      verbose output to show step by step how run files are
 #                   compared to output files.
+#    --budget       also compare the number of system calls and bytes
+#                   transferred in each part of the output to the recorded
+#                   budget, see SYSCALL BUDGETS below.
+#    --record-budget
+#                   record the numbers seen as the new budget.
 
 # HOW TO DEBUG FAILURES OR CREATE A NEW TEST
 #
@@ -125,8 +130,27 @@
 # so that the run file can contain 'O_RDONLY' and it will match a numeric
 # expression (as it appears in the output of dtruss on OS/X).
 
+# SYSCALL BUDGETS
+#
+# Matching the run file checks which system calls are made, but a run file
+# using '...' says little about how many. With --budget, the strace output
+# is also split into regions at the lines the program wrote itself, the
+# same anchor points used when matching. A region is named by the line that
+# starts it, calls before the first such line are in the '(start)' region,
+# and a line seen more than once names a single region. For every traced
+# system call in each region, we count the calls and the bytes transferred
+# by the calls in 'budget_bytes_calls'. These are compared to the budget
+# recorded in the .budget file next to the .run file, and the test fails
+# listing every count that is higher than its budget. Only the calls named
+# in TRACE() are seen, so add the calls to be budgeted there.
+#
+# When a change is expected to alter the numbers, run with --record-budget
+# to write the .budget file from the run, and review its differences
+# before committing it. Budgets are only checked with strace on Linux, as
+# dtruss does not interleave the program's output with its own.
+
 from __future__ import print_function
-import argparse, distutils.spawn, fnmatch, os, platform, re, shutil, \
+import argparse, distutils.spawn, fnmatch, json, os, platform, re, shutil, \
     subprocess, sys
 
 # A class that represents a context in which predefined constants can be
@@ -158,6 +182,11 @@ defines_used = [
     'O_NOFOLLOW', 'O_NONBLOCK', 'O_RDONLY', 'O_RDWR', 'O_SHLOCK',
     'O_TRUNC', 'O_WRONLY', 'WT_USE_OPENAT' ]
 
+# System calls returning the number of bytes transferred, which are
+# added to their byte counts in syscall budgets.
+budget_bytes_calls = [ 'pread', 'pread64', 'preadv', 'pwrite', 'pwritev',
+    'read', 'readv', 'write', 'writev' ]
+
 ################################################################
 
 # Patterns that are used to match the .run file and/or the output.
@@ -184,6 +213,14 @@ dtruss_init_pat = re.compile(r'\s*SYSCALL\(args\)\s*=\s*return\s*')
 
 strace_pat = re.compile(ident + r'(\(.*\))\s*=\s(-*[0-9]+)()')
 
+# Any system call in strace output, including those with hex results,
+# e.g. mmap(NULL, 4096, ...) = 0x7f0000000000
+budget_call_pat = re.compile(ident + r'\(.*\)\s*=\s*(\S+)')
+# Lines strace writes about signals and exits,
+# e.g. +++ exited with 0 +++
+strace_info_pat = re.compile(r'(\+\+\+|---) .* (\+\+\+|---)$')
+budget_first_region = '(start)'
+
 tracepat = re.compile(r'TRACE\("([^"]*)"\)')
 runpat = re.compile(r'RUN\(([^\)]*)\)')
 systempat = re.compile(r'SYSTEM\("([^"]*)"\)')
@@ -761,6 +798,81 @@ class Runner:
             return False
         return True
 
+    # Return the syscall counts and bytes in each region of the strace
+    # output, as { region: { syscall: { 'count': N, 'bytes': N } } }.
+    def budget_usage(self):
+        usage = {}
+        region = usage.setdefault(budget_first_region, {})
+        with open(self.errfilename, 'r') as errfile:
+            for line in errfile:
+                line = re.sub(pwrite_in, pwrite_out, line.strip())
+                if not line or re.match(strace_info_pat, line):
+                    continue
+                m = re.match(budget_call_pat, line)
+                if not m:
+                    region = usage.setdefault(line, {})
+                    continue
+                callname = m.groups()[0]
+                if callname not in region:
+                    region[callname] = { 'count': 0, 'bytes': 0 }
+                region[callname]['count'] += 1
+                if callname in budget_bytes_calls:
+                    try:
+                        region[callname]['bytes'] += max(0, int(m.groups()[1]))
+                    except ValueError:
+                        pass
+        return usage
+
+    # Compare the syscall counts and bytes seen to the recorded budget, or
+    # record them as the budget.
+    def check_budget(self):
+        if self.args.systype != 'Linux':
+            msg("skipping budget for '" + self.runfile.filename +
+                "': budgets need strace output")
+            return True
+        budgetfilename = os.path.splitext(self.runfilename)[0] + '.budget'
+        usage = self.budget_usage()
+        if self.args.record_budget:
+            with open(budgetfilename, 'w') as f:
+                json.dump(usage, f, indent=4, sort_keys=True,
+                          separators=(',', ': '))
+                f.write('\n')
+            print('recorded budget:')
+            print('  ' + simplify_path(self.wttopdir, budgetfilename))
+            return True
+        try:
+            with open(budgetfilename, 'r') as f:
+                budget = json.load(f)
+        except (IOError, ValueError) as e:
+            self.fail(None, simplify_path(self.wttopdir, budgetfilename) +
+                      ': cannot read budget (' + str(e) +
+                      '), record one with --record-budget')
+            return False
+        print('comparing budget:')
+        print('  ' + simplify_path(self.wttopdir, budgetfilename))
+        over = []
+        for region in sorted(usage):
+            for callname in sorted(usage[region]):
+                got = usage[region][callname]
+                want = budget.get(region, {}).get(callname, {})
+                for key in [ 'count', 'bytes' ]:
+                    if got[key] > want.get(key, 0):
+                        over.append('  ' + region + ': ' + callname + ' ' +
+                                    key + ' ' + str(got[key]) +
+                                    ', budget ' + str(want.get(key, 0)) +
+                                    ' (+' + str(got[key] - want.get(key, 0)) +
+                                    ')')
+                    elif self.args.verbose and got[key] < want.get(key, 0):
+                        print('  ' + region + ': ' + callname + ' ' + key +
+                              ' ' + str(got[key]) + ', under budget ' +
+                              str(want.get(key, 0)))
+        if over:
+            self.fail(None, 'over budget:\n' + '\n'.join(over))
+            msg('if this is expected, re-record the budget with' +
+                ' --record-budget')
+            return False
+        return True
+
 # Run the syscall program.
 class SyscallCommand:
     def __init__(self, disttop, builddir):
@@ -784,6 +896,10 @@ class SyscallCommand:
                         help='keep the WT_TEST.* directories')
         ap.add_argument('--verbose', action="store_true",
                         help='add some verbose information')
+        ap.add_argument('--budget', action="store_true",
+                        help='compare syscall counts and bytes to the budget')
+        ap.add_argument('--record-budget', action="store_true",
+                        help='record syscall counts and bytes as the budget')
         ap.add_argument('tests', nargs='*',
                         help='the tests to run (defaults to all)')
         args = ap.parse_args()
@@ -839,6 +955,8 @@ class SyscallCommand:
                 print('  ' + simplify_path(self.disttop, runfilename))
                 print('  ' + simplify_path(self.disttop, runner.errfilename))
                 result = runner.match_lines()
+                if result and (args.budget or args.record_budget):
+                    result = runner.check_budget()
                 if not result and args.verbose:
                     printfile(runfilename, "runfile")
                     printfile(runner.errfilename, "trace output")
@@ -312,9 +312,12 @@ def assignStackDepths(dataframe):
     df = dataframe.sort_values(by=['start']);
     df = df.reset_index(drop = True);
 
-    for i in range(len(df.index)):
+    # Walk plain lists rather than indexing the dataframe for every row,
+    # which is many times slower.
+    #
+    stackDepths = [0] * len(df.index);
 
-        myEndTime = df.at[i, 'end'];
+    for i, myEndTime in enumerate(df['end'].tolist()):
 
         # Pop all items off stack whose end time is earlier than my
         # end time. They are not the callers on my stack, so I don't want to
@@ -323,26 +326,60 @@ def assignStackDepths(dataframe):
         while (len(stack) > 0 and stack[-1] < myEndTime):
             stack.pop();
 
-        df.at[i, 'stackdepth'] = len(stack);
-        stack.append(df.at[i, 'end']);
+        stackDepths[i] = len(stack);
+        stack.append(myEndTime);
+
+    df['stackdepth'] = stackDepths;
 
     return df;
 
-def createCallstackSeries(data, logfilename):
+#
+# Pair the begin and end records in a chunk of the trace with array
+# operations rather than by walking it row by row. A begin record opens a
+# frame one level deeper than the records before it, and an end record
+# closes the frame at its own level, so the end record matching a begin
+# record is the next record at the same level. A stable sort by level
+# therefore puts every end record right after its begin record.
+#
+# Returns the positions of the matched begin and end records, ordered by the
+# end record, and the positions of the begin records left open. Returns None
+# if the chunk has an invalid event, an end record with no begin record or
+# an end record for another function than the begin record it closes; those
+# chunks need the error handling of getIntervalData.
+#
+def matchIntervals(events, functions):
 
-    global firstTimeStamp;
-    global lastTimeStamp;
+    isEnd = (events == 1);
+    if (not np.all(isEnd | (events == 0))):
+        return None;
+
+    depth = np.cumsum(np.where(isEnd, -1, 1));
+    if (np.any(depth < 0)):
+        return None;
+
+    level = depth + isEnd;
+    order = np.argsort(level, kind='stable');
+    endPositions = np.flatnonzero(isEnd[order]);
+    ends = order[endPositions];
+    begins = order[endPositions - 1];
+
+    if (np.any(functions[begins] != functions[ends])):
+        return None;
+
+    isOpen = ~isEnd;
+    isOpen[begins] = False;
+
+    byEnd = np.argsort(ends);
+    return begins[byEnd], ends[byEnd], np.flatnonzero(isOpen);
+
+def createCallstackSeries(chunks, logfilename):
 
-    colors = [];
     beginIntervals = [];
-    dataFrame = None;
     endIntervals = [];
     errorReported = False;
     functionNames = [];
-    intervalBeginningsStack = [];
-    largestStackDepth = 0;
     logfile = None;
-    thisIsFirstRow = True;
+    openRecords = None;
 
     # Let's open the log file.
     try:
@@ -350,53 +387,82 @@ def createCallstackSeries(data, logfilename):
     except:
         logfile = sys.stdout;
 
-    for row in data.itertuples():
-        # row[0] is the timestamp, row[1] is the event type,
-        # row[2] is the function name.
+    for data in chunks:
+        # Begin records left open by the previous chunk may be closed
+        # in this one.
         #
-        if (row[1] == 0):
-            intervalBeginningsStack.append(row);
-        elif (row[1] == 1):
-            try:
-                intervalBegin, intervalEnd, function, error\
-                    = getIntervalData(intervalBeginningsStack, row, logfile);
-                if (error and (not errorReported)):
-                    errorReported = reportDataError(logfile, logfilename);
-            except:
-                if (not errorReported):
-                    errorReported = reportDataError(logfile, logfilename);
-                continue;
+        if (openRecords is not None):
+            data = pd.concat([openRecords, data]);
+
+        timestamps = data.index.to_numpy();
+        functions = data['Function'].to_numpy();
+        matched = matchIntervals(data['Event'].to_numpy(), functions);
+
+        if (matched is not None):
+            begins, ends, openPositions = matched;
+            beginIntervals.append(timestamps[begins]);
+            endIntervals.append(timestamps[ends]);
+            functionNames.append(functions[ends]);
+            openRecords = data.iloc[openPositions];
+            continue;
 
-            if (intervalBegin < firstTimeStamp):
-                firstTimeStamp =  intervalBegin;
-            if (intervalEnd > lastTimeStamp):
-                lastTimeStamp = intervalEnd;
+        # The chunk has errors, so match its records one by one and report
+        # them. openPositions tracks where the rows on the stack are.
+        #
+        intervalBeginningsStack = [];
+        openPositions = [];
+        chunkBegins = [];
+        chunkEnds = [];
+        chunkFunctions = [];
+
+        for position, row in enumerate(data.itertuples()):
+            # row[0] is the timestamp, row[1] is the event type,
+            # row[2] is the function name.
+            #
+            if (row[1] == 0):
+                intervalBeginningsStack.append(row);
+                openPositions.append(position);
+            elif (row[1] == 1):
+                try:
+                    intervalBegin, intervalEnd, function, error\
+                        = getIntervalData(intervalBeginningsStack, row,
+                                          logfile);
+                    if (error and (not errorReported)):
+                        errorReported = reportDataError(logfile, logfilename);
+                except:
+                    if (not errorReported):
+                        errorReported = reportDataError(logfile, logfilename);
+                    continue;
+                finally:
+                    del openPositions[len(intervalBeginningsStack):];
+
+                chunkBegins.append(intervalBegin);
+                chunkEnds.append(intervalEnd);
+                chunkFunctions.append(function);
 
-            colors.append(getColorForFunction(function));
-            beginIntervals.append(intervalBegin);
-            endIntervals.append(intervalEnd);
-            functionNames.append(function);
+            else:
+                print("Invalid event in this line:");
+                print(str(row[0]) + " " + str(row[1]) + " " + str(row[2]));
+                continue;
 
-        else:
-            print("Invalid event in this line:");
-            print(str(row[0]) + " " + str(row[1]) + " " + str(row[2]));
-            continue;
+        beginIntervals.append(np.array(chunkBegins, dtype=np.int64));
+        endIntervals.append(np.array(chunkEnds, dtype=np.int64));
+        functionNames.append(np.array(chunkFunctions, dtype=object));
+        openRecords = data.iloc[openPositions];
 
-    if (len(intervalBeginningsStack) > 0):
-        logfile.write(str(len(intervalBeginningsStack)) + " operations had a " +
+    if (openRecords is not None and len(openRecords.index) > 0):
+        logfile.write(str(len(openRecords.index)) + " operations had a " +
                       "begin record, but no matching end records. " +
                       "Please check that your operation tracking macros " +
                       "are properly inserted.\n");
         if (not errorReported):
             errorReported = reportDataError(logfile, logfilename);
-        intervalBeginningsStack = [];
 
     dict = {};
-    dict['color'] = colors;
-    dict['start'] = beginIntervals;
-    dict['end'] = endIntervals;
-    dict['function'] = functionNames;
-    dict['stackdepth'] = [0] * len(beginIntervals);
+    dict['start'] = np.concatenate(beginIntervals or [[]]).tolist();
+    dict['end'] = np.concatenate(endIntervals or [[]]).tolist();
+    dict['function'] = np.concatenate(functionNames or [[]]).tolist();
+    dict['stackdepth'] = [0] * len(dict['start']);
 
     dataframe = pd.DataFrame(data=dict);
     dataframe = assignStackDepths(dataframe);
@@ -404,7 +470,9 @@ def createCallstackSeries(data, logfilename):
     dataframe['durations'] = dataframe['end'] - dataframe['start'];
     dataframe['stackdepthNext'] = dataframe['stackdepth'] + 1;
 
-    return dataframe;
+    # The functions in the order their first interval ended, which is the
+    # order they are given colors in.
+    return dataframe, pd.unique(np.array(dict['function'], dtype=object));
 
 # For each function we only show the legend once. In this dictionary we
 # keep track of colors already used.
@@ -930,27 +998,51 @@ def checkForTimestampAndGetRowSkip(fname):
         else:
             return 0;
 
-def processFile(fname, dumpCleanDataBool):
-
-    global perFileDataFrame;
-    global perFuncDF;
+# Read a trace file in chunks of this many records, so that the memory
+# used to process it is bounded however large the file is.
+#
+chunkSize = 1000000;
 
-    skipRows = checkForTimestampAndGetRowSkip(fname);
+#
+# Build the intervals for one file. This runs in a worker process, so it
+# returns its results instead of recording them in the global state.
+#
+def buildIntervals(fname, skipRows, dumpCleanDataBool):
 
-    rawData = pd.read_csv(fname,
-                          header=None, delimiter=" ",
-                          index_col=2,
-                          names=["Event", "Function", "Timestamp"],
-                          dtype={"Event": np.int32, "Timestamp": np.int64},
-                          thousands=",", skiprows = skipRows);
+    chunks = pd.read_csv(fname,
+                         header=None, delimiter=" ",
+                         index_col=2,
+                         names=["Event", "Function", "Timestamp"],
+                         dtype={"Event": np.int32, "Timestamp": np.int64},
+                         thousands=",", skiprows = skipRows,
+                         chunksize = chunkSize);
 
     print(color.BOLD + color.BLUE +
           "Processing file " + str(fname) + color.END);
-    iDF = createCallstackSeries(rawData, "." + fname + ".log");
+    iDF, functions = createCallstackSeries(chunks, "." + fname + ".log");
 
     if (dumpCleanDataBool):
         dumpCleanData(fname, iDF);
 
+    return iDF, functions;
+
+def buildIntervalsForArgs(args):
+    return buildIntervals(*args);
+
+def processFile(fname, iDF, functions):
+
+    global firstTimeStamp;
+    global lastTimeStamp;
+    global perFileDataFrame;
+    global perFuncDF;
+
+    if (not iDF.empty):
+        firstTimeStamp = min(firstTimeStamp, iDF['start'].min());
+        lastTimeStamp = max(lastTimeStamp, iDF['end'].max());
+
+    for func in functions:
+        getColorForFunction(func);
+    iDF.insert(0, 'color', iDF['function'].map(funcToColor));
 
     perFileDataFrame[fname] = iDF;
 
@@ -964,6 +1056,28 @@ def processFile(fname, dumpCleanDataBool):
         else:
             perFuncDF[func] = pd.concat([perFuncDF[func], funcDF]);
 
+#
+# Build the intervals for all files in a pool of worker processes, since
+# the files are independent of each other, and then record them in file
+# order, so the functions get the same colors as when processing the files
+# one by one.
+#
+def processFiles(fnames, dumpCleanDataBool):
+
+    global targetParallelism;
+
+    workItems = [(fname, checkForTimestampAndGetRowSkip(fname),
+                  dumpCleanDataBool) for fname in fnames];
+
+    pool = multiprocessing.Pool(min(targetParallelism, len(workItems)));
+    try:
+        for fname, (iDF, functions) in zip(
+                fnames, pool.imap(buildIntervalsForArgs, workItems)):
+            processFile(fname, iDF, functions);
+    finally:
+        pool.close();
+        pool.join();
+
 
 #
 # For each function, split the timeline into buckets. In each bucket
@@ -1323,9 +1437,7 @@ def main():
     if not os.path.exists(bucketDir):
         os.makedirs(bucketDir);
 
-    # Parallelize this later, so we are working on files in parallel.
-    for fname in args.files:
-        processFile(fname, args.dumpCleanData);
+    processFiles(args.files, args.dumpCleanData);
 
     # Normalize all intervals by subtracting the first timestamp.
     normalizeIntervalData();
@@ -49,6 +49,11 @@ intervalLength = 1;
 # Each file has a timestamp indicating when the logging began
 perFileTimeStamps = {};
 
+# Read a trace file in chunks of this many records, so that the memory
+# used to process it is bounded however large the file is.
+#
+chunkSize = 1000000;
+
 # Codes for various colors for printing of informational and error messages.
 #
 class color:
@@ -73,9 +78,12 @@ def assignStackDepths(dataframe):
     df = dataframe.sort_values(by=['start']);
     df = df.reset_index(drop = True);
 
-    for i in range(len(df.index)):
+    # Walk plain lists rather than indexing the dataframe for every row,
+    # which is many times slower.
+    #
+    stackDepths = [0] * len(df.index);
 
-        myEndTime = df.at[i, 'end'];
+    for i, myEndTime in enumerate(df['end'].tolist()):
 
         # Pop all items off stack whose end time is earlier than my
         # end time. They are not the callers on my stack, so I don't want to
@@ -84,8 +92,10 @@ def assignStackDepths(dataframe):
         while (len(stack) > 0 and stack[-1] < myEndTime):
             stack.pop();
 
-        df.at[i, 'stackdepth'] = len(stack);
-        stack.append(df.at[i, 'end']);
+        stackDepths[i] = len(stack);
+        stack.append(myEndTime);
+
+    df['stackdepth'] = stackDepths;
 
     return df;
 
@@ -149,17 +159,53 @@ def getIntervalData(intervalBeginningsStack, intervalEnd, logfile):
 
     return beginTimestamp, endTimestamp, endFunctionName, errorOccurred;
 
-def createCallstackSeries(data, logfilename):
+#
+# Pair the begin and end records in a chunk of the trace with array
+# operations rather than by walking it row by row. A begin record opens a
+# frame one level deeper than the records before it, and an end record
+# closes the frame at its own level, so the end record matching a begin
+# record is the next record at the same level. A stable sort by level
+# therefore puts every end record right after its begin record.
+#
+# Returns the positions of the matched begin and end records, ordered by the
+# end record, and the positions of the begin records left open. Returns None
+# if the chunk has an invalid event, an end record with no begin record or
+# an end record for another function than the begin record it closes; those
+# chunks need the error handling of getIntervalData.
+#
+def matchIntervals(events, functions):
+
+    isEnd = (events == 1);
+    if (not np.all(isEnd | (events == 0))):
+        return None;
+
+    depth = np.cumsum(np.where(isEnd, -1, 1));
+    if (np.any(depth < 0)):
+        return None;
+
+    level = depth + isEnd;
+    order = np.argsort(level, kind='stable');
+    endPositions = np.flatnonzero(isEnd[order]);
+    ends = order[endPositions];
+    begins = order[endPositions - 1];
+
+    if (np.any(functions[begins] != functions[ends])):
+        return None;
+
+    isOpen = ~isEnd;
+    isOpen[begins] = False;
+
+    byEnd = np.argsort(ends);
+    return begins[byEnd], ends[byEnd], np.flatnonzero(isOpen);
+
+def createCallstackSeries(chunks, logfilename):
 
     beginIntervals = [];
-    dataFrame = None;
     endIntervals = [];
     errorReported = False;
     functionNames = [];
-    intervalBeginningsStack = [];
-    largestStackDepth = 0;
     logfile = None;
-    thisIsFirstRow = True;
+    openRecords = None;
 
     # Let's open the log file.
     try:
@@ -167,48 +213,84 @@ def createCallstackSeries(data, logfilename):
     except:
         logfile = sys.stdout;
 
-    for row in data.itertuples():
+    for data in chunks:
+        # Begin records left open by the previous chunk may be closed
+        # in this one.
+        #
+        if (openRecords is not None):
+            data = pd.concat([openRecords, data]);
+
+        timestamps = data.index.to_numpy();
+        functions = data['Function'].to_numpy();
+        matched = matchIntervals(data['Event'].to_numpy(), functions);
+
+        if (matched is not None):
+            begins, ends, openPositions = matched;
+            beginIntervals.append(timestamps[begins]);
+            endIntervals.append(timestamps[ends]);
+            functionNames.append(functions[ends]);
+            openRecords = data.iloc[openPositions];
+            continue;
 
-        timestamp = row[0];
-        eventType = row[1];
-        function = row[2];
+        # The chunk has errors, so match its records one by one and report
+        # them. openPositions tracks where the rows on the stack are.
+        #
+        intervalBeginningsStack = [];
+        openPositions = [];
+        chunkBegins = [];
+        chunkEnds = [];
+        chunkFunctions = [];
+
+        for position, row in enumerate(data.itertuples()):
+            timestamp = row[0];
+            eventType = row[1];
+            function = row[2];
+
+            if (eventType == 0):
+                intervalBeginningsStack.append(row);
+                openPositions.append(position);
+            elif (eventType == 1):
+                try:
+                    intervalBegin, intervalEnd, function, error\
+                        = getIntervalData(intervalBeginningsStack, row,
+                                          logfile);
+                    if (error and (not errorReported)):
+                        errorReported = reportDataError(logfile, logfilename);
+                except:
+                    if (not errorReported):
+                        errorReported = reportDataError(logfile, logfilename);
+                    continue;
+                finally:
+                    del openPositions[len(intervalBeginningsStack):];
+
+                chunkBegins.append(intervalBegin);
+                chunkEnds.append(intervalEnd);
+                chunkFunctions.append(function);
 
-        if (eventType == 0):
-            intervalBeginningsStack.append(row);
-        elif (eventType == 1):
-            try:
-                intervalBegin, intervalEnd, function, error\
-                    = getIntervalData(intervalBeginningsStack, row, logfile);
-                if (error and (not errorReported)):
-                    errorReported = reportDataError(logfile, logfilename);
-            except:
-                if (not errorReported):
-                    errorReported = reportDataError(logfile, logfilename);
+            else:
+                print("Invalid event in this line:");
+                print(str(timestamp) + " " + str(eventType) + " " +
+                      str(function));
                 continue;
 
-            beginIntervals.append(intervalBegin);
-            endIntervals.append(intervalEnd);
-            functionNames.append(function);
-
-        else:
-            print("Invalid event in this line:");
-            print(str(timestamp) + " " + str(eventType) + " " + str(function));
-            continue;
+        beginIntervals.append(np.array(chunkBegins, dtype=np.int64));
+        endIntervals.append(np.array(chunkEnds, dtype=np.int64));
+        functionNames.append(np.array(chunkFunctions, dtype=object));
+        openRecords = data.iloc[openPositions];
 
-    if (len(intervalBeginningsStack) > 0):
-        logfile.write(str(len(intervalBeginningsStack)) + " operations had a " +
+    if (openRecords is not None and len(openRecords.index) > 0):
+        logfile.write(str(len(openRecords.index)) + " operations had a " +
                       "begin record, but no matching end records. " +
                       "Please check that your operation tracking macros " +
                       "are properly inserted.\n");
         if (not errorReported):
             errorReported = reportDataError(logfile, logfilename);
-        intervalBeginningsStack = [];
 
     dataDict = {};
-    dataDict['start'] = beginIntervals;
-    dataDict['end'] = endIntervals;
-    dataDict['function'] = functionNames;
-    dataDict['stackdepth'] = [0] * len(beginIntervals);
+    dataDict['start'] = np.concatenate(beginIntervals or [[]]).tolist();
+    dataDict['end'] = np.concatenate(endIntervals or [[]]).tolist();
+    dataDict['function'] = np.concatenate(functionNames or [[]]).tolist();
+    dataDict['stackdepth'] = [0] * len(dataDict['start']);
 
     dataframe = pd.DataFrame(data=dataDict);
     dataframe = assignStackDepths(dataframe);
@@ -442,17 +524,18 @@ def processFile(fname):
 
     firstTimeStamp, skipRows = checkForTimestampAndGetRowSkip(fname);
 
-    rawData = pd.read_csv(fname,
-                          header=None, delimiter=" ",
-                          index_col=2,
-                          names=["Event", "Function", "Timestamp"],
-                          dtype={"Event": np.int32, "Timestamp": np.int64},
-                          thousands=",", skiprows = skipRows);
+    chunks = pd.read_csv(fname,
+                         header=None, delimiter=" ",
+                         index_col=2,
+                         names=["Event", "Function", "Timestamp"],
+                         dtype={"Event": np.int32, "Timestamp": np.int64},
+                         thousands=",", skiprows = skipRows,
+                         chunksize = chunkSize);
 
     print(color.BOLD + color.BLUE +
           "Processing file " + str(fname) + color.END);
 
-    iDF = createCallstackSeries(rawData, "." + fname + ".log");
+    iDF = createCallstackSeries(chunks, "." + fname + ".log");
 
     if not iDF.empty:
         parseIntervals(iDF, firstTimeStamp, fname);